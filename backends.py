@@ -0,0 +1,325 @@
+"""
+Auto Ester - Backends de entrada
+- Área de transferência: pyperclip, Tk (dono da seleção, X11) e memória
+- Teclado: pynput Controller ou FakeController que só registra eventos
+- Sonda das esperas por condição: FakeProbe, que acompanha o FakeController
+
+Os backends em memória permitem rodar o MacroEngine sem janela,
+sem servidor gráfico e sem enviar teclas de verdade.
+"""
+
+import time
+import threading
+
+from engine import SETTLE_POLL
+
+# Espera máxima pela thread do Tk ao tomar a seleção no início da execução
+TK_TIMEOUT = 1.0
+
+# ======================================================================
+# Área de transferência
+# ======================================================================
+
+class ClipboardBackend:
+    """Interface da área de transferência usada pelo worker.
+
+    begin() é chamado antes da execução e guarda o conteúdo do usuário;
+    end() devolve esse conteúdo quando a execução termina.
+    """
+
+    def __init__(self):
+        self.original = None
+
+    def copy(self, text):
+        raise NotImplementedError
+
+    def paste(self):
+        raise NotImplementedError
+
+    def wait_copied(self, text, timeout):
+        """Espera até a área de transferência conter text.
+
+        Retorna True se confirmou, False se o tempo esgotou e None se o
+        backend não permite verificar (o chamador usa a pausa fixa).
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                if self.paste() == text:
+                    return True
+            except Exception:
+                return None
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(SETTLE_POLL)
+
+    def before_paste(self):
+        """Chamado logo antes de enviar o Ctrl+V do valor copiado."""
+
+    def wait_pasted(self, timeout):
+        """Espera o aplicativo alvo ler a área de transferência após o Ctrl+V.
+
+        Mesmo retorno de wait_copied; por padrão não há como verificar.
+        """
+        return None
+
+    def begin(self):
+        try:
+            self.original = self.paste()
+        except Exception:
+            self.original = None
+
+    def end(self):
+        if self.original is None:
+            return
+        try:
+            self.copy(self.original)
+        except Exception as e:
+            print(f"Erro ao restaurar área de transferência: {e}")
+        finally:
+            self.original = None
+
+
+class PyperclipClipboard(ClipboardBackend):
+    """Backend via pyperclip (no Linux abre um xclip/xsel por cópia)."""
+
+    def __init__(self):
+        super().__init__()
+        import pyperclip
+        self.pyperclip = pyperclip
+
+    def copy(self, text):
+        self.pyperclip.copy(text)
+
+    def paste(self):
+        return self.pyperclip.paste()
+
+
+class TkClipboard(ClipboardBackend):
+    """Seleção CLIPBOARD servida pelo próprio root do Tk durante a execução (X11).
+
+    Não cria processos: o Tk é o dono da seleção e responde aos pedidos de
+    colagem do alvo com self.text, pelo handler próprio, o que permite
+    saber quando o alvo realmente leu o valor colado: só contam os
+    pedidos que chegam depois do Ctrl+V (before_paste), não os de um
+    gerenciador de área de transferência que lê a seleção ao mudar de dono.
+
+    O worker só troca self.text e flags. As chamadas ao Tk (tomar a
+    seleção, ler e devolver o conteúdo do usuário) ficam na thread do Tk:
+    begin() e end() as agendam com root.after uma vez por execução, e
+    copy() só agenda de novo se outro programa tomou a seleção.
+    """
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+        self.text = ""
+        self.active = False
+        self.reclaiming = False
+        self.owned = threading.Event()
+        self.armed = False
+        self.served = threading.Event()
+        root.selection_handle(self._serve, selection="CLIPBOARD")
+
+    # Thread do Tk
+
+    def _serve(self, offset, length):
+        """Handler da seleção CLIPBOARD chamado pelo Tk a cada pedido do alvo."""
+        offset = int(offset)
+        if offset == 0 and self.armed:
+            self.served.set()
+        return self.text[offset:offset + int(length)]
+
+    def _own(self):
+        self.reclaiming = False
+        if self.active:
+            self.root.selection_own(selection="CLIPBOARD", command=self._lost)
+            self.owned.set()
+
+    def _lost(self):
+        """Outro programa passou a ser o dono da seleção."""
+        self.owned.clear()
+
+    def _take(self):
+        self.original = self.paste()
+        self._own()
+
+    def _restore(self):
+        original, self.original = self.original, None
+        if original is not None:
+            self.root.clipboard_clear()
+            self.root.clipboard_append(original)
+
+    def paste(self):
+        """Conteúdo atual da área de transferência (só na thread do Tk)."""
+        from tkinter import TclError
+        try:
+            return self.root.clipboard_get()
+        except TclError:
+            return None
+
+    # Thread do worker
+
+    def begin(self):
+        self.active = True
+        self.text = ""
+        self.owned.clear()
+        self.root.after(0, self._take)
+        self.owned.wait(TK_TIMEOUT)
+
+    def copy(self, text):
+        self.armed = False
+        self.text = text
+        self.served.clear()
+        if not self.owned.is_set() and not self.reclaiming:
+            self.reclaiming = True
+            self.root.after(0, self._own)
+
+    def wait_copied(self, text, timeout):
+        # Enquanto formos o dono da seleção, é text que o alvo recebe;
+        # sem ela não há como verificar
+        if self.owned.wait(timeout) and self.text == text:
+            return True
+        return None
+
+    def before_paste(self):
+        self.served.clear()
+        self.armed = True
+
+    def wait_pasted(self, timeout):
+        if not self.owned.is_set():
+            return None
+        if self.served.wait(timeout):
+            return True
+        # Se a seleção mudou de dono no meio, o pedido não chega até nós
+        return False if self.owned.is_set() else None
+
+    def end(self):
+        self.active = False
+        self.armed = False
+        try:
+            self.root.after(0, self._restore)
+        except Exception as e:
+            # Janela já fechada: não há mais a quem devolver o conteúdo
+            print(f"Erro ao restaurar área de transferência: {e}")
+
+
+class MemoryClipboard(ClipboardBackend):
+    """Área de transferência em memória; guarda o histórico de cópias."""
+
+    def __init__(self, initial=""):
+        super().__init__()
+        self.text = initial
+        self.history = []
+
+    def copy(self, text):
+        self.text = text
+        self.history.append(text)
+
+    def paste(self):
+        return self.text
+
+    def wait_pasted(self, timeout):
+        # O FakeController "cola" instantaneamente
+        return True
+
+
+# ======================================================================
+# Teclado
+# ======================================================================
+
+def make_controller():
+    """Controller real do pynput."""
+    from pynput.keyboard import Controller
+    return Controller()
+
+
+class FakeKey:
+    """Tecla especial falsa (equivalente a pynput Key.enter etc.)."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"<{self.name}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeKey) and other.name == self.name
+
+    def __hash__(self):
+        return hash(("FakeKey", self.name))
+
+
+class FakeKeySpace:
+    """Espaço de teclas falso: qualquer atributo vira uma FakeKey."""
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name.startswith("f") and name[1:].isdigit() and not 1 <= int(name[1:]) <= 24:
+            raise AttributeError(name)
+        key = FakeKey(name)
+        setattr(self, name, key)
+        return key
+
+
+class FakeController:
+    """Controller que só registra eventos (instante, ação, tecla/texto).
+
+    Se clipboard for informado, um Ctrl+V registra também o texto colado
+    em self.pasted, o que permite conferir o resultado de uma execução.
+    """
+
+    key_space = FakeKeySpace()
+
+    def __init__(self, clipboard=None, clock=time.perf_counter):
+        self.clipboard = clipboard
+        self.clock = clock
+        self.events = []
+        self.pasted = []
+        self.typed = []
+        self.pressed = set()
+
+    def press(self, key):
+        self.events.append((self.clock(), "press", key))
+        if key == "v" and self.clipboard is not None and (
+                self.key_space.ctrl in self.pressed or self.key_space.cmd in self.pressed):
+            self.pasted.append(self.clipboard.paste())
+        self.pressed.add(key)
+
+    def release(self, key):
+        self.events.append((self.clock(), "release", key))
+        self.pressed.discard(key)
+
+    def type(self, text):
+        self.events.append((self.clock(), "type", text))
+        self.typed.append(text)
+
+    def make_probe(self):
+        return FakeProbe(self)
+
+
+class FakeProbe:
+    """Sonda falsa (waits): o "alvo" muda a cada evento recebido.
+
+    O título é title, se definido, ou "<n> eventos"; toda região tem o
+    número de eventos como hash, então "muda" é atendida logo após a
+    tecla e "estavel" assim que as teclas param.
+    """
+
+    def __init__(self, controller, title=None):
+        self.controller = controller
+        self.fixed_title = title
+
+    def title(self):
+        if self.fixed_title is not None:
+            return self.fixed_title
+        return f"{len(self.controller.events)} eventos"
+
+    def region_hash(self, rect):
+        return len(self.controller.events)
+
+    def close(self):
+        pass
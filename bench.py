@@ -0,0 +1,164 @@
+"""
+Auto Ester - Benchmark do motor do macro
+
+Roda o MacroEngine, press_combination e paste_clipboard contra o
+FakeController e a MemoryClipboard (que registram eventos com horário)
+e mede, para cada velocidade e número de boxes:
+- sobrecarga do motor por linha (tempo real - tempo planejado)
+- eventos de teclado por segundo
+- desvio do tempo total em relação ao planejado
+
+Exemplos:
+    python bench.py
+    python bench.py --linhas 50 --velocidades 0 0.01 0.05 --boxes 1 3
+    python bench.py --perfil rápido
+    python bench.py --max-sobrecarga-ms 5     (sai com erro se passar do limite)
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+from engine import (MacroEngine, compile_plan, compile_combination, press_combination,
+                    paste_clipboard, should_type, PASTE_COMBO)
+from backends import FakeController, MemoryClipboard
+from timing import BUILTIN_PROFILES, DEFAULT_PROFILE
+
+# Valores das boxes: curtos (digitados), longos e acentuados (colados)
+SAMPLE_VALUES = ("AB12", "Maria da Silva Pereira", "São João", "42", "ação-7731")
+SAMPLE_KEYS = ("tab", "enter", "shift+tab")
+
+
+def make_boxes(box_count, lines):
+    boxes = []
+    for b in range(box_count):
+        values = [f"{SAMPLE_VALUES[(i + b) % len(SAMPLE_VALUES)]}{i}" for i in range(lines)]
+        boxes.append((values, SAMPLE_KEYS[b % len(SAMPLE_KEYS)], "auto"))
+    return boxes
+
+
+def combo_sleep(combo, timing):
+    if not combo:
+        return 0.0
+    return 2 * timing.modifier_settle + timing.key_hold * len(combo.keys) + timing.combo_release
+
+
+def planned_time(plan):
+    """Soma das pausas que o motor deveria fazer (backends que verificam na hora)."""
+    delay = plan.delay
+    timing = plan.timing
+    total = 0.0
+    for i in range(plan.start, plan.end):
+        for step in plan.steps:
+            if i >= len(step.lines):
+                continue
+            if should_type(step.lines[i], step.mode, plan.type_max_len):
+                total += delay * timing.type_settle
+            else:
+                total += timing.paste_release
+            if step.key_after:
+                total += combo_sleep(step.key_after, timing) + delay * timing.after_key
+        total += delay * timing.line_gap
+    return total
+
+
+def bench_engine(delay, box_count, lines, timing):
+    clipboard = MemoryClipboard()
+    controller = FakeController(clipboard)
+    plan = compile_plan(make_boxes(box_count, lines), delay,
+                        key_space=controller.key_space, timing=timing)
+
+    started = time.perf_counter()
+    MacroEngine(controller, clipboard, threading.Event()).run(plan)
+    elapsed = time.perf_counter() - started
+
+    planned = planned_time(plan)
+    expected = [v for b in make_boxes(box_count, lines) for v in b[0]
+                if not should_type(v, "auto", plan.type_max_len)]
+    return {
+        "velocidade": delay,
+        "boxes": box_count,
+        "linhas": lines,
+        "real_s": elapsed,
+        "planejado_s": planned,
+        "desvio_pct": (elapsed - planned) / planned * 100 if planned else 0.0,
+        "sobrecarga_ms_linha": (elapsed - planned) / lines * 1000,
+        "eventos_s": len(controller.events) / elapsed if elapsed else 0.0,
+        "colagens_ok": sorted(controller.pasted) == sorted(expected),
+    }
+
+
+def bench_primitives(repeat, timing):
+    """Sobrecarga média (ms) de press_combination e paste_clipboard por chamada."""
+    controller = FakeController()
+    combo_str = "ctrl+shift+tab"
+    combo = compile_combination(combo_str, controller.key_space)
+    paste = compile_combination(PASTE_COMBO, controller.key_space)
+    results = {}
+
+    for name, call, sleep in (
+            ("press_combination (texto)",
+             lambda: press_combination(controller, combo_str, timing),
+             combo_sleep(combo, timing)),
+            ("press_combination (compilada)",
+             lambda: press_combination(controller, combo, timing),
+             combo_sleep(combo, timing)),
+            ("paste_clipboard", lambda: paste_clipboard(controller, paste, timing),
+             timing.paste_release)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            call()
+        elapsed = time.perf_counter() - started
+        results[name] = (elapsed / repeat - sleep) * 1000
+    return results
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="bench.py",
+                                     description="Benchmark do motor do Auto Ester.")
+    parser.add_argument("--linhas", type=int, default=10)
+    parser.add_argument("--velocidades", type=float, nargs="+", default=[0.0, 0.01, 0.05])
+    parser.add_argument("--boxes", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--perfil", default=DEFAULT_PROFILE, choices=sorted(BUILTIN_PROFILES),
+                        help="perfil de ritmo (padrão: %(default)s)")
+    parser.add_argument("--repeticoes", type=int, default=20,
+                        help="chamadas por primitiva (padrão: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="saída em JSON")
+    parser.add_argument("--max-sobrecarga-ms", type=float,
+                        help="falha se a sobrecarga por linha passar deste valor")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    timing = BUILTIN_PROFILES[args.perfil]
+    runs = [bench_engine(delay, boxes, args.linhas, timing)
+            for delay in args.velocidades for boxes in args.boxes]
+    primitives = bench_primitives(args.repeticoes, timing)
+
+    if args.json:
+        print(json.dumps({"motor": runs, "primitivas_ms": primitives}, indent=2,
+                         ensure_ascii=False))
+    else:
+        print(f"{'veloc.':>7} {'boxes':>5} {'real s':>8} {'plan. s':>8} {'desvio':>8} "
+              f"{'sobrec. ms/linha':>17} {'eventos/s':>10} {'ok':>3}")
+        for r in runs:
+            print(f"{r['velocidade']:>7.3f} {r['boxes']:>5} {r['real_s']:>8.3f} "
+                  f"{r['planejado_s']:>8.3f} {r['desvio_pct']:>7.1f}% "
+                  f"{r['sobrecarga_ms_linha']:>17.3f} {r['eventos_s']:>10.0f} "
+                  f"{'sim' if r['colagens_ok'] else 'NÃO':>3}")
+        print()
+        for name, overhead in primitives.items():
+            print(f"{name:<32} sobrecarga {overhead:.3f} ms/chamada")
+
+    failed = [r for r in runs if not r["colagens_ok"]]
+    if args.max_sobrecarga_ms is not None:
+        failed += [r for r in runs if r["sobrecarga_ms_linha"] > args.max_sobrecarga_ms]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Auto Ester - Progresso salvo em disco
+Guarda a próxima linha a executar junto com um hash do conteúdo das boxes,
+para que uma execução interrompida (parada ou travamento) possa ser
+retomada de onde parou. A gravação é espaçada (SAVE_INTERVAL) e atômica.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+CHECKPOINT_FILE = "auto_ester_progresso.json"
+SAVE_INTERVAL = 1.0
+
+
+def plan_fingerprint(plan):
+    """Hash do conteúdo das boxes do plano (arquivos são lidos pelo mmap)."""
+    h = hashlib.sha1()
+    hashed = {}
+    for step in plan.steps:
+        lines = step.lines
+        h.update(f"{len(lines)}\0".encode())
+        # Colunas de uma mesma planilha compartilham o mmap
+        field = getattr(lines, "field", None)
+        if field is not None:
+            h.update(f"col{field}\0".encode())
+        mm = getattr(lines, "mm", None)
+        if mm is not None and id(mm) in hashed:
+            # Já lido por outra box: só a referência a ela
+            h.update(f"mm{hashed[id(mm)]}\0".encode())
+        elif mm is not None:
+            hashed[id(mm)] = len(hashed)
+            h.update(mm)
+        else:
+            for line in lines:
+                h.update(line.encode("utf-8", errors="replace"))
+                h.update(b"\n")
+        h.update(b"\0")
+    # Com modelo da linha as mesmas boxes podem gerar envios diferentes
+    if any(action.guard < 0 for action in plan.program):
+        h.update(repr(plan.program).encode())
+    return h.hexdigest()
+
+
+def write_json_atomic(path, data, indent=None):
+    """Grava JSON num arquivo temporário e troca de uma vez pelo destino."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """Lê o progresso salvo; None se não existir ou estiver ilegível."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Checkpoint:
+    """Registra o progresso de uma execução sem gravar a cada linha.
+
+    Com path None nada é gravado nem apagado (simulação).
+    """
+
+    def __init__(self, fingerprint, start, end, path=CHECKPOINT_FILE,
+                 interval=SAVE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.fingerprint = fingerprint
+        self.start = start
+        self.end = end
+        self.next_line = start
+        self.last_write = 0.0
+        self.dirty = False
+
+    def mark(self, i):
+        """Linha i concluída por completo."""
+        self.next_line = i + 1
+        self.dirty = True
+        now = time.monotonic()
+        if now - self.last_write >= self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if not self.dirty or self.path is None:
+            return
+        try:
+            write_json_atomic(self.path, {
+                "fingerprint": self.fingerprint,
+                "start": self.start,
+                "end": self.end,
+                "next_line": self.next_line,
+                "saved_at": time.time(),
+            })
+            self.dirty = False
+        except OSError as e:
+            print(f"Erro ao salvar progresso: {e}")
+        self.last_write = time.monotonic() if now is None else now
+
+    def clear(self):
+        """Execução concluída: não há o que retomar."""
+        self.dirty = False
+        if self.path is None:
+            return
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
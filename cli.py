@@ -0,0 +1,409 @@
+"""
+Auto Ester - Execução pela linha de comando (sem janela)
+
+Cada arquivo informado é uma box (uma linha por entrada), na ordem
+Box 1, Box 2, Box 3... (quantas forem). Use "-" para deixar uma box de
+fora. Teclas após cada box, modos e velocidade vêm do auto_ester_config.json.
+
+Exemplos:
+    python cli.py nomes.txt codigos.txt
+    python cli.py nomes.txt - valores.txt --velocidade 0.05
+    python cli.py nomes.txt codigos.txt --simular
+    python cli.py nomes.txt codigos.txt --inicio 500 --fim 1000
+    python cli.py nomes.txt codigos.txt --auto-ajuste
+    python cli.py nomes.txt codigos.txt --unicas --novas   (pula repetidas e já enviadas)
+    python cli.py nomes.txt codigos.txt --paralelo 4 --xvfb --app "gedit" --janela gedit
+    python cli.py nomes.txt codigos.txt --retomar
+    python cli.py --csv planilha.csv              (mapeamento salvo na configuração)
+    python cli.py --csv planilha.csv --colunas Nome - CPF
+    python cli.py nomes.txt codigos.txt --janela "Planilha - LibreOffice"   (Linux/X11)
+    python cli.py nomes.txt codigos.txt --modelo "{1}{TAB}{2}{ENTER}{WAIT 200}"
+    python cli.py nomes.txt --modelo "{MACRO novo_registro}{1}{ENTER}"   (macro gravado no perfil)
+    python cli.py nomes.txt codigos.txt --esperar "" --esperar "titulo:Salvo@3000"
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from engine import (MacroEngine, Progress, compile_plan, format_eta, plan_boxes,
+                    DEFAULT_TYPE_MAX_LEN)
+from backends import (PyperclipClipboard, MemoryClipboard,
+                      FakeController, make_controller)
+from timing import LiveRate, resolve_profile, DEFAULT_PROFILE
+from metrics import RunMetrics, REPORTS_DIR
+from checkpoint import Checkpoint, load_checkpoint, plan_fingerprint, CHECKPOINT_FILE
+from columns import (columns_from_config, default_column, csv_import_from_config,
+                     default_csv_import, open_csv_import, map_csv_columns)
+from profiles import (load_store, profile_settings, update_profile, CONFIG_FILE,
+                      DEFAULT_PROFILE_NAME)
+from processed import ProcessedIndex, filter_rows, index_path
+from recorder import normalize_macros
+from sources import FileLines
+from template import parse_template
+
+
+# Intervalo mínimo entre atualizações da linha de progresso (segundos)
+PRINT_INTERVAL = 0.2
+
+
+def read_lines(path):
+    """Indexa as linhas não vazias de um arquivo de box (lidas sob demanda)."""
+    return FileLines(path)
+
+
+def load_settings(path, profile=None):
+    """Ajustes do perfil (o ativo se profile for None); {} sem configuração."""
+    if not path or not os.path.exists(path):
+        return {}
+    store = load_store(path)
+    if profile and profile not in store["profiles"]:
+        raise ValueError(f"perfil não encontrado: {profile}")
+    return profile_settings(store, profile)
+
+
+def profile_name(path, profile=None):
+    """Nome do perfil usado (o ativo na configuração se profile for None)."""
+    if profile:
+        return profile
+    if not path or not os.path.exists(path):
+        return DEFAULT_PROFILE_NAME
+    return load_store(path)["active_profile"]
+
+
+def box_entry(lines, idx, columns, after_overrides, wait_overrides):
+    """(ativa, linhas, tecla_após, modo, espera) da box idx, com os valores da linha de comando.
+
+    lines None (box pulada com "-") vira uma box desativada.
+    """
+    column = columns[idx] if idx < len(columns) else default_column()
+    key_after = after_overrides[idx] if idx < len(after_overrides) else column["key_after"]
+    wait = wait_overrides[idx] if idx < len(wait_overrides) else column["wait"]
+    return lines is not None, () if lines is None else lines, key_after, column["mode"], wait
+
+
+def build_boxes(paths, config, after_overrides=None, wait_overrides=None):
+    """Monta as entradas de engine.plan_boxes, uma por arquivo.
+
+    Boxes puladas com "-" entram desativadas: com modelo da linha {N}
+    continua sendo o N-ésimo arquivo.
+    """
+    columns = columns_from_config(config)
+    after_overrides = after_overrides or []
+    wait_overrides = wait_overrides or []
+    return [box_entry(None if path == "-" else read_lines(path), idx, columns,
+                      after_overrides, wait_overrides)
+            for idx, path in enumerate(paths)]
+
+
+def build_csv_boxes(path, config, names=None, after_overrides=None, wait_overrides=None):
+    """Boxes a partir das colunas de uma planilha CSV/TSV.
+
+    names (ou o mapeamento salvo na configuração) escolhe a coluna de cada
+    box; sem nenhum dos dois, cada coluna da planilha vira uma box.
+    """
+    spec = csv_import_from_config(config) or default_csv_import(path)
+    table = open_csv_import(spec, path)
+    if names:
+        mapping = [None if name == "-" else name for name in names]
+    else:
+        mapping = spec["mapping"] or list(table.names)
+
+    sources = map_csv_columns(table, mapping)
+    columns = columns_from_config(config)
+    after_overrides = after_overrides or []
+    wait_overrides = wait_overrides or []
+
+    return [box_entry(lines, idx, columns, after_overrides, wait_overrides)
+            for idx, lines in enumerate(sources)]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Executa o macro do Auto Ester sem interface gráfica.")
+    parser.add_argument("boxes", nargs="*", metavar="ARQUIVO",
+                        help="arquivo de cada box, em ordem ('-' pula a box)")
+    parser.add_argument("--csv", metavar="PLANILHA",
+                        help="lê as boxes das colunas de um CSV/TSV em vez de arquivos")
+    parser.add_argument("--colunas", nargs="+", metavar="NOME",
+                        help="coluna da planilha para cada box ('-' pula a box)")
+    parser.add_argument("--config", default=CONFIG_FILE,
+                        help="arquivo de configuração (padrão: %(default)s)")
+    parser.add_argument("--perfil-config", metavar="NOME",
+                        help="perfil salvo da configuração (padrão: o ativo)")
+    parser.add_argument("--velocidade", type=float,
+                        help="delay em segundos (padrão: o da configuração)")
+    parser.add_argument("--digitar-ate", type=int,
+                        help="células ASCII até este tamanho são digitadas")
+    parser.add_argument("--perfil",
+                        help="perfil de ritmo (padrão: o da configuração)")
+    parser.add_argument("--modelo", metavar="MODELO",
+                        help="modelo da linha, ex.: \"{1}{TAB}{2}{ENTER}\" ('' desliga o salvo)")
+    parser.add_argument("--apos", action="append", metavar="COMBO",
+                        help="tecla após cada box, em ordem (substitui a configuração)")
+    parser.add_argument("--esperar", action="append", metavar="CONDICAO",
+                        help="espera após cada box, em ordem, ex.: titulo:Salvo@3000, "
+                             "muda:x,y,l,a ou estavel:x,y,l,a ('' = pausa fixa)")
+    parser.add_argument("--janela", metavar="TITULO",
+                        help="envia direto para a janela (título ou id, só X11), sem --espera")
+    parser.add_argument("--listar-janelas", action="store_true",
+                        help="lista as janelas que podem ser alvo de --janela e sai")
+    parser.add_argument("--espera", type=float, default=2.0,
+                        help="segundos antes de começar, para focar o alvo (padrão: %(default)s)")
+    parser.add_argument("--inicio", type=int, default=1,
+                        help="primeira linha a executar (padrão: %(default)s)")
+    parser.add_argument("--fim", type=int,
+                        help="última linha a executar (padrão: até o fim)")
+    parser.add_argument("--retomar", action="store_true",
+                        help="continua a execução interrompida salva em disco")
+    parser.add_argument("--relatorio", nargs="?", const=REPORTS_DIR, metavar="PASTA",
+                        help="grava relatório JSON/CSV de tempos (padrão: %(const)s)")
+    parser.add_argument("--auto-ajuste", action="store_true",
+                        help="diminui o delay enquanto as verificações confirmam, "
+                             "partindo do valor ajustado salvo no perfil (e gravando o novo)")
+    parser.add_argument("--unicas", action="store_true",
+                        help="pula linhas repetidas (valores de todas as boxes, normalizados)")
+    parser.add_argument("--novas", action="store_true",
+                        help="pula linhas que o perfil já enviou e registra as enviadas agora")
+    parser.add_argument("--simular", action="store_true",
+                        help="usa teclado e área de transferência falsos e mostra um resumo "
+                             "(não grava nem apaga o progresso salvo)")
+    parser.add_argument("--paralelo", type=int, default=1, metavar="N",
+                        help="divide as linhas em N fragmentos, um processo por display (Linux)")
+    parser.add_argument("--displays", metavar="LISTA",
+                        help="displays dos fragmentos, ex.: :11,:12 (padrão: o atual)")
+    parser.add_argument("--xvfb", action="store_true",
+                        help="inicia um Xvfb para cada fragmento (sem --displays)")
+    parser.add_argument("--app", metavar="COMANDO",
+                        help="programa alvo iniciado em cada display dos fragmentos")
+    parser.add_argument("--progresso", default=CHECKPOINT_FILE, metavar="ARQUIVO",
+                        help="arquivo do progresso salvo (padrão: %(default)s)")
+    parser.add_argument("--progresso-json", action="store_true",
+                        help="progresso em linhas JSON, para o coordenador de --paralelo")
+    args = parser.parse_args(argv)
+    if not args.boxes and not args.csv and not args.listar_janelas:
+        parser.error("informe os arquivos das boxes ou --csv")
+    if args.paralelo < 1:
+        parser.error("--paralelo deve ser ao menos 1")
+    if args.paralelo > 1 and args.novas:
+        # Os fragmentos gravariam ao mesmo tempo no índice do perfil
+        parser.error("--novas não pode ser usado com --paralelo")
+    if args.paralelo > 1 and args.unicas:
+        # Cada fragmento só veria as repetidas do próprio intervalo
+        parser.error("--unicas não pode ser usado com --paralelo")
+    return args
+
+
+def print_windows():
+    from x11target import list_windows, TargetWindowError
+    try:
+        windows = list_windows()
+    except TargetWindowError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    for wid, title in windows:
+        print(f"0x{wid:08x}  {title}")
+    return 0
+
+
+def emit(data):
+    """Uma linha JSON para o coordenador (--progresso-json)."""
+    print(json.dumps(data, ensure_ascii=False), flush=True)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.listar_janelas:
+        return print_windows()
+
+    try:
+        config = load_settings(args.config, args.perfil_config)
+        text = (args.modelo if args.modelo is not None else config.get("template", "")).strip()
+        if args.csv:
+            entries = build_csv_boxes(args.csv, config, args.colunas, args.apos, args.esperar)
+        else:
+            entries = build_boxes(args.boxes, config, args.apos, args.esperar)
+        macros = normalize_macros(config.get("macros"))
+        template = parse_template(text, len(entries), macros) if text else None
+        boxes = plan_boxes(entries, template)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+
+    if args.paralelo > 1:
+        from shards import run_coordinator
+        # Só a divisão das linhas importa aqui; cada fragmento monta o próprio plano
+        plan = compile_plan(boxes, 0, key_space=FakeController.key_space,
+                            start=args.inicio - 1, end=args.fim, template=template)
+        return run_coordinator(args, argv, plan, os.path.abspath(__file__))
+
+    delay = args.velocidade if args.velocidade is not None else config.get("speed", 0.1)
+    type_max_len = (args.digitar_ate if args.digitar_ate is not None
+                    else config.get("type_max_len", DEFAULT_TYPE_MAX_LEN))
+
+    if args.simular:
+        clipboard = MemoryClipboard()
+        controller = FakeController(clipboard)
+    else:
+        clipboard = PyperclipClipboard()
+        if args.janela:
+            from x11target import X11WindowController, TargetWindowError
+            try:
+                controller = X11WindowController(args.janela)
+            except TargetWindowError as e:
+                print(f"Erro: {e}", file=sys.stderr)
+                return 2
+            print(f"Alvo: {controller.title} (0x{controller.window_id:08x})")
+        else:
+            controller = make_controller()
+
+    key_space = getattr(controller, "key_space", None)
+    start, end = args.inicio - 1, args.fim
+    saved = load_checkpoint(args.progresso) if args.retomar else None
+    if args.retomar:
+        if not saved:
+            print("Não há execução interrompida para retomar.", file=sys.stderr)
+            return 1
+        start, end = saved.get("next_line", 0), saved.get("end")
+
+    timing = resolve_profile(args.perfil or config.get("timing_profile", DEFAULT_PROFILE),
+                             config.get("timing_profiles"))
+    plan = compile_plan(boxes, delay, type_max_len, key_space, start=start, end=end,
+                        timing=timing, template=template)
+    if not plan.steps:
+        print("Nenhuma box contém linhas!", file=sys.stderr)
+        return 1
+
+    fingerprint = plan_fingerprint(plan)
+    if saved and saved.get("fingerprint") != fingerprint:
+        print("O conteúdo das boxes mudou desde a execução salva.", file=sys.stderr)
+        return 1
+    # A simulação não mexe no ponto de retomada de uma execução real
+    checkpoint = Checkpoint(fingerprint, plan.start, plan.end,
+                            path=None if args.simular else args.progresso)
+
+    index = None
+    rows = None
+    # A simulação consulta o índice mas não registra nada nele
+    record = args.novas and not args.simular
+
+    progress = Progress(plan.start, plan.end, plan.total)
+    last_print = [0.0]
+
+    def on_done(i):
+        progress.on_done(i)
+        checkpoint.mark(i)
+        if record and not rows.skip[i - rows.start]:
+            index.add(rows.hashes[i - rows.start])
+        now = time.monotonic()
+        if now - last_print[0] >= PRINT_INTERVAL or i + 1 == plan.end:
+            last_print[0] = now
+            _, done, rate, eta = progress.snapshot()
+            if args.progresso_json:
+                emit({"linha": i + 1, "feitas": done})
+                return
+            print(f"\rLinha {i+1}/{plan.total} | {rate:.2f} linhas/s | "
+                  f"restante {format_eta(eta)}", end="", flush=True)
+
+    stop_event = threading.Event()
+    metrics = RunMetrics()
+    rate = LiveRate(plan.delay)
+    if args.auto_ajuste:
+        tuned = config.get("tuned_speed")
+        start_delay = min(tuned, plan.delay) if tuned is not None else plan.delay
+        rate = LiveRate(start_delay, auto=True, ceiling=plan.delay)
+    engine = MacroEngine(controller, clipboard, stop_event,
+                         on_line=progress.on_line, on_done=on_done, metrics=metrics,
+                         rate=rate)
+
+    def save_tuned_rate():
+        """Guarda no perfil o delay em que o ajuste automático parou (como a interface)."""
+        # Simulação confirma tudo e fragmentos gravariam ao mesmo tempo
+        if not rate.auto or args.simular or args.progresso_json:
+            return
+        if not args.config or not os.path.exists(args.config):
+            return
+        try:
+            update_profile(args.config, profile_name(args.config, args.perfil_config),
+                           {"tuned_speed": round(rate.delay, 4)})
+        except OSError as e:
+            print(f"Erro ao gravar o delay ajustado: {e}", file=sys.stderr)
+
+    from x11target import target_errors
+    errors = target_errors()
+
+    started = time.perf_counter()
+    try:
+        # Filtro e espera inicial também respondem ao Ctrl+C (e ao coordenador)
+        if args.unicas or args.novas:
+            try:
+                if args.novas:
+                    index = ProcessedIndex(index_path(profile_name(args.config,
+                                                                   args.perfil_config)))
+                rows = filter_rows(plan.steps, plan.start, plan.end, index, args.unicas)
+            except (OSError, ValueError) as e:
+                print(f"Erro: {e}", file=sys.stderr)
+                return 2
+            print(f"Puladas: {rows.duplicates} repetidas, {rows.known} já enviadas")
+
+        if not args.simular and not args.janela and args.espera > 0:
+            print(f"Iniciando em {args.espera:.1f}s... (Ctrl+C para cancelar)")
+            time.sleep(args.espera)
+
+        started = time.perf_counter()
+        next_line = engine.run(plan, rows)
+    except KeyboardInterrupt:
+        stop_event.set()
+        checkpoint.flush()
+        save_tuned_rate()
+        if args.progresso_json:
+            emit({"fim": checkpoint.next_line, "parado": True})
+        print("\nInterrompido. Use --retomar para continuar.")
+        return 130
+    except errors as e:
+        # Janela alvo fechada ou display perdido: o progresso fica salvo
+        stop_event.set()
+        checkpoint.flush()
+        save_tuned_rate()
+        if args.progresso_json:
+            emit({"fim": checkpoint.next_line, "erro": str(e)})
+        print(f"\nErro: {e}. Use --retomar para continuar.", file=sys.stderr)
+        return 2
+    finally:
+        checkpoint.flush()
+        if index is not None:
+            index.close()
+        close = getattr(controller, "close", None)
+        if close is not None:
+            close()
+    elapsed = time.perf_counter() - started
+    checkpoint.flush()
+    # Um fragmento concluído guarda o progresso (linha final) para que o
+    # coordenador, ao retomar, não o confunda com um que nem começou
+    if next_line >= plan.end and not args.progresso_json:
+        checkpoint.clear()
+    save_tuned_rate()
+
+    print(f"\nConcluído: {next_line - plan.start}/{plan.end - plan.start} linhas em {elapsed:.2f}s")
+    print(metrics.live_text())
+    if rate.auto:
+        print(f"Delay ajustado: {rate.delay:.3f}s (de {plan.delay:.3f}s, "
+              f"{rate.backoffs} recuos)")
+    if args.progresso_json:
+        report = metrics.export(args.relatorio or REPORTS_DIR, samples=True)
+        emit({"fim": next_line, "feitas": progress.snapshot()[1], "relatorio": report})
+    elif args.relatorio:
+        print(f"Relatório: {metrics.export(args.relatorio)}.json / .csv")
+    if args.simular:
+        print(f"Eventos: {len(controller.events)} | "
+              f"coladas: {len(controller.pasted)} | digitadas: {len(controller.typed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
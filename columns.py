@@ -0,0 +1,102 @@
+"""
+Auto Ester - Modelo de colunas
+Cada coluna (box) do macro tem linhas, tecla após, modo de envio e se
+está ativa. A interface, a configuração e o motor são montados a partir
+desta lista, com quantas colunas forem necessárias.
+
+Formato na configuração:
+    "columns": [
+        {"enabled": true, "key_after": "tab", "mode": "auto",
+         "file": "", "content": "linha 1\\nlinha 2"},
+        ...
+    ]
+Configurações antigas ("boxes"/"keys.afterN" das três boxes fixas)
+continuam sendo lidas.
+
+Importação de planilha (repetida com um clique):
+    "csv_import": {"path": "dados.csv", "encoding": "", "delimiter": "",
+                   "header": true, "mapping": ["Nome", null, "CPF"]}
+mapping tem uma entrada por box: o nome da coluna da planilha ou null
+para deixar a box como está. encoding/delimiter vazios são detectados.
+"""
+
+from engine import INJECTION_MODES
+from sources import CsvTable
+
+DEFAULT_COLUMN_COUNT = 3
+LEGACY_COLUMN_COUNT = 3
+
+
+def default_column():
+    return {"enabled": True, "key_after": "enter", "mode": "auto", "wait": "", "file": "",
+            "content": ""}
+
+
+def normalize_column(data):
+    """Completa e valida uma coluna lida da configuração."""
+    column = default_column()
+    if isinstance(data, dict):
+        column["enabled"] = bool(data.get("enabled", True))
+        column["key_after"] = str(data.get("key_after", "enter") or "")
+        mode = data.get("mode", "auto")
+        column["mode"] = mode if mode in INJECTION_MODES else "auto"
+        column["wait"] = str(data.get("wait", "") or "")
+        column["file"] = str(data.get("file", "") or "")
+        column["content"] = str(data.get("content", "") or "")
+    return column
+
+
+def columns_from_config(config):
+    """Lista de colunas da configuração (nova ou no formato das três boxes)."""
+    if "columns" in config:
+        return [normalize_column(c) for c in config.get("columns") or []]
+
+    if "boxes" not in config and "keys" not in config:
+        return [default_column() for _ in range(DEFAULT_COLUMN_COUNT)]
+
+    keys = config.get("keys", {})
+    boxes = config.get("boxes", {})
+    return [normalize_column({
+        "enabled": boxes.get(f"box{n}_enabled", True),
+        "key_after": keys.get(f"after{n}", "enter"),
+        "mode": boxes.get(f"box{n}_mode", "auto"),
+        "file": boxes.get(f"box{n}_file", ""),
+        "content": boxes.get(f"box{n}_content", ""),
+    }) for n in range(1, LEGACY_COLUMN_COUNT + 1)]
+
+
+def default_csv_import(path=""):
+    return {"path": path, "encoding": "", "delimiter": "", "header": True, "mapping": []}
+
+
+def csv_import_from_config(config):
+    """Importação salva na configuração, completada; None se não houver."""
+    data = config.get("csv_import")
+    if not isinstance(data, dict) or not data.get("path"):
+        return None
+    mapping = data.get("mapping") or []
+    return {
+        "path": str(data["path"]),
+        "encoding": str(data.get("encoding") or ""),
+        "delimiter": str(data.get("delimiter") or ""),
+        "header": bool(data.get("header", True)),
+        "mapping": [str(name) if name else None for name in mapping],
+    }
+
+
+def open_csv_import(spec, path=None):
+    """Abre a planilha da importação (path substitui o arquivo salvo)."""
+    return CsvTable(path or spec["path"], delimiter=spec["delimiter"] or None,
+                    encoding=spec["encoding"] or None, header=spec["header"])
+
+
+def map_csv_columns(table, mapping):
+    """Uma CsvColumn (ou None) por box, segundo os nomes de mapping.
+
+    Levanta ValueError se algum nome não existir na planilha.
+    """
+    positions = {name: k for k, name in enumerate(table.names)}
+    missing = [name for name in mapping if name and name not in positions]
+    if missing:
+        raise ValueError("colunas não encontradas na planilha: " + ", ".join(missing))
+    return [table.column(positions[name]) if name else None for name in mapping]
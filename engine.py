@@ -0,0 +1,605 @@
+"""
+Auto Ester - Motor do macro
+Tudo que roda fora da interface:
+- Vocabulário de teclas e compilação de combinações
+- Plano de execução imutável (RunPlan) com o programa de ações de cada linha
+- MacroEngine: executa o plano com controller/clipboard injetados
+
+Não depende do Tk: pode ser usado pela interface, pela linha de comando
+ou por testes com os backends falsos de backends.py.
+"""
+
+import time
+import platform
+from collections import namedtuple
+
+from timing import Scheduler, LiveRate, BUILTIN_PROFILES, DEFAULT_PROFILE
+from waits import parse_condition, needs_baseline, read_condition, wait_condition, make_probe
+from x11target import TargetWindowError
+
+# ======================================================================
+# Vocabulário de teclas
+# ======================================================================
+
+# Nome digitado pelo usuário -> atributo do espaço de teclas (pynput Key)
+MODIFIER_NAMES = {
+    "ctrl": "ctrl", "control": "ctrl",
+    "shift": "shift", "alt": "alt",
+    "cmd": "cmd", "command": "cmd", "win": "cmd"
+}
+
+SPECIAL_NAMES = {
+    "enter": "enter", "return": "enter", "space": "space",
+    "tab": "tab", "esc": "esc", "escape": "esc",
+    "delete": "delete", "del": "delete",
+    "backspace": "backspace", "up": "up",
+    "down": "down", "left": "left", "right": "right",
+    "home": "home", "end": "end",
+    "pageup": "page_up", "pagedown": "page_down",
+    "insert": "insert"
+}
+
+PASTE_COMBO = "cmd+v" if platform.system() == "Darwin" else "ctrl+v"
+
+# Combinação já resolvida: modificadores e teclas prontos para o Controller
+Combination = namedtuple("Combination", ["modifiers", "keys"])
+
+# Plano de execução imutável montado antes do worker iniciar
+BoxStep = namedtuple("BoxStep", ["lines", "key_after", "mode", "wait"])
+RunPlan = namedtuple("RunPlan", ["steps", "delay", "total", "type_max_len", "paste",
+                                 "start", "end", "timing", "program"])
+
+# Programa executado em cada linha: ações (op, arg, guard). guard é o
+# índice do passo cuja falta de valor na linha pula a ação (-1: nunca pula)
+Action = namedtuple("Action", ["op", "arg", "guard"])
+OP_FIELD = 0   # arg: índice do passo (box) cujo valor é enviado
+OP_TEXT = 1    # arg: texto fixo
+OP_KEY = 2     # arg: (Combination, faz a pausa fixa após a tecla)
+OP_WAIT = 3    # arg: segundos
+OP_ARM = 4     # arg: (WaitCondition, índice do OP_COND); lê o estado antes da ação
+OP_COND = 5    # arg: waits.WaitCondition; espera a condição
+OP_REPLAY = 6  # arg: ((pausa, pressiona, tecla), ...) de um macro gravado
+
+# Como cada célula é enviada: automático, sempre colar ou sempre digitar
+INJECTION_MODES = ("auto", "colar", "digitar")
+DEFAULT_TYPE_MAX_LEN = 12
+
+# Espera verificada da área de transferência (segundos)
+SETTLE_TIMEOUT = 0.25
+SETTLE_POLL = 0.003
+
+
+def default_key_space():
+    """Espaço de teclas do pynput (importado só quando necessário)."""
+    from pynput.keyboard import Key
+    return Key
+
+
+def key_space_for(controller):
+    """Espaço de teclas do controller; backends falsos expõem key_space."""
+    return getattr(controller, "key_space", None) or default_key_space()
+
+
+def compile_combination(combo_str, key_space=None):
+    """Converte 'ctrl+shift+tab' em uma Combination pronta (ou None se vazia)."""
+    if not combo_str or not combo_str.strip():
+        return None
+
+    if key_space is None:
+        key_space = default_key_space()
+
+    modifiers = []
+    keys = []
+
+    for p in combo_str.split("+"):
+        p = p.strip().lower()
+
+        if p in MODIFIER_NAMES:
+            modifiers.append(getattr(key_space, MODIFIER_NAMES[p]))
+        elif p in SPECIAL_NAMES:
+            keys.append(getattr(key_space, SPECIAL_NAMES[p]))
+        elif p.startswith("f") and len(p) <= 3 and p[1:].isdigit():
+            try:
+                keys.append(getattr(key_space, p))
+            except AttributeError:
+                pass
+        elif len(p) == 1:
+            keys.append(p)
+
+    if not modifiers and not keys:
+        return None
+    return Combination(tuple(modifiers), tuple(keys))
+
+
+def compile_key(name, key_space=None):
+    """Tecla única pelo nome gravado ('enter', 'f5', 'A'); None se desconhecida."""
+    if key_space is None:
+        key_space = default_key_space()
+    if len(name) == 1:
+        return name
+    lower = name.lower()
+    if lower in MODIFIER_NAMES:
+        return getattr(key_space, MODIFIER_NAMES[lower])
+    if lower in SPECIAL_NAMES:
+        return getattr(key_space, SPECIAL_NAMES[lower])
+    try:
+        return getattr(key_space, lower)
+    except AttributeError:
+        return None
+
+
+def compile_replay(steps, key_space=None):
+    """Resolve as teclas de recorder.replay_steps; teclas desconhecidas são omitidas."""
+    replay = []
+    for gap, down, name in steps:
+        key = compile_key(name, key_space)
+        if key is not None:
+            replay.append((gap, down, key))
+    return tuple(replay)
+
+
+def compile_program(steps, template, key_space):
+    """Programa de ações da linha.
+
+    Sem modelo, cada box vira "valor, tecla após, espera" (pulados quando a
+    box não tem a linha); a espera por condição substitui a pausa fixa após
+    a tecla. Com modelo (tokens de template.parse_template), segue os
+    tokens; box sem valor na linha envia texto vazio.
+
+    Condições que comparam com o estado anterior (waits.needs_baseline)
+    ganham um OP_ARM antes da ação que as precede; o estado lido fica
+    guardado pela posição do OP_COND, para que condições iguais no mesmo
+    modelo não dividam a leitura.
+    """
+    program = []
+    armed = {}
+
+    def add_condition(cond, guard, trigger):
+        # trigger: índice da ação que deve provocar a mudança (tecla, campo ou macro)
+        waiting = Action(OP_COND, cond, guard)
+        if needs_baseline(cond) and trigger is not None:
+            arm = Action(OP_ARM, cond, guard)
+            armed[id(arm)] = waiting
+            program.insert(trigger, arm)
+        program.append(waiting)
+
+    def finish():
+        # As posições só ficam fixas depois do último OP_ARM inserido
+        position = {id(action): n for n, action in enumerate(program)}
+        return tuple(
+            Action(OP_ARM, (action.arg, position[id(armed[id(action)])]), action.guard)
+            if action.op == OP_ARM else action
+            for action in program)
+
+    if template is None:
+        for index, step in enumerate(steps):
+            trigger = len(program)
+            program.append(Action(OP_FIELD, index, index))
+            if step.key_after:
+                trigger = len(program)
+                program.append(Action(OP_KEY, (step.key_after, step.wait is None), index))
+            if step.wait is not None:
+                add_condition(step.wait, index, trigger)
+        return finish()
+
+    # Pausas fixas e outras esperas não mudam o alvo: o estado de antes
+    # é lido antes da última ação que envia algo
+    trigger = None
+    for kind, value in template:
+        if kind == "campo":
+            trigger = len(program)
+            program.append(Action(OP_FIELD, value, -1))
+        elif kind == "texto":
+            trigger = len(program)
+            program.append(Action(OP_TEXT, value, -1))
+        elif kind == "tecla":
+            combo = compile_combination(value, key_space)
+            if combo:
+                trigger = len(program)
+                program.append(Action(OP_KEY, (combo, True), -1))
+        elif kind == "espera":
+            program.append(Action(OP_WAIT, float(value), -1))
+        elif kind == "condicao":
+            add_condition(value, -1, trigger)
+            if trigger is not None and needs_baseline(value):
+                # O OP_ARM inserido empurrou a ação uma posição
+                trigger += 1
+        elif kind == "macro":
+            replay = compile_replay(value, key_space)
+            if replay:
+                trigger = len(program)
+                program.append(Action(OP_REPLAY, replay, -1))
+    return finish()
+
+
+def compile_plan(boxes, delay, type_max_len=DEFAULT_TYPE_MAX_LEN, key_space=None,
+                 start=0, end=None, timing=None, template=None):
+    """Monta o RunPlan a partir de (linhas, tecla_após, modo[, espera]) das boxes ativas.
+
+    As linhas podem ser listas (copiadas para tuplas) ou sequências somente
+    leitura como sources.FileLines, usadas sem cópia. start/end limitam o
+    intervalo de linhas executado (índices a partir de 0, end exclusivo) e
+    timing é o timing.TimingProfile (padrão se omitido). A espera opcional
+    é uma condição de waits.parse_condition (ValueError se inválida).
+
+    Com template (tokens de template.parse_template), boxes é posicional:
+    {1} é boxes[0] mesmo que esteja vazia, e a tecla após das boxes é
+    ignorada em favor das teclas do modelo.
+    """
+    if key_space is None:
+        key_space = default_key_space()
+
+    steps = tuple(
+        BoxStep(tuple(lines) if isinstance(lines, list) else lines,
+                compile_combination(key_after, key_space),
+                mode if mode in INJECTION_MODES else "auto",
+                parse_condition(wait[0]) if wait else None)
+        for lines, key_after, mode, *wait in boxes
+        if lines or template is not None
+    )
+    program = compile_program(steps, template, key_space)
+    used = {a.arg for a in program if a.op == OP_FIELD}
+    total = max((len(steps[k].lines) for k in used), default=0)
+    end = total if end is None else max(0, min(int(end), total))
+    start = max(0, min(int(start), end))
+    return RunPlan(steps, float(delay), total, int(type_max_len),
+                   compile_combination(PASTE_COMBO, key_space), start, end,
+                   timing or BUILTIN_PROFILES[DEFAULT_PROFILE], program)
+
+
+def plan_boxes(entries, template=None):
+    """(linhas, tecla_após, modo, espera) para compile_plan, a partir de todas as boxes.
+
+    entries traz (ativa, linhas, tecla_após, modo, espera) de cada box, na
+    ordem da interface (ou dos arquivos da linha de comando). Com modelo,
+    {N} é a box N: todas entram e as desativadas entram vazias. Sem
+    modelo, só as ativas, com a espera validada (ValueError com o número
+    da box).
+    """
+    boxes = []
+    for n, (enabled, lines, key_after, mode, wait) in enumerate(entries, start=1):
+        if template is not None:
+            boxes.append((lines if enabled else (), "", mode, ""))
+        elif enabled:
+            wait = wait.strip()
+            try:
+                parse_condition(wait)
+            except ValueError as e:
+                raise ValueError(f"Box {n}, esperar: {e}")
+            boxes.append((lines, key_after.strip(), mode, wait))
+    return boxes
+
+
+def should_type(text, mode, type_max_len):
+    """Decide se a célula é digitada (True) ou colada via área de transferência."""
+    if mode == "digitar":
+        return True
+    if mode == "colar":
+        return False
+    return len(text) <= type_max_len and text.isascii()
+
+
+def press_combination(controller, combo, timing=None, wait=time.sleep):
+    """Envia a combinação de teclas ao SO usando o controller.
+
+    Aceita uma Combination já compilada ou a string da combinação. As
+    pausas vêm de timing (TimingProfile) e são feitas por wait, que pode
+    ser o Scheduler.wait da execução.
+    """
+    if isinstance(combo, str):
+        combo = compile_combination(combo, key_space_for(controller))
+    if not combo:
+        return
+    if timing is None:
+        timing = BUILTIN_PROFILES[DEFAULT_PROFILE]
+
+    modifiers, keys = combo
+
+    for m in modifiers:
+        controller.press(m)
+    wait(timing.modifier_settle)
+
+    for k in keys:
+        try:
+            controller.press(k)
+            wait(timing.key_hold)
+            controller.release(k)
+        except TargetWindowError:
+            # Janela alvo fechada: a execução inteira para, não só esta tecla
+            raise
+        except Exception as e:
+            print(f"Erro ao pressionar tecla {k}: {e}")
+
+    wait(timing.modifier_settle)
+    for m in reversed(modifiers):
+        controller.release(m)
+    wait(timing.combo_release)
+
+
+def replay_keys(controller, replay, timing=None, wait=time.sleep, stop_event=None):
+    """Reproduz um macro gravado (compile_replay) com as pausas já comprimidas.
+
+    Nenhuma pausa fica abaixo de timing.key_hold. Teclas ainda pressionadas
+    no fim (ou ao parar no meio) são soltas, e soltar uma tecla que o
+    macro não pressionou é ignorado.
+    """
+    if timing is None:
+        timing = BUILTIN_PROFILES[DEFAULT_PROFILE]
+    held = []
+    try:
+        for n, (gap, down, key) in enumerate(replay):
+            if stop_event is not None and stop_event.is_set():
+                break
+            if n:
+                wait(max(gap, timing.key_hold))
+            if down:
+                controller.press(key)
+                if key not in held:
+                    held.append(key)
+            elif key in held:
+                controller.release(key)
+                held.remove(key)
+    finally:
+        for key in reversed(held):
+            controller.release(key)
+    wait(timing.combo_release)
+
+
+def paste_clipboard(controller, paste=None, timing=None, wait=time.sleep):
+    """Simula Ctrl+V ou Cmd+V conforme o sistema."""
+    if paste is None:
+        paste = compile_combination(PASTE_COMBO, key_space_for(controller))
+    if timing is None:
+        timing = BUILTIN_PROFILES[DEFAULT_PROFILE]
+
+    modifier = paste.modifiers[0]
+    controller.press(modifier)
+    controller.press('v')
+    controller.release('v')
+    controller.release(modifier)
+    wait(timing.paste_release)
+
+
+# ======================================================================
+# Execução do plano
+# ======================================================================
+
+class Progress:
+    """Progresso publicado pelo worker e lido por amostragem pela interface.
+
+    O worker só atribui inteiros (sem filas nem chamadas ao Tk); quem lê
+    chama snapshot() no ritmo que quiser, independente da velocidade do
+    macro.
+    """
+
+    def __init__(self, start, end, total):
+        self.start = start
+        self.end = end
+        self.total = total
+        self.line = start
+        self.done = 0
+        self.t0 = time.perf_counter()
+
+    def on_line(self, i, total):
+        self.line = i
+
+    def on_done(self, i):
+        self.done += 1
+
+    def snapshot(self):
+        """(linha atual, concluídas, linhas/s, segundos restantes ou None)"""
+        line, done = self.line, self.done
+        elapsed = time.perf_counter() - self.t0
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = self.end - self.start - done
+        eta = remaining / rate if rate > 0 else None
+        return line, done, rate, eta
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def merge_check(verified, result):
+    """Junta uma verificação (True/False/None) ao resultado da linha; False prevalece."""
+    if result is None or verified is False:
+        return verified
+    return result
+
+
+class MacroEngine:
+    """Executa um RunPlan com controller e área de transferência injetados.
+
+    on_line(i, total) é chamado no início de cada linha e on_done(i) quando
+    a linha i foi concluída por completo, ambos a partir da thread que
+    chamou run(). Se metrics (metrics.RunMetrics) for informado, o tempo
+    de cada etapa é registrado. probe (waits) lê título e tela para as
+    esperas por condição; sem ele, uma é criada quando o plano usa.
+    rate (timing.LiveRate) permite mudar o delay durante a execução; sem
+    ele vale plan.delay do começo ao fim.
+    """
+
+    def __init__(self, controller, clipboard, stop_event, on_line=None, on_done=None,
+                 metrics=None, probe=None, rate=None):
+        self.controller = controller
+        self.probe = probe
+        self.rate = rate
+        self.clipboard = clipboard
+        self.stop_event = stop_event
+        self.on_line = on_line
+        self.on_done = on_done
+        self.metrics = metrics
+
+    def run(self, plan, rows=None):
+        """Executa o plano e retorna o índice da próxima linha não executada.
+
+        rows (processed.RowFilter) marca linhas a pular (repetidas ou já
+        enviadas); elas contam como concluídas, sem enviar nada. Parar no
+        meio de um macro gravado, de uma pausa do modelo ou de uma espera
+        por condição interrompe a linha na hora e ela é devolvida como a
+        próxima a executar.
+        """
+        controller = self.controller
+        clipboard = self.clipboard
+        stop_event = self.stop_event
+        on_line = self.on_line
+        on_done = self.on_done
+        metrics = self.metrics
+        record = metrics.record if metrics else None
+        now = time.perf_counter
+        rate = self.rate or LiveRate(plan.delay)
+        max_lines = plan.total
+        end = plan.end
+        type_max_len = plan.type_max_len
+        steps = plan.steps
+        program = plan.program
+        i = plan.start
+        skip = rows.skip if rows is not None else None
+        skip_base = rows.start if rows is not None else 0
+
+        probe = self.probe
+        own_probe = probe is None and any(a.op == OP_COND for a in program)
+        if own_probe:
+            probe = make_probe(controller)
+        baselines = {}
+
+        timing = plan.timing
+        scheduler = Scheduler()
+        wait = scheduler.wait
+
+        clipboard.begin()
+        scheduler.reset()
+        try:
+            while i < end:
+                if stop_event.is_set():
+                    break
+
+                if skip is not None and skip[i - skip_base]:
+                    if on_done:
+                        on_done(i)
+                    i += 1
+                    continue
+
+                if on_line:
+                    on_line(i, max_lines)
+
+                line_t0 = now()
+                delay = rate.delay
+                verified = None
+                cut = False
+                for n, (op, arg, guard) in enumerate(program):
+                    if guard >= 0 and i >= len(steps[guard].lines):
+                        continue
+
+                    if op == OP_KEY:
+                        t0 = now()
+                        combo, settle = arg
+                        press_combination(controller, combo, timing, wait)
+                        if settle:
+                            wait(delay * timing.after_key)
+                        if record:
+                            record("tecla_apos", now() - t0)
+                        continue
+                    if op == OP_WAIT:
+                        # Pausas do modelo chegam a 60 s: a parada interrompe na hora
+                        if stop_event.wait(arg):
+                            cut = True
+                            break
+                        scheduler.reset()
+                        continue
+                    if op == OP_REPLAY:
+                        t0 = now()
+                        replay_keys(controller, arg, timing, wait, stop_event)
+                        if record:
+                            record("macro", now() - t0)
+                        if stop_event.is_set():
+                            cut = True
+                            break
+                        continue
+                    if op == OP_ARM:
+                        cond, slot = arg
+                        baselines[slot] = read_condition(cond, probe)
+                        continue
+                    if op == OP_COND:
+                        # A pausa fixa só entra quando a condição não pode ser lida
+                        t0 = now()
+                        met = wait_condition(arg, probe, baselines.pop(n, None), stop_event)
+                        if stop_event.is_set():
+                            cut = True
+                            break
+                        if met is None:
+                            wait(delay * timing.after_key)
+                        else:
+                            scheduler.reset()
+                            verified = merge_check(verified, met)
+                        if record:
+                            record("espera", now() - t0)
+                        continue
+
+                    if op == OP_FIELD:
+                        step = steps[arg]
+                        lines = step.lines
+                        text = lines[i] if i < len(lines) else ""
+                        mode = step.mode
+                    else:
+                        text = arg
+                        mode = "auto"
+                    if not text:
+                        continue
+
+                    t0 = now()
+                    if should_type(text, mode, type_max_len):
+                        controller.type(text)
+                        wait(delay * timing.type_settle)
+                        if record:
+                            record("digita", now() - t0)
+                    else:
+                        # Pausas fixas apenas quando o backend não confirma;
+                        # depois de uma espera verificada o prazo recomeça.
+                        # A cópia só relê a nossa área de transferência e não
+                        # diz nada sobre o alvo: não entra em verified
+                        clipboard.copy(text)
+                        copied = clipboard.wait_copied(text, SETTLE_TIMEOUT)
+                        if copied is None:
+                            wait(delay * timing.copy_settle)
+                        else:
+                            scheduler.reset()
+                        t1 = now()
+                        clipboard.before_paste()
+                        paste_clipboard(controller, plan.paste, timing, wait)
+                        pasted = clipboard.wait_pasted(delay * timing.paste_settle)
+                        if pasted is None:
+                            wait(delay * timing.paste_settle)
+                        else:
+                            scheduler.reset()
+                            verified = merge_check(verified, pasted)
+                        if record:
+                            record("copia", t1 - t0)
+                            record("cola", now() - t1)
+
+                # Parada no meio de um macro, pausa ou espera: a linha ficou
+                # pela metade e não conta como concluída
+                if cut:
+                    break
+                rate.line_done(verified)
+                if on_done:
+                    on_done(i)
+                i += 1
+                t0 = now()
+                wait(delay * timing.line_gap)
+                if metrics:
+                    t1 = now()
+                    record("pausa_linha", t1 - t0)
+                    record("linha", t1 - line_t0)
+                    metrics.line_done()
+        finally:
+            clipboard.end()
+            if own_probe:
+                probe.close()
+            if metrics:
+                metrics.finish()
+
+        return i
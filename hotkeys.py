@@ -0,0 +1,92 @@
+"""
+Auto Ester - Teclas globais
+Normaliza as teclas do pynput em nomes ("ctrl", "f11", "a") e compara
+combinações como "ctrl+f11" com o conjunto de teclas pressionadas.
+As combinações são preparadas uma vez, quando mudam; o callback chamado
+a cada tecla do sistema não toca no Tk nem monta strings de configuração.
+"""
+
+# Variantes esquerda/direita e apelidos -> nome único
+KEY_ALIASES = {
+    "ctrl_l": "ctrl", "ctrl_r": "ctrl", "control": "ctrl",
+    "shift_l": "shift", "shift_r": "shift",
+    "alt_l": "alt", "alt_r": "alt", "alt_gr": "alt",
+    "cmd_l": "cmd", "cmd_r": "cmd", "command": "cmd", "win": "cmd",
+    "return": "enter", "escape": "esc", "del": "delete",
+    "page_up": "pageup", "page_down": "pagedown",
+}
+
+MODIFIERS = frozenset(("ctrl", "shift", "alt", "cmd"))
+
+
+def normalize_name(name):
+    name = name.strip().lower()
+    return KEY_ALIASES.get(name, name)
+
+
+def key_name(key):
+    """Nome normalizado de uma tecla do pynput (Key.ctrl_l -> 'ctrl')."""
+    char = getattr(key, "char", None)
+    if char:
+        # Com Ctrl pressionado algumas plataformas entregam caracteres de controle
+        if len(char) == 1 and ord(char) < 32:
+            char = chr(ord(char) + 96)
+        return char.lower()
+    name = getattr(key, "name", None)
+    if name is None:
+        name = str(key).split(".")[-1]
+    return normalize_name(name)
+
+
+def parse_hotkey(combo_str):
+    """'Ctrl + F11' -> frozenset({'ctrl', 'f11'}); vazio -> None."""
+    if not combo_str:
+        return None
+    names = frozenset(normalize_name(p) for p in combo_str.split("+") if p.strip())
+    return names or None
+
+
+class HotkeyMatcher:
+    """Casa combinações globais com o estado atual do teclado.
+
+    set_bindings() recebe {combinação: callback} e troca a tabela inteira
+    de uma vez, então pode ser chamado da thread do Tk enquanto o listener
+    do pynput usa on_press/on_release na thread dele. Se recorder
+    (recorder.MacroRecorder) for definido, recebe também cada tecla.
+    """
+
+    def __init__(self):
+        self.pressed = set()
+        self.bindings = ()
+        self.enabled = True
+        self.recorder = None
+
+    def set_bindings(self, mapping):
+        bindings = []
+        for combo_str, callback in mapping.items():
+            combo = parse_hotkey(combo_str)
+            if combo:
+                bindings.append((combo, combo & MODIFIERS, callback))
+        self.bindings = tuple(bindings)
+
+    def on_press(self, key):
+        name = key_name(key)
+        pressed = self.pressed
+        pressed.add(name)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.on_press(key)
+        if not self.enabled:
+            return
+
+        for combo, modifiers, callback in self.bindings:
+            # A tecla que acabou de descer precisa fazer parte da combinação
+            # e os modificadores pressionados precisam ser exatamente os dela
+            if name in combo and combo <= pressed and (pressed & MODIFIERS) == modifiers:
+                callback()
+
+    def on_release(self, key):
+        self.pressed.discard(key_name(key))
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.on_release(key)
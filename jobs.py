@@ -0,0 +1,181 @@
+"""
+Auto Ester - Fila de trabalhos
+Lista de execuções feitas uma após a outra, sem operador: cada trabalho
+usa um perfil salvo e, opcionalmente, arquivos ou uma planilha no lugar
+das boxes do perfil e uma combinação de preparação (ex.: ctrl+n para
+abrir um registro novo) enviada antes da primeira linha.
+
+    auto_ester_fila.json:
+        {"jobs": [{"profile": "clientes", "files": ["", "codigos.txt"],
+                   "csv": "", "setup": "ctrl+n", "state": "pendente",
+                   "result": "", "report": ""}, ...]}
+
+files tem uma entrada por box ("" mantém a box do perfil). state é um
+de JOB_STATES; a fila continua do primeiro trabalho pendente.
+"""
+
+import os
+
+from checkpoint import write_json_atomic
+from columns import (columns_from_config, default_column, csv_import_from_config,
+                     default_csv_import, open_csv_import, map_csv_columns)
+from engine import compile_plan, plan_boxes, DEFAULT_TYPE_MAX_LEN
+from profiles import read_json
+from recorder import normalize_macros
+from sources import FileLines, LineStore, close_sources
+from template import parse_template
+from timing import resolve_profile, DEFAULT_PROFILE
+
+QUEUE_FILE = "auto_ester_fila.json"
+
+PENDING = "pendente"
+DONE = "concluído"
+STOPPED = "parado"
+FAILED = "erro"
+JOB_STATES = (PENDING, DONE, STOPPED, FAILED)
+
+
+def default_job(profile):
+    return {"profile": profile, "files": [], "csv": "", "setup": "", "state": PENDING,
+            "result": "", "report": ""}
+
+
+def normalize_job(data):
+    """Completa e valida um trabalho lido do arquivo da fila; None se inválido."""
+    if not isinstance(data, dict) or not data.get("profile"):
+        return None
+    job = default_job(str(data["profile"]))
+    files = data.get("files") or []
+    job["files"] = [str(path or "") for path in files] if isinstance(files, list) else []
+    for key in ("csv", "setup", "result", "report"):
+        job[key] = str(data.get(key, "") or "")
+    state = data.get("state", PENDING)
+    job["state"] = state if state in JOB_STATES else PENDING
+    return job
+
+
+def describe_job(job):
+    """Resumo das fontes do trabalho para a lista da interface."""
+    parts = [os.path.basename(path) for path in job["files"] if path]
+    if job["csv"]:
+        parts.append(f"📊 {os.path.basename(job['csv'])}")
+    return ", ".join(parts) or "boxes do perfil"
+
+
+class JobQueue:
+    """Trabalhos em ordem, gravados a cada alteração (de forma atômica)."""
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        data = read_json(path)
+        jobs = data.get("jobs") if isinstance(data, dict) else None
+        self.jobs = [job for job in map(normalize_job, jobs or []) if job is not None]
+
+    def save(self):
+        write_json_atomic(self.path, {"jobs": self.jobs}, indent=2)
+
+    def add(self, job):
+        self.jobs.append(job)
+        self.save()
+
+    def remove(self, index):
+        del self.jobs[index]
+        self.save()
+
+    def move(self, index, delta):
+        """Troca o trabalho de posição; retorna a posição nova."""
+        target = index + delta
+        if not 0 <= target < len(self.jobs):
+            return index
+        self.jobs[index], self.jobs[target] = self.jobs[target], self.jobs[index]
+        self.save()
+        return target
+
+    def reset(self):
+        """Marca todos como pendentes para rodar a fila de novo."""
+        for job in self.jobs:
+            job.update(state=PENDING, result="", report="")
+        self.save()
+
+    def next_pending(self):
+        return next((n for n, job in enumerate(self.jobs) if job["state"] == PENDING), None)
+
+    def finish(self, index, state, result="", report=""):
+        self.jobs[index].update(state=state, result=result, report=report)
+        self.save()
+
+
+def job_sources(job, settings, contents):
+    """(colunas, fontes) do trabalho: arquivos e planilha substituem as boxes do perfil.
+
+    contents é o texto das boxes do perfil (profiles.load_box_data).
+    """
+    columns = columns_from_config(settings)
+    files = job["files"]
+    while len(columns) < len(files):
+        columns.append(default_column())
+
+    sources = []
+    table = None
+    try:
+        for n, column in enumerate(columns):
+            path = files[n] if n < len(files) else ""
+            if not path and column["file"] and os.path.exists(column["file"]):
+                path = column["file"]
+            if path:
+                sources.append(FileLines(path))
+            else:
+                sources.append(LineStore(contents[n] if n < len(contents) else "").snapshot())
+
+        spec = csv_import_from_config(settings)
+        if job["csv"] or spec is not None:
+            spec = spec or default_csv_import(job["csv"])
+            table = open_csv_import(spec, job["csv"] or None)
+            mapping = spec["mapping"] or list(table.names)
+            while len(columns) < len(mapping):
+                columns.append(default_column())
+                sources.append(())
+            replaced = []
+            for n, lines in enumerate(map_csv_columns(table, mapping)):
+                if lines is not None:
+                    replaced.append(sources[n])
+                    sources[n] = lines
+            # Arquivos das boxes trocados por colunas da planilha
+            close_sources(replaced + [table], keep=sources)
+    except Exception:
+        close_sources(sources + ([table] if table is not None else []))
+        raise
+    return columns, sources
+
+
+def job_plan(job, settings, contents, key_space=None):
+    """Monta o RunPlan do trabalho como build_plan faz com a interface.
+
+    Levanta OSError ou ValueError (arquivo ausente, modelo ou espera
+    inválidos).
+    """
+    columns, sources = job_sources(job, settings, contents)
+    try:
+        text = str(settings.get("template", "") or "").strip()
+        macros = normalize_macros(settings.get("macros"))
+        template = parse_template(text, len(columns), macros) if text else None
+        boxes = plan_boxes(((column["enabled"], lines, column["key_after"], column["mode"],
+                             column["wait"]) for column, lines in zip(columns, sources)),
+                           template)
+
+        timing = resolve_profile(settings.get("timing_profile", DEFAULT_PROFILE),
+                                 settings.get("timing_profiles"))
+        plan = compile_plan(boxes, settings.get("speed", 0.1),
+                            settings.get("type_max_len", DEFAULT_TYPE_MAX_LEN), key_space,
+                            timing=timing, template=template)
+    except Exception:
+        close_sources(sources)
+        raise
+    # Arquivos de boxes desativadas não entram no plano
+    close_sources(sources, keep=plan_sources(plan))
+    return plan
+
+
+def plan_sources(plan):
+    """Linhas de cada box do plano (arquivos e planilhas a fechar no fim)."""
+    return [step.lines for step in plan.steps]
@@ -1,104 +1,122 @@
 """
-Auto Ester - Macro Triple Box v3.0
+Auto Ester - Macro Multi Box v3.0
 Funcionalidades completas:
-- Três caixas de texto independentes
+- Quantas caixas (colunas) forem necessárias, cada uma com sua tecla após
 - Captura de teclas sem travamento
-- Salvar/Carregar configurações
+- Perfis nomeados com salvamento automático
 - Tema Dark/Light
 - Controle de velocidade
 - Loop multi-etapas
+- Macros de teclas gravados, reproduzidos com pausas comprimidas
 
 Dependências: 
 pip install pynput pyperclip
 """
 
+from startup import StartupTimer
+
+# Antes dos outros imports, para que eles entrem na medição
+STARTUP = StartupTimer()
+
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
+from tkinter import ttk, messagebox
 import threading
-import time
-import pyperclip
-import platform
-import json
+import queue
 import os
-from pynput import keyboard as pynput_kb
-from pynput.keyboard import Key, Controller
+import time
+
+from engine import (MacroEngine, Progress, compile_plan, compile_combination, format_eta,
+                    key_space_for, press_combination, INJECTION_MODES, DEFAULT_TYPE_MAX_LEN)
+from backends import TkClipboard, PyperclipClipboard, make_controller
+from hotkeys import HotkeyMatcher, key_name, parse_hotkey
+from timing import (BUILTIN_PROFILES, DEFAULT_PROFILE, TIMING_FIELDS, TIMING_LABELS,
+                    LiveRate, profile_from_dict, profile_to_dict, resolve_profile)
+from metrics import RunMetrics
+from checkpoint import Checkpoint, load_checkpoint, plan_fingerprint
+from columns import (columns_from_config, default_column, csv_import_from_config,
+                     default_csv_import, open_csv_import, map_csv_columns)
+from profiles import ProfileStore, AUTOSAVE_DELAY_MS
+from sources import FileLines, LineStore, CsvColumn, close_sources
+from template import parse_template, TemplateError
+from waits import parse_condition
+from processed import ProcessedIndex, clear_index, filter_rows, index_path
+from jobs import (JobQueue, default_job, describe_job, job_plan, plan_sources,
+                  DONE, STOPPED, FAILED)
+from recorder import (MacroRecorder, describe_macro, normalize_macro, normalize_macros,
+                      valid_macro_name, DEFAULT_FACTOR, DEFAULT_MAX_GAP, MAX_FACTOR,
+                      MAX_GAP_LIMIT)
+from widgets import VirtualList
+
+# pynput, filedialog e simpledialog são importados só quando usados:
+# a janela aparece antes de carregar o backend de teclado do sistema.
+
+APP_VERSION = "3.0"
+
+# Amostragem do progresso do worker pela interface (ms)
+PROGRESS_INTERVAL_MS = 100
+METRICS_INTERVAL_MS = 500
+
+# Intervalo em que a interface atende às teclas globais (ms)
+HOTKEY_POLL_MS = 50
+
+# Separadores oferecidos na importação de planilha
+DELIMITERS = {"vírgula": ",", "ponto e vírgula": ";", "TAB": "\t", "barra |": "|"}
+DELIMITER_LABELS = {v: k for k, v in DELIMITERS.items()}
+SKIP_COLUMN = "— (manter)"
+
+# Alvo padrão: as teclas vão para a janela em foco (pynput)
+FOCUSED_TARGET = "(janela em foco)"
+FOCUS_DELAY_MS = 2000
+
+# Pausa entre o fim de um trabalho da fila e a preparação do próximo
+QUEUE_GAP_MS = 1000
+
+# Atualização da contagem de teclas durante a gravação de um macro (ms)
+RECORD_POLL_MS = 200
 
 # ======================================================================
-# Funções utilitárias
+# Coluna (box) da interface
 # ======================================================================
 
-def press_combination(controller, combo_str):
-    """Envia a combinação de teclas ao SO usando pynput."""
-    if not combo_str:
-        return
-
-    parts = combo_str.split("+")
-    modifiers = []
-    keys = []
-
-    modifier_map = {
-        "ctrl": Key.ctrl, "control": Key.ctrl,
-        "shift": Key.shift, "alt": Key.alt,
-        "cmd": Key.cmd, "command": Key.cmd, "win": Key.cmd
-    }
-
-    special_map = {
-        "enter": Key.enter, "return": Key.enter, "space": Key.space,
-        "tab": Key.tab, "esc": Key.esc, "escape": Key.esc,
-        "delete": Key.delete, "del": Key.delete,
-        "backspace": Key.backspace, "up": Key.up,
-        "down": Key.down, "left": Key.left, "right": Key.right,
-        "home": Key.home, "end": Key.end,
-        "pageup": Key.page_up, "pagedown": Key.page_down,
-        "insert": Key.insert
-    }
-
-    for p in parts:
-        p = p.strip().lower()
-        
-        if p in modifier_map:
-            modifiers.append(modifier_map[p])
-        elif p in special_map:
-            keys.append(special_map[p])
-        elif p.startswith("f") and len(p) <= 3 and p[1:].isdigit():
-            try:
-                keys.append(getattr(Key, p))
-            except AttributeError:
-                pass
-        elif len(p) == 1:
-            keys.append(p)
-
-    for m in modifiers:
-        controller.press(m)
-    time.sleep(0.02)
-
-    for k in keys:
-        try:
-            controller.press(k)
-            time.sleep(0.02)
-            controller.release(k)
-        except Exception as e:
-            print(f"Erro ao pressionar tecla {k}: {e}")
-
-    time.sleep(0.02)
-    for m in reversed(modifiers):
-        controller.release(m)
-    time.sleep(0.05)
-
-
-def paste_clipboard(controller):
-    """Simula Ctrl+V ou Cmd+V conforme o sistema."""
-    if platform.system() == "Darwin":
-        controller.press(Key.cmd)
-        controller.press('v')
-        controller.release('v')
-        controller.release(Key.cmd)
-    else:
-        controller.press(Key.ctrl)
-        controller.press('v')
-        controller.release('v')
-        controller.release(Key.ctrl)
-    time.sleep(0.05)
+class BoxColumn:
+    """Estado de uma box na interface: conteúdo fora do Tk e variáveis."""
+
+    def __init__(self, spec):
+        self.enabled = tk.BooleanVar(value=spec["enabled"])
+        self.mode = tk.StringVar(value=spec["mode"])
+        self.key_after = tk.StringVar(value=spec["key_after"])
+        # Condição de waits.py esperada depois da tecla após (vazio = pausa fixa)
+        self.wait = tk.StringVar(value=spec["wait"])
+        self.store = LineStore(spec["content"])
+        self.file = None
+        # Arquivo salvo no perfil que não abriu: continua no perfil até a box mudar
+        self.missing_file = ""
+        self.frame = None
+        self.view = None
+        self.label = None
+
+    def lines(self):
+        """O arquivo indexado ou uma cópia das linhas digitadas"""
+        if self.file is not None:
+            return self.file
+        return self.store.snapshot()
+
+    def to_config(self):
+        """Ajustes da coluna; o texto vai para o arquivo de dados do perfil"""
+        return {
+            "enabled": self.enabled.get(),
+            "key_after": self.key_after.get(),
+            "mode": self.mode.get(),
+            "wait": self.wait.get(),
+            # Colunas de planilha voltam pela importação salva (csv_import)
+            "file": (self.file.path if isinstance(self.file, FileLines)
+                     else self.missing_file if self.file is None else ""),
+        }
+
+    def data_snapshot(self):
+        """Linhas digitadas (vazio quando a box aponta para arquivo)"""
+        return () if self.file is not None else self.store.snapshot()
 
 
 # ======================================================================
@@ -108,19 +126,61 @@ def paste_clipboard(controller):
 class AutoEsterApp:
     def __init__(self, root):
         self.root = root
-        self.root.title("Auto Ester v3.0 - Macro Automatizada")
+        self.root.title(f"Auto Ester v{APP_VERSION} - Macro Automatizada")
         self.root.geometry("1050x750")
-        self.controller = Controller()
+        # Teclado do pynput criado depois que a janela aparece (start_services)
+        self.controller = None
+        self.global_listener = None
+        # No X11 a seleção é servida pelo Tk; nos outros sistemas o pyperclip
+        # (criado em start_services) fala direto com a área de transferência
+        self.x11 = self.root.tk.call("tk", "windowingsystem") == "x11"
+        self.clipboard = TkClipboard(self.root) if self.x11 else None
 
         # Estados
         self.stop_event = threading.Event()
         self.worker_thread = None
+        # Início agendado por launch (after do Tk); um novo launch o substitui
+        self.start_job = None
+        # Arquivos/planilhas tirados das boxes, fechados quando o worker terminar
+        self.retired_sources = []
         self.running = False
         self.dark_mode = False
 
         # Velocidade (delay em segundos)
         self.speed = tk.DoubleVar(value=0.1)
 
+        # Ajuste automático do delay e o valor em que ele parou no perfil
+        self.auto_tune = tk.BooleanVar(value=False)
+        self.tuned_speed = None
+        self.live_rate = None
+
+        # Pular linhas repetidas na lista e as que o perfil já enviou
+        self.dedupe_rows = tk.BooleanVar(value=False)
+        self.skip_processed = tk.BooleanVar(value=False)
+        self.skip_note = ""
+
+        # Fila de trabalhos: índice do trabalho em execução e a janela da fila
+        self.queue = JobQueue()
+        self.queue_active = False
+        self.queue_job = None
+        self.queue_view = None
+        self.plan_setup = None
+
+        # Células até este tamanho (ASCII) são digitadas em vez de coladas
+        self.type_max_len = tk.IntVar(value=DEFAULT_TYPE_MAX_LEN)
+
+        # Perfil de ritmo (pausa de cada etapa) e perfis salvos na configuração
+        self.timing_profile = tk.StringVar(value=DEFAULT_PROFILE)
+        self.custom_profiles = {}
+
+        # Macros gravados do perfil e a gravação em andamento (nome, fator, pausa máx.)
+        self.macros = {}
+        self.recorder = None
+        self.recording_macro = None
+        self.macro_view = None
+        self.record_button = None
+        self.record_status = tk.StringVar(value="")
+
         # Captura de teclas
         self.capturing = False
         self.captured_keys = set()
@@ -128,19 +188,45 @@ class AutoEsterApp:
         self.capture_listener = None
 
         # Teclas
-        self.key_after_b1 = ""
-        self.key_after_b2 = ""
-        self.key_after_b3 = ""
         self.global_start_key = ""
         self.global_stop_key = ""
+        self.key_vars = []
+
+        # Teclas globais: o listener só enfileira; a interface consome
+        self.hotkeys = HotkeyMatcher()
+        self.hotkey_queue = queue.SimpleQueue()
+
+        # Plano da execução atual
+        self.plan = None
+        # Hash salvo da execução retomada (conferido pelo worker, fora do Tk)
+        self.plan_expected = None
+        self.metrics = None
+        self.progress = None
+
+        # Modelo da linha ({1}{TAB}{2}...); vazio = box seguida da tecla após
+        self.template_text = tk.StringVar(value="")
+
+        # Janela alvo (X11): envio direto, sem depender do foco
+        self.target_window = tk.StringVar(value=FOCUSED_TARGET)
+        self.run_controller = None
+
+        # Intervalo de linhas (1 = primeira; final vazio = até o fim)
+        self.range_from = tk.StringVar(value="1")
+        self.range_to = tk.StringVar(value="")
+
+        # Colunas (boxes); o conteúdo de cada uma fica fora do Tk
+        self.columns = []
 
-        # Linhas
-        self.lines_b1 = []
-        self.lines_b2 = []
-        self.lines_b3 = []
+        # Importação de planilha salva (repetida com um clique)
+        self.csv_import = None
 
-        # Arquivo de configuração
-        self.config_file = "auto_ester_config.json"
+        # Perfis salvos: ajustes lidos agora, texto das boxes em segundo plano
+        self.profiles = ProfileStore()
+        self.profile_name = tk.StringVar(value=self.profiles.active)
+        self.autosave_job = None
+        self.autosave_enabled = False
+        self.data_dirty = False
+        self.data_loading = False
 
         # Construir interface
         self.build_ui()
@@ -148,20 +234,54 @@ class AutoEsterApp:
         # Valores padrão
         self.entry_start.insert(0, "f11")
         self.entry_stop.insert(0, "f12")
-        self.entry_after1.insert(0, "enter")
-        self.entry_after2.insert(0, "enter")
-        self.entry_after3.insert(0, "enter")
+        self.set_columns(columns_from_config({}))
 
-        # Carregar configuração salva (se existir)
+        # Carregar perfil salvo (o texto das boxes chega depois)
         self.load_config()
-
-        # Listener global
-        self.global_listener = pynput_kb.Listener(on_press=self.on_global_press)
-        self.global_listener.start()
+        self.autosave_enabled = True
+        for var in (self.speed, self.type_max_len, self.timing_profile, self.template_text,
+                    self.target_window, self.auto_tune, self.dedupe_rows,
+                    self.skip_processed):
+            var.trace_add("write", lambda *args: self.schedule_autosave())
+
+        # Listener global (iniciado quando a janela aparecer)
+        self.refresh_hotkeys()
+        self.poll_hotkeys()
+        STARTUP.mark("interface")
+        self.exit_after_startup = False
+        self.window_shown = False
+        self.root.bind("<Map>", self.on_first_map, add="+")
 
         # Protocolo de fechamento
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    def on_first_map(self, event):
+        """Janela visível: registra o tempo e liga teclado e teclas globais"""
+        if event.widget is not self.root or self.window_shown:
+            return
+        self.window_shown = True
+        STARTUP.mark("janela")
+        self.root.after_idle(self.start_services)
+
+    def start_services(self):
+        from pynput import keyboard as pynput_kb
+
+        self.controller = self.controller or make_controller()
+        self.clipboard = self.clipboard or PyperclipClipboard()
+        self.global_listener = pynput_kb.Listener(on_press=self.hotkeys.on_press,
+                                                  on_release=self.hotkeys.on_release)
+        self.global_listener.start()
+        STARTUP.mark("teclado")
+
+        self.metrics_text.set(STARTUP.text())
+        try:
+            STARTUP.append_report(APP_VERSION)
+        except OSError as e:
+            print(f"Erro ao gravar tempo de inicialização: {e}")
+        if self.exit_after_startup:
+            print(STARTUP.text())
+            self.on_closing()
+
     # ==================================================================
     # Interface
     # ==================================================================
@@ -177,17 +297,34 @@ class AutoEsterApp:
         header_frame = ttk.Frame(main)
         header_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
         
-        ttk.Label(header_frame, text="🚀 Auto Ester v3.0", 
+        ttk.Label(header_frame, text=f"🚀 Auto Ester v{APP_VERSION}", 
                  font=("Arial", 12, "bold")).pack(side=tk.LEFT)
 
         # Botões à direita
         btn_frame = ttk.Frame(header_frame)
         btn_frame.pack(side=tk.RIGHT)
 
+        ttk.Label(btn_frame, text="Perfil:").pack(side=tk.LEFT, padx=(0, 2))
+        self.profile_select = ttk.Combobox(btn_frame, textvariable=self.profile_name,
+                                           values=self.profiles.names(), state="readonly",
+                                           width=12)
+        self.profile_select.pack(side=tk.LEFT, padx=2)
+        self.profile_select.bind("<<ComboboxSelected>>",
+                                 lambda e: self.switch_profile(self.profile_name.get()))
+        ttk.Button(btn_frame, text="➕", width=3,
+                   command=self.new_profile).pack(side=tk.LEFT)
+        ttk.Button(btn_frame, text="🗑", width=3,
+                   command=self.delete_profile).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(btn_frame, text="➕ Box", 
+                  command=self.add_column, width=8).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="📊 Importar CSV", 
+                  command=self.import_csv, width=14).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="🔁", 
+                  command=self.repeat_csv_import, width=3).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="💾 Salvar Config", 
                   command=self.save_config, width=14).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="📂 Carregar Config", 
-                  command=self.load_config, width=15).pack(side=tk.LEFT, padx=2)
+                  command=lambda: self.load_config(reload=True), width=15).pack(side=tk.LEFT, padx=2)
 
         # Controle de velocidade
         speed_frame = ttk.LabelFrame(main, text="⚡ Velocidade de Execução", padding=8)
@@ -203,35 +340,62 @@ class AutoEsterApp:
         
         self.speed_label = ttk.Label(speed_frame, text="Delay: 0.10s")
         self.speed_label.pack(side=tk.LEFT, padx=10)
-        
-        self.speed.trace('w', self.update_speed_label)
 
-        # Boxes
-        frame_boxes = ttk.Frame(main)
-        frame_boxes.grid(row=2, column=0, pady=4)
+        ttk.Checkbutton(speed_frame, text="🤖 Auto", variable=self.auto_tune,
+                        command=self.update_speed_label).pack(side=tk.LEFT)
 
-        self.use_b1 = tk.BooleanVar(value=True)
-        self.use_b2 = tk.BooleanVar(value=True)
-        self.use_b3 = tk.BooleanVar(value=True)
+        ttk.Label(speed_frame, text="Digitar até (caracteres):").pack(side=tk.LEFT, padx=(20, 5))
+        ttk.Spinbox(speed_frame, from_=0, to=200, width=5,
+                    textvariable=self.type_max_len).pack(side=tk.LEFT)
 
-        self.box1 = self.make_box(frame_boxes, 0, "📦 Box 1", self.use_b1)
-        self.box2 = self.make_box(frame_boxes, 1, "📦 Box 2", self.use_b2)
-        self.box3 = self.make_box(frame_boxes, 2, "📦 Box 3", self.use_b3)
-
-        # Teclas após cada Box
-        config = ttk.LabelFrame(main, text="⌨️ Teclas após cada Box", padding=10)
-        config.grid(row=3, column=0, sticky="ew", pady=8, padx=4)
-
-        self.entry_after1 = self.make_key_capture(config, 0, "Após Box 1:")
-        self.entry_after2 = self.make_key_capture(config, 1, "Após Box 2:")
-        self.entry_after3 = self.make_key_capture(config, 2, "Após Box 3:")
+        ttk.Label(speed_frame, text="Ritmo:").pack(side=tk.LEFT, padx=(20, 5))
+        self.profile_combo = ttk.Combobox(speed_frame, textvariable=self.timing_profile,
+                                          values=self.profile_names(), state="readonly", width=10)
+        self.profile_combo.pack(side=tk.LEFT)
+        ttk.Button(speed_frame, text="✏️", width=3,
+                   command=self.edit_timing_profile).pack(side=tk.LEFT, padx=2)
+        
+        self.speed.trace('w', self.update_speed_label)
+        self.speed.trace_add("write", self.on_speed_change)
+
+        # Boxes (rolagem horizontal quando há muitas colunas)
+        boxes_outer = ttk.Frame(main)
+        boxes_outer.grid(row=2, column=0, sticky="ew", pady=4)
+        boxes_outer.columnconfigure(0, weight=1)
+
+        self.boxes_canvas = tk.Canvas(boxes_outer, highlightthickness=0)
+        self.boxes_canvas.grid(row=0, column=0, sticky="ew")
+        boxes_scroll = ttk.Scrollbar(boxes_outer, orient=tk.HORIZONTAL,
+                                     command=self.boxes_canvas.xview)
+        boxes_scroll.grid(row=1, column=0, sticky="ew")
+        self.boxes_canvas.configure(xscrollcommand=boxes_scroll.set)
+
+        self.frame_boxes = ttk.Frame(self.boxes_canvas)
+        self.boxes_canvas.create_window((0, 0), window=self.frame_boxes, anchor="nw")
+        self.frame_boxes.bind("<Configure>", lambda e: self.boxes_canvas.configure(
+            scrollregion=self.boxes_canvas.bbox("all"),
+            height=self.frame_boxes.winfo_reqheight()))
+
+        # Modelo da linha
+        template_frame = ttk.LabelFrame(main, text="🧩 Modelo da linha (opcional)", padding=8)
+        template_frame.grid(row=3, column=0, sticky="ew", pady=4, padx=4)
+        tk.Entry(template_frame, textvariable=self.template_text, width=70,
+                 font=("Courier", 10)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(template_frame, text="⏺ Macros",
+                   command=self.open_macros).pack(side=tk.LEFT, padx=5)
+        self.template_status = ttk.Label(template_frame, text="")
+        self.template_status.pack(side=tk.LEFT, padx=5)
+        self.template_text.trace_add("write", lambda *args: self.check_template())
+        self.check_template()
 
         # Teclas globais
         global_frame = ttk.LabelFrame(main, text="🎮 Teclas globais (Start/Stop)", padding=10)
         global_frame.grid(row=4, column=0, sticky="ew", pady=8, padx=4)
 
-        self.entry_start = self.make_key_capture(global_frame, 0, "🟢 Iniciar global:")
-        self.entry_stop = self.make_key_capture(global_frame, 1, "🔴 Parar global:")
+        self.entry_start = self.make_key_capture(global_frame, 0, "🟢 Iniciar global:",
+                                                 on_change=self.on_global_keys_change)
+        self.entry_stop = self.make_key_capture(global_frame, 1, "🔴 Parar global:",
+                                                on_change=self.on_global_keys_change)
 
         # Controles
         ctrl = ttk.Frame(main)
@@ -241,6 +405,38 @@ class AutoEsterApp:
                   command=self.start_macro, width=18).grid(row=0, column=0, padx=6)
         ttk.Button(ctrl, text="⏹️ Parar", 
                   command=self.stop_macro, width=18).grid(row=0, column=1, padx=6)
+        ttk.Button(ctrl, text="⏯️ Retomar", 
+                  command=self.resume_macro, width=18).grid(row=0, column=2, padx=6)
+        ttk.Button(ctrl, text="📋 Fila",
+                   command=self.open_queue, width=10).grid(row=0, column=4, padx=6)
+
+        range_frame = ttk.Frame(ctrl)
+        range_frame.grid(row=0, column=3, padx=(16, 6))
+        ttk.Label(range_frame, text="Linhas de").pack(side=tk.LEFT)
+        ttk.Entry(range_frame, textvariable=self.range_from, width=7).pack(side=tk.LEFT, padx=3)
+        ttk.Label(range_frame, text="até").pack(side=tk.LEFT)
+        ttk.Entry(range_frame, textvariable=self.range_to, width=7).pack(side=tk.LEFT, padx=3)
+        ttk.Label(range_frame, text="(vazio = fim)").pack(side=tk.LEFT)
+
+        # Só no X11: escolher a janela que recebe as teclas
+        if self.x11:
+            target_frame = ttk.Frame(ctrl)
+            target_frame.grid(row=1, column=0, columnspan=4, pady=(8, 0))
+            ttk.Label(target_frame, text="🎯 Enviar para:").pack(side=tk.LEFT)
+            self.target_combo = ttk.Combobox(target_frame, textvariable=self.target_window,
+                                             values=(FOCUSED_TARGET,), width=50,
+                                             postcommand=self.refresh_target_windows)
+            self.target_combo.pack(side=tk.LEFT, padx=5)
+            ttk.Label(target_frame, text="(título ou id; sem espera de 2s)").pack(side=tk.LEFT)
+
+        filter_frame = ttk.Frame(ctrl)
+        filter_frame.grid(row=2, column=0, columnspan=4, pady=(8, 0))
+        ttk.Checkbutton(filter_frame, text="🧮 Pular linhas repetidas",
+                        variable=self.dedupe_rows).pack(side=tk.LEFT, padx=6)
+        ttk.Checkbutton(filter_frame, text="📒 Pular linhas já enviadas neste perfil",
+                        variable=self.skip_processed).pack(side=tk.LEFT, padx=6)
+        ttk.Button(filter_frame, text="🗑 Esquecer enviadas",
+                   command=self.forget_processed).pack(side=tk.LEFT, padx=6)
 
         # Status
         status_frame = ttk.Frame(main)
@@ -251,30 +447,374 @@ class AutoEsterApp:
                                       font=("Arial", 10, "bold"))
         self.status_label.pack()
 
+        self.metrics_text = tk.StringVar(value="")
+        ttk.Label(status_frame, textvariable=self.metrics_text,
+                  font=("Courier", 9)).pack()
+
         # Instruções
         info = ttk.LabelFrame(main, text="ℹ️ Instruções", padding=8)
         info.grid(row=7, column=0, sticky="ew", pady=8, padx=4)
         
-        instructions = """1. Cole o conteúdo nas caixas (uma linha por entrada) | 2. Configure teclas após cada box
+        instructions = """1. Clique na caixa e cole (Ctrl+V) ou abra um arquivo (uma linha por entrada; duplo clique edita) | 2. Configure a tecla após cada box (➕ Box adiciona colunas) ou um modelo da linha
 3. Ajuste a velocidade | 4. Salve suas configurações | 5. Use F11/F12 ou botões manuais"""
         
         self.info_label = ttk.Label(info, text=instructions, justify=tk.LEFT)
         self.info_label.pack()
 
-    def make_box(self, master, col, label, var):
-        frame = ttk.LabelFrame(master, text=label, padding=5)
-        frame.grid(row=0, column=col, padx=4)
+    def set_columns(self, specs):
+        """Recria as boxes a partir da lista de colunas da configuração"""
+        old, self.columns = self.columns, []
+        for column in old:
+            column.frame.destroy()
+            self.release_source(column)
+        for spec in specs:
+            self.add_column(spec)
+
+    def add_column(self, spec=None):
+        """Acrescenta uma box ao fim (vazia se spec não for informado)"""
+        column = BoxColumn(spec or default_column())
+        self.columns.append(column)
+        self.make_box(column)
+        if spec and spec["file"]:
+            if os.path.exists(spec["file"]):
+                self.attach_box_file(column, spec["file"], saved=True)
+            else:
+                column.missing_file = spec["file"]
+                self.update_box_label(column)
+        for var in (column.enabled, column.mode, column.key_after, column.wait):
+            var.trace_add("write", lambda *args: self.schedule_autosave())
+        self.check_template()
+        self.schedule_autosave(data=True)
+        return column
+
+    def remove_column(self, column):
+        if self.running:
+            messagebox.showwarning("Aviso", "Pare o macro antes de remover uma box!")
+            return
+        column.frame.destroy()
+        self.columns.remove(column)
+        self.release_source(column)
+        self.renumber_columns()
+        self.check_template()
+        self.schedule_autosave(data=True)
+
+    def renumber_columns(self):
+        for n, column in enumerate(self.columns, start=1):
+            column.frame.config(text=f"📦 Box {n}")
+
+    def make_box(self, column):
+        n = len(self.columns)
+        frame = ttk.LabelFrame(self.frame_boxes, text=f"📦 Box {n}", padding=5)
+        frame.pack(side=tk.LEFT, padx=4, anchor="n")
+        column.frame = frame
+
+        view = VirtualList(frame, width=24, height=10,
+                           on_change=lambda: self.on_box_change(column))
+        view.pack(pady=3)
+        view.set_source(column.store, editable=True)
+        column.view = view
+
+        options = ttk.Frame(frame)
+        options.pack()
+        ttk.Checkbutton(options, text="✓ Usar", variable=column.enabled).pack(side=tk.LEFT, padx=4)
+        ttk.Label(options, text="Modo:").pack(side=tk.LEFT)
+        ttk.Combobox(options, textvariable=column.mode, values=INJECTION_MODES,
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=4)
+
+        after_row = ttk.Frame(frame)
+        after_row.pack(fill=tk.X)
+        self.make_key_capture(after_row, 0, "Após:", var=column.key_after, width=14)
+
+        wait_row = ttk.Frame(frame)
+        wait_row.pack(fill=tk.X, pady=2)
+        ttk.Label(wait_row, text="Esperar:").pack(side=tk.LEFT)
+        ttk.Entry(wait_row, textvariable=column.wait, width=18).pack(side=tk.LEFT, padx=4)
+
+        file_row = ttk.Frame(frame)
+        file_row.pack(fill=tk.X)
+        ttk.Button(file_row, text="📁 Arquivo", width=10,
+                   command=lambda: self.choose_box_file(column)).pack(side=tk.LEFT)
+        ttk.Button(file_row, text="🧹", width=3,
+                   command=lambda: self.clear_box(column)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(file_row, text="🗑", width=3,
+                   command=lambda: self.remove_column(column)).pack(side=tk.RIGHT)
+        column.label = ttk.Label(file_row, text="")
+        column.label.pack(side=tk.LEFT, padx=4)
+        self.update_box_label(column)
+
+    def on_box_change(self, column):
+        self.update_box_label(column)
+        self.schedule_autosave(data=True)
+
+    def update_box_label(self, column):
+        """Mostra a origem e a contagem de linhas da box"""
+        source = column.file
+        if isinstance(source, CsvColumn):
+            text = f"📊 {source.name} ({len(source)} linhas)"
+        elif source is not None:
+            text = f"📄 {os.path.basename(source.path)} ({len(source)} linhas)"
+        elif column.missing_file:
+            text = f"⚠️ {os.path.basename(column.missing_file)} não encontrado"
+        else:
+            text = f"{len(column.store)} linhas"
+        column.label.config(text=text)
+
+    def release_source(self, column):
+        """Desliga o arquivo/planilha da box e fecha o que nenhuma outra box usa"""
+        if column.file is not None:
+            self.retired_sources.append(column.file)
+            column.file = None
+        self.close_retired_sources()
+
+    def close_retired_sources(self, retry=False):
+        """Fecha as fontes retiradas; com o worker rodando, elas ficam para o fim
+
+        retry: chamado no fim da execução, tenta de novo até a thread sair.
+        """
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            if retry:
+                self.root.after(100, self.close_retired_sources, True)
+            return
+        retired, self.retired_sources = self.retired_sources, []
+        close_sources(retired, keep=[column.file for column in self.columns
+                                     if column.file is not None])
+
+    def clear_box(self, column):
+        """Esvazia a box (e desliga o arquivo, se houver)"""
+        self.release_source(column)
+        column.missing_file = ""
+        column.store = LineStore()
+        column.view.set_source(column.store, editable=True)
+        self.update_box_label(column)
+        self.schedule_autosave(data=True)
+
+    def choose_box_file(self, column):
+        """Escolhe um arquivo para a box (lido sob demanda durante a execução)"""
+        n = self.columns.index(column) + 1
+        from tkinter import filedialog
+
+        path = filedialog.askopenfilename(
+            title=f"Arquivo da Box {n}",
+            filetypes=[("Texto", "*.txt *.csv *.tsv"), ("Todos", "*.*")])
+        if path:
+            self.attach_box_file(column, path)
+
+    def attach_box_file(self, column, path, saved=False):
+        """Indexa o arquivo em segundo plano e liga à box
+
+        saved: o caminho veio do perfil; se não abrir, fica guardado nele.
+        """
+        column.label.config(text="⏳ Indexando...")
+
+        def work():
+            try:
+                lines, error = FileLines(path), None
+            except (OSError, ValueError) as e:
+                lines, error = None, e
+            kept = path if saved else ""
+            self.root.after(0, lambda: self._box_file_ready(column, lines, error, kept))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _box_file_ready(self, column, lines, error, saved=""):
+        if column not in self.columns:
+            if lines is not None:
+                lines.close()
+            return
+        if error is not None:
+            if saved and column.file is None:
+                column.missing_file = saved
+            self.update_box_label(column)
+            messagebox.showerror("Erro", f"Erro ao abrir arquivo:\n{error}")
+            return
+
+        self.release_source(column)
+        column.file = lines
+        column.missing_file = ""
+        column.view.set_source(lines, editable=False)
+        self.update_box_label(column)
+        self.schedule_autosave(data=True)
+
+    # ==================================================================
+    # Importação de planilha (CSV/TSV)
+    # ==================================================================
+
+    def import_csv(self):
+        """Escolhe a planilha e a coluna de cada box"""
+        spec = self.csv_import or default_csv_import()
+
+        win = tk.Toplevel(self.root)
+        win.title("Importar planilha")
+        win.resizable(False, False)
+        win.transient(self.root)
+        win.grab_set()
+
+        frame = ttk.Frame(win, padding=12)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        path_var = tk.StringVar(value=spec["path"])
+        encoding_var = tk.StringVar(value=spec["encoding"] or "auto")
+        delimiter_var = tk.StringVar(value=DELIMITER_LABELS.get(spec["delimiter"], "auto"))
+        header_var = tk.BooleanVar(value=spec["header"])
+
+        ttk.Label(frame, text="Arquivo:").grid(row=0, column=0, sticky="w", pady=4)
+        ttk.Entry(frame, textvariable=path_var, width=36).grid(row=0, column=1, columnspan=2, pady=4)
+
+        def browse():
+            from tkinter import filedialog
+
+            path = filedialog.askopenfilename(
+                parent=win, title="Planilha",
+                filetypes=[("Planilhas", "*.csv *.tsv *.txt"), ("Todos", "*.*")])
+            if path:
+                path_var.set(path)
+                read_header()
+
+        ttk.Button(frame, text="📁", width=3, command=browse).grid(row=0, column=3, padx=4)
+
+        ttk.Label(frame, text="Encoding:").grid(row=1, column=0, sticky="w", pady=2)
+        ttk.Combobox(frame, textvariable=encoding_var, values=("auto", "utf-8", "cp1252", "latin-1"),
+                     width=10).grid(row=1, column=1, sticky="w", pady=2)
+        ttk.Label(frame, text="Separador:").grid(row=2, column=0, sticky="w", pady=2)
+        ttk.Combobox(frame, textvariable=delimiter_var, values=("auto",) + tuple(DELIMITERS),
+                     state="readonly", width=10).grid(row=2, column=1, sticky="w", pady=2)
+        ttk.Checkbutton(frame, text="Primeira linha é cabeçalho",
+                        variable=header_var).grid(row=3, column=0, columnspan=3, sticky="w", pady=2)
+
+        info = ttk.Label(frame, text="")
+        info.grid(row=4, column=0, columnspan=4, sticky="w", pady=(6, 2))
+        mapping_frame = ttk.Frame(frame)
+        mapping_frame.grid(row=5, column=0, columnspan=4, sticky="w")
+        mapping_vars = []
+        names = []
+        suggested = list(spec["mapping"])
+
+        def current_spec():
+            encoding = encoding_var.get().strip()
+            return {
+                "path": path_var.get().strip(),
+                "encoding": "" if encoding == "auto" else encoding,
+                "delimiter": DELIMITERS.get(delimiter_var.get(), ""),
+                "header": header_var.get(),
+                "mapping": [var.get() if var.get() != SKIP_COLUMN else None
+                            for var in mapping_vars],
+            }
+
+        def show_mapping(table):
+            for child in mapping_frame.winfo_children():
+                child.destroy()
+            names[:] = table.names
+            previous = [var.get() for var in mapping_vars] or suggested
+            mapping_vars.clear()
+            info.config(text=f"{len(table)} linhas | encoding {table.encoding} | "
+                             f"separador {DELIMITER_LABELS.get(table.delimiter, table.delimiter)}")
+
+            # Uma linha por box; colunas a mais da planilha ganham boxes novas
+            count = max(len(self.columns), len(previous), 1)
+            for n in range(count):
+                choice = previous[n] if n < len(previous) and previous[n] in names else SKIP_COLUMN
+                var = tk.StringVar(value=choice)
+                ttk.Label(mapping_frame, text=f"📦 Box {n + 1} ←").grid(row=n, column=0, sticky="w")
+                ttk.Combobox(mapping_frame, textvariable=var, values=(SKIP_COLUMN,) + tuple(names),
+                             state="readonly", width=24).grid(row=n, column=1, pady=1)
+                mapping_vars.append(var)
+
+        def read_header():
+            try:
+                table = open_csv_import(current_spec())
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Erro", f"Erro ao abrir planilha:\n{e}", parent=win)
+                return
+            try:
+                show_mapping(table)
+            finally:
+                table.close()
+
+        def one_box_per_column():
+            if not names:
+                read_header()
+            suggested[:] = names
+            mapping_vars.clear()
+            read_header()
+
+        def apply():
+            chosen = current_spec()
+            if not chosen["path"] or not any(chosen["mapping"]):
+                messagebox.showwarning("Aviso", "Escolha a planilha e ao menos uma coluna!",
+                                       parent=win)
+                return
+            win.destroy()
+            self.apply_csv_import(chosen)
+
+        ttk.Button(frame, text="🔎 Ler cabeçalho", command=read_header).grid(
+            row=1, column=2, columnspan=2, padx=4)
+        ttk.Button(frame, text="Uma box por coluna", command=one_box_per_column).grid(
+            row=2, column=2, columnspan=2, padx=4)
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=6, column=0, columnspan=4, pady=(10, 0))
+        ttk.Button(buttons, text="📥 Importar", command=apply).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text="Cancelar", command=win.destroy).pack(side=tk.LEFT, padx=4)
+
+        if path_var.get():
+            read_header()
+
+    def repeat_csv_import(self):
+        """Refaz a última importação salva, sem abrir o diálogo"""
+        if self.csv_import is None:
+            self.import_csv()
+            return
+        self.apply_csv_import(self.csv_import)
 
-        box = scrolledtext.ScrolledText(frame, width=32, height=10, wrap=tk.WORD)
-        box.pack(pady=3)
+    def apply_csv_import(self, spec):
+        """Indexa a planilha em segundo plano e liga as colunas às boxes"""
+        if self.running:
+            messagebox.showwarning("Aviso", "Pare o macro antes de importar!")
+            return
+        self.status.set("⏳ Indexando planilha...")
 
-        ttk.Checkbutton(frame, text="✓ Usar", variable=var).pack()
-        return box
+        def work():
+            try:
+                table = open_csv_import(spec)
+                sources, error = map_csv_columns(table, spec["mapping"]), None
+            except (OSError, ValueError) as e:
+                sources, error = None, e
+            self.root.after(0, lambda: self._csv_ready(spec, sources, error))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _csv_ready(self, spec, sources, error):
+        if error is not None:
+            self.status.set("❌ Importação não concluída")
+            messagebox.showerror("Erro", f"Erro ao importar planilha:\n{error}")
+            return
 
-    def make_key_capture(self, master, row, text):
+        while len(self.columns) < len(sources):
+            self.add_column()
+        for column, lines in zip(self.columns, sources):
+            if lines is None:
+                continue
+            self.release_source(column)
+            column.file = lines
+            column.missing_file = ""
+            column.view.set_source(lines, editable=False)
+            self.update_box_label(column)
+
+        self.csv_import = spec
+        self.schedule_autosave(data=True)
+        rows = next(len(lines) for lines in sources if lines is not None)
+        self.status.set(f"📊 Planilha importada: {rows} linhas")
+
+    def make_key_capture(self, master, row, text, on_change=None, var=None, width=25):
         ttk.Label(master, text=text).grid(row=row, column=0, sticky="w", padx=5, pady=4)
 
-        entry = tk.Entry(master, width=25, font=("Courier", 10))
+        if var is None:
+            var = tk.StringVar()
+            self.key_vars.append(var)
+        if on_change:
+            var.trace_add("write", lambda *args: on_change())
+
+        entry = tk.Entry(master, width=width, font=("Courier", 10), textvariable=var)
         entry.grid(row=row, column=1, padx=5)
 
         btn = ttk.Button(master, text="🎯 Capturar", 
@@ -285,7 +825,88 @@ class AutoEsterApp:
 
     def update_speed_label(self, *args):
         """Atualiza o label de velocidade"""
-        self.speed_label.config(text=f"Delay: {self.speed.get():.2f}s")
+        text = f"Delay: {self.speed.get():.2f}s"
+        rate = self.live_rate
+        if rate is not None and rate.auto and self.running:
+            text += f" (agora {rate.delay:.3f}s)"
+        elif self.auto_tune.get() and self.tuned_speed is not None:
+            text += f" (ajustado {self.tuned_speed:.3f}s)"
+        self.speed_label.config(text=text)
+
+    def on_speed_change(self, *args):
+        """Move o controle durante a execução: o worker usa já na próxima linha"""
+        rate = self.live_rate
+        if rate is not None and self.running:
+            try:
+                rate.set(self.speed.get())
+            except tk.TclError:
+                pass
+
+    def start_rate(self, plan):
+        """Delay da execução; o ajuste automático começa de onde parou no perfil"""
+        delay = plan.delay
+        auto = self.auto_tune.get()
+        if auto and self.tuned_speed is not None:
+            delay = min(self.tuned_speed, plan.delay)
+        return LiveRate(delay, auto, ceiling=plan.delay)
+
+    def save_tuned_rate(self, rate):
+        """Guarda no perfil o delay em que o ajuste automático parou"""
+        self.tuned_speed = round(rate.delay, 4)
+        self.update_speed_label()
+        self.schedule_autosave()
+
+    # ==================================================================
+    # Perfis de ritmo
+    # ==================================================================
+
+    def profile_names(self):
+        names = list(BUILTIN_PROFILES)
+        names += [name for name in self.custom_profiles if name not in BUILTIN_PROFILES]
+        return names
+
+    def current_timing(self):
+        return resolve_profile(self.timing_profile.get(), self.custom_profiles)
+
+    def edit_timing_profile(self):
+        """Edita as pausas do perfil atual e salva com um nome"""
+        profile = self.current_timing()
+
+        win = tk.Toplevel(self.root)
+        win.title("Perfil de ritmo")
+        win.resizable(False, False)
+        win.transient(self.root)
+        win.grab_set()
+
+        frame = ttk.Frame(win, padding=12)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text="Nome:").grid(row=0, column=0, sticky="w", pady=4)
+        name_var = tk.StringVar(value=self.timing_profile.get())
+        ttk.Entry(frame, textvariable=name_var, width=16).grid(row=0, column=1, pady=4)
+
+        field_vars = {}
+        for row, field in enumerate(TIMING_FIELDS, start=1):
+            ttk.Label(frame, text=TIMING_LABELS[field]).grid(row=row, column=0, sticky="w", pady=2)
+            var = tk.StringVar(value=f"{getattr(profile, field):g}")
+            ttk.Entry(frame, textvariable=var, width=8).grid(row=row, column=1, pady=2)
+            field_vars[field] = var
+
+        def save():
+            name = name_var.get().strip()
+            if not name:
+                messagebox.showwarning("Aviso", "Informe um nome para o perfil!", parent=win)
+                return
+            values = {field: var.get().replace(",", ".") for field, var in field_vars.items()}
+            self.custom_profiles[name] = profile_to_dict(profile_from_dict(values, profile))
+            self.profile_combo.config(values=self.profile_names())
+            self.timing_profile.set(name)
+            win.destroy()
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=len(TIMING_FIELDS) + 1, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(buttons, text="💾 Salvar", command=save).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text="Cancelar", command=win.destroy).pack(side=tk.LEFT, padx=4)
 
     # ==================================================================
     # Tema Dark/Light
@@ -295,84 +916,216 @@ class AutoEsterApp:
     # Salvar/Carregar Configurações
     # ==================================================================
 
+    def collect_settings(self):
+        """Ajustes do perfil atual (sem o texto das boxes)"""
+        try:
+            type_max_len = self.type_max_len.get()
+        except tk.TclError:
+            type_max_len = DEFAULT_TYPE_MAX_LEN
+        return {
+            "speed": self.speed.get(),
+            "auto_tune": self.auto_tune.get(),
+            "tuned_speed": self.tuned_speed,
+            "dedupe_rows": self.dedupe_rows.get(),
+            "skip_processed": self.skip_processed.get(),
+            "type_max_len": type_max_len,
+            "timing_profile": self.timing_profile.get(),
+            "timing_profiles": self.custom_profiles,
+            "keys": {
+                "start": self.entry_start.get(),
+                "stop": self.entry_stop.get()
+            },
+            "columns": [column.to_config() for column in self.columns],
+            "csv_import": self.csv_import,
+            "macros": self.macros,
+            "template": self.template_text.get(),
+            "target_window": self.target_window.get()
+        }
+
+    def schedule_autosave(self, data=False):
+        """Agenda a gravação para depois da última alteração (debounce)"""
+        if data:
+            self.data_dirty = True
+        if not self.autosave_enabled:
+            return
+        if self.autosave_job is not None:
+            self.root.after_cancel(self.autosave_job)
+        self.autosave_job = self.root.after(AUTOSAVE_DELAY_MS, self.autosave)
+
+    def autosave(self):
+        """Entrega ao gravador em segundo plano os ajustes e, se mudou, o texto"""
+        if self.autosave_job is not None:
+            self.root.after_cancel(self.autosave_job)
+            self.autosave_job = None
+        self.profiles.save_settings(self.collect_settings(), dark_mode=self.dark_mode)
+        # Enquanto o texto não chega, as boxes vazias não podem sobrescrevê-lo
+        if self.data_dirty and not self.data_loading:
+            self.data_dirty = False
+            self.profiles.save_data([column.data_snapshot() for column in self.columns])
+
+    def on_global_keys_change(self):
+        self.refresh_hotkeys()
+        self.schedule_autosave()
+
     def save_config(self):
-        """Salva todas as configurações em arquivo JSON"""
+        """Grava agora o perfil atual (além do salvamento automático)"""
+        self.data_dirty = True
+        self.autosave()
+        self.profiles.flush()
+        messagebox.showinfo("Sucesso", f"Perfil \"{self.profiles.active}\" salvo em:\n"
+                                       f"{os.path.abspath(self.profiles.path)}")
+
+    def load_config(self, reload=False):
+        """Aplica os ajustes do perfil ativo e carrega o texto das boxes em segundo plano"""
+        if reload:
+            self.profiles.reload()
+            self.profile_name.set(self.profiles.active)
+            self.profile_select.config(values=self.profiles.names())
+
+        self.autosave_enabled, enabled = False, self.autosave_enabled
         try:
-            config = {
-                "version": "3.0",
-                "speed": self.speed.get(),
-                "dark_mode": self.dark_mode,
-                "keys": {
-                    "start": self.entry_start.get(),
-                    "stop": self.entry_stop.get(),
-                    "after1": self.entry_after1.get(),
-                    "after2": self.entry_after2.get(),
-                    "after3": self.entry_after3.get()
-                },
-                "boxes": {
-                    "box1_enabled": self.use_b1.get(),
-                    "box2_enabled": self.use_b2.get(),
-                    "box3_enabled": self.use_b3.get(),
-                    "box1_content": self.box1.get("1.0", tk.END),
-                    "box2_content": self.box2.get("1.0", tk.END),
-                    "box3_content": self.box3.get("1.0", tk.END)
-                }
-            }
-            
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            
-            messagebox.showinfo("Sucesso", f"Configuração salva em:\n{self.config_file}")
-            
+            self.apply_settings(self.profiles.settings())
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar configuração:\n{e}")
+            print(f"Erro ao carregar configuração: {e}")
+        finally:
+            self.autosave_enabled = enabled
+            self.data_dirty = False
+        self.load_box_data()
+
+    def apply_settings(self, config):
+        # Carregar velocidade
+        self.tuned_speed = config.get("tuned_speed")
+        self.auto_tune.set(bool(config.get("auto_tune", False)))
+        self.dedupe_rows.set(bool(config.get("dedupe_rows", False)))
+        self.skip_processed.set(bool(config.get("skip_processed", False)))
+        self.speed.set(config.get("speed", 0.1))
+        self.type_max_len.set(config.get("type_max_len", DEFAULT_TYPE_MAX_LEN))
+        self.custom_profiles = dict(config.get("timing_profiles", {}))
+        self.profile_combo.config(values=self.profile_names())
+        self.timing_profile.set(config.get("timing_profile", DEFAULT_PROFILE))
+
+        # Carregar teclas
+        keys = config.get("keys", {})
+        self.entry_start.delete(0, tk.END)
+        self.entry_start.insert(0, keys.get("start", "f11"))
+
+        self.entry_stop.delete(0, tk.END)
+        self.entry_stop.insert(0, keys.get("stop", "f12"))
+
+        # Carregar boxes (o texto chega por load_box_data)
+        specs = columns_from_config(config)
+        for spec in specs:
+            spec["content"] = ""
+        self.set_columns(specs)
+        self.csv_import = csv_import_from_config(config)
+        # Antes do modelo, que é validado com os macros do perfil
+        self.macros = normalize_macros(config.get("macros"))
+        self.refresh_macro_view()
+        self.template_text.set(config.get("template", ""))
+        self.target_window.set(config.get("target_window", FOCUSED_TARGET) or FOCUSED_TARGET)
+
+    def load_box_data(self):
+        """Lê o texto das boxes numa thread e aplica quando chegar"""
+        name = self.profiles.active
+        self.data_loading = True
+        for column in self.columns:
+            if column.file is None:
+                column.view.set_source(column.store, editable=False)
+                column.label.config(text="⏳ Carregando...")
+
+        def work():
+            contents = self.profiles.load_data(name)
+            self.root.after(0, lambda: self._box_data_ready(name, contents))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _box_data_ready(self, name, contents):
+        if name != self.profiles.active:
+            return
+        self.data_loading = False
+        for n, column in enumerate(self.columns):
+            if column.file is not None:
+                continue
+            column.store = LineStore(contents[n] if n < len(contents) else "")
+            column.view.set_source(column.store, editable=True)
+            self.update_box_label(column)
+
+    # ==================================================================
+    # Perfis
+    # ==================================================================
 
-    def load_config(self):
-        """Carrega configurações do arquivo JSON"""
-        if not os.path.exists(self.config_file):
+    def switch_profile(self, name):
+        """Grava o perfil atual e passa para name"""
+        if name == self.profiles.active:
+            return
+        if self.running:
+            messagebox.showwarning("Aviso", "Pare o macro antes de trocar de perfil!")
+            self.profile_name.set(self.profiles.active)
+            return
+        self.autosave()
+        self.profiles.set_active(name)
+        self.profile_name.set(name)
+        self.load_config()
+        self.autosave()
+
+    def new_profile(self):
+        """Cria um perfil com uma cópia dos ajustes e do texto atuais"""
+        from tkinter import simpledialog
+
+        name = simpledialog.askstring("Novo perfil", "Nome do perfil:", parent=self.root)
+        name = (name or "").strip()
+        if not name:
+            return
+        if name in self.profiles.names():
+            messagebox.showwarning("Aviso", f"Já existe um perfil \"{name}\"!")
+            return
+        clash = self.profiles.clash(name)
+        if clash is not None:
+            messagebox.showwarning("Aviso", f"O nome \"{name}\" usaria os mesmos arquivos do "
+                                            f"perfil \"{clash}\". Escolha outro nome.")
+            return
+        self.autosave()
+        self.profiles.set_active(name, self.collect_settings())
+        self.profile_name.set(name)
+        self.profile_select.config(values=self.profiles.names())
+        self.data_dirty = True
+        self.autosave()
+
+    def delete_profile(self):
+        if self.running:
+            messagebox.showwarning("Aviso", "Pare o macro antes de apagar o perfil!")
+            return
+        name = self.profiles.active
+        if len(self.profiles.names()) == 1:
+            messagebox.showwarning("Aviso", "Não é possível apagar o único perfil!")
+            return
+        if not messagebox.askyesno("Apagar perfil", f"Apagar o perfil \"{name}\"?"):
+            return
+        if self.autosave_job is not None:
+            self.root.after_cancel(self.autosave_job)
+            self.autosave_job = None
+        self.profiles.remove(name)
+        clear_index(name)
+        self.profile_name.set(self.profiles.active)
+        self.profile_select.config(values=self.profiles.names())
+        self.load_config()
+        self.autosave()
+
+    def forget_processed(self):
+        """Apaga o índice de linhas já enviadas do perfil atual"""
+        if self.running:
+            messagebox.showwarning("Aviso", "Pare o macro antes de apagar o índice!")
+            return
+        name = self.profiles.active
+        if not messagebox.askyesno(
+                "Esquecer enviadas",
+                f"Esquecer as linhas já enviadas pelo perfil \"{name}\"?\n"
+                "Na próxima execução todas serão enviadas de novo."):
             return
-        
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # Carregar velocidade
-            self.speed.set(config.get("speed", 0.1))
-            
-            # Carregar teclas
-            keys = config.get("keys", {})
-            self.entry_start.delete(0, tk.END)
-            self.entry_start.insert(0, keys.get("start", "f11"))
-            
-            self.entry_stop.delete(0, tk.END)
-            self.entry_stop.insert(0, keys.get("stop", "f12"))
-            
-            self.entry_after1.delete(0, tk.END)
-            self.entry_after1.insert(0, keys.get("after1", "enter"))
-            
-            self.entry_after2.delete(0, tk.END)
-            self.entry_after2.insert(0, keys.get("after2", "enter"))
-            
-            self.entry_after3.delete(0, tk.END)
-            self.entry_after3.insert(0, keys.get("after3", "enter"))
-            
-            # Carregar boxes
-            boxes = config.get("boxes", {})
-            self.use_b1.set(boxes.get("box1_enabled", True))
-            self.use_b2.set(boxes.get("box2_enabled", True))
-            self.use_b3.set(boxes.get("box3_enabled", True))
-            
-            self.box1.delete("1.0", tk.END)
-            self.box1.insert("1.0", boxes.get("box1_content", ""))
-            
-            self.box2.delete("1.0", tk.END)
-            self.box2.insert("1.0", boxes.get("box2_content", ""))
-            
-            self.box3.delete("1.0", tk.END)
-            self.box3.insert("1.0", boxes.get("box3_content", ""))
-            
-        except Exception as e:
-            print(f"Erro ao carregar configuração: {e}")
+            clear_index(name)
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível apagar o índice:\n{e}")
 
     # ==================================================================
     # Captura de tecla
@@ -385,6 +1138,7 @@ class AutoEsterApp:
             return
 
         self.capturing = True
+        self.hotkeys.enabled = False
         self.captured_keys = set()
         self.capture_target_entry = entry
 
@@ -408,6 +1162,8 @@ class AutoEsterApp:
                                       foreground="blue")
         self.capture_label.pack(pady=10)
 
+        from pynput import keyboard as pynput_kb
+
         self.capture_listener = pynput_kb.Listener(
             on_press=self.on_capture_press,
             on_release=self.on_capture_release
@@ -421,20 +1177,9 @@ class AutoEsterApp:
             return
 
         try:
-            if hasattr(key, 'char') and key.char:
-                key_str = key.char.lower()
-            else:
-                key_str = str(key).split('.')[-1].lower()
+            key_str = key_name(key)
 
-            key_map = {
-                "ctrl_l": "ctrl", "ctrl_r": "ctrl",
-                "shift_l": "shift", "shift_r": "shift",
-                "alt_l": "alt", "alt_r": "alt",
-                "cmd_l": "cmd", "cmd_r": "cmd"
-            }
-            key_str = key_map.get(key_str, key_str)
-
-            if key_str in ("enter", "return"):
+            if key_str == "enter":
                 self.finish_capture()
                 return
 
@@ -469,6 +1214,7 @@ class AutoEsterApp:
     def cancel_capture(self):
         """Cancela a captura"""
         self.capturing = False
+        self.hotkeys.enabled = True
         
         if self.capture_listener:
             self.capture_listener.stop()
@@ -481,70 +1227,720 @@ class AutoEsterApp:
         self.capture_target_entry = None
 
     # ==================================================================
-    # Listener global
+    # Macros gravados
     # ==================================================================
 
-    def on_global_press(self, key):
-        """Detecta teclas globais F11/F12"""
-        if self.capturing:
+    def open_macros(self):
+        """Janela dos macros: gravar, ajustar as pausas e inserir no modelo"""
+        if self.macro_view is not None:
+            self.macro_view.winfo_toplevel().lift()
             return
 
+        win = tk.Toplevel(self.root)
+        win.title("⏺ Macros gravados")
+        win.transient(self.root)
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        columns = ("nome", "resumo", "fator", "pausa")
+        view = ttk.Treeview(frame, columns=columns, show="headings", height=8,
+                            selectmode="browse")
+        for name, title, width in zip(columns, ("Nome", "Teclas", "Pausas ×", "Pausa máx."),
+                                      (140, 260, 70, 80)):
+            view.heading(name, text=title)
+            view.column(name, width=width)
+        view.grid(row=0, column=0, sticky="nsew")
+        self.macro_view = view
+
+        # Nome e pausas do próximo macro gravado (ou do selecionado, ao aplicar)
+        form = ttk.LabelFrame(frame, text="⏺ Gravar", padding=6)
+        form.grid(row=1, column=0, sticky="ew", pady=8)
+        name_var = tk.StringVar()
+        factor_var = tk.StringVar(value=f"{DEFAULT_FACTOR:g}")
+        gap_var = tk.StringVar(value=str(int(DEFAULT_MAX_GAP * 1000)))
+
+        ttk.Label(form, text="Nome:").grid(row=0, column=0, sticky="w")
+        ttk.Entry(form, textvariable=name_var, width=18).grid(row=0, column=1, padx=4)
+        ttk.Label(form, text="Pausas ×").grid(row=0, column=2, sticky="w")
+        ttk.Spinbox(form, from_=0, to=MAX_FACTOR, increment=0.05, width=6,
+                    textvariable=factor_var).grid(row=0, column=3, padx=4)
+        ttk.Label(form, text="Pausa máx. (ms):").grid(row=0, column=4, sticky="w")
+        ttk.Spinbox(form, from_=0, to=int(MAX_GAP_LIMIT * 1000), increment=100, width=7,
+                    textvariable=gap_var).grid(row=0, column=5, padx=4)
+        record_button = ttk.Button(form, text="⏺ Gravar", width=12)
+        record_button.grid(row=0, column=6, padx=4)
+        ttk.Label(form, textvariable=self.record_status).grid(row=1, column=0, columnspan=7,
+                                                              sticky="w", pady=(6, 0))
+        self.record_status.set(f"Pausas × 0 = sem pausas, 1 = como gravado. "
+                               f"Termine com {self.global_stop_key or 'o botão'}.")
+
+        def read_form():
+            """(nome, fator, pausa máx. em s) do formulário; None se inválido"""
+            name = name_var.get().strip()
+            try:
+                factor = float(factor_var.get().replace(",", "."))
+                max_gap = int(gap_var.get()) / 1000
+            except ValueError:
+                factor = max_gap = -1
+            if not 0 <= factor <= MAX_FACTOR or not 0 <= max_gap <= MAX_GAP_LIMIT:
+                messagebox.showwarning("Aviso", f"Pausas × deve ficar entre 0 e {MAX_FACTOR:g} "
+                                                f"e a pausa máxima entre 0 e "
+                                                f"{int(MAX_GAP_LIMIT * 1000)} ms", parent=win)
+                return None
+            return name, factor, max_gap
+
+        def toggle_recording():
+            if self.recorder is not None:
+                self.finish_recording()
+                return
+            form_values = read_form()
+            if form_values is None:
+                return
+            name = form_values[0]
+            if not valid_macro_name(name):
+                messagebox.showwarning("Aviso", "Dê um nome ao macro (sem espaços nem chaves)",
+                                       parent=win)
+                return
+            if name in self.macros and not messagebox.askyesno(
+                    "Gravar", f"Substituir o macro \"{name}\"?", parent=win):
+                return
+            self.start_recording(*form_values)
+
+        record_button.config(command=toggle_recording)
+        self.record_button = record_button
+
+        def selected():
+            selection = view.selection()
+            return view.item(selection[0], "values")[0] if selection else None
+
+        def on_select(event):
+            name = selected()
+            macro = self.macros.get(name)
+            if macro is not None:
+                name_var.set(name)
+                factor_var.set(f"{macro['factor']:g}")
+                gap_var.set(str(int(round(macro["max_gap"] * 1000))))
+
+        def apply():
+            name = selected()
+            form_values = read_form()
+            if name not in self.macros or form_values is None:
+                return
+            _, factor, max_gap = form_values
+            self.macros[name].update(factor=factor, max_gap=max_gap)
+            self.macros_changed(name)
+
+        def insert():
+            name = selected()
+            if name in self.macros:
+                self.template_text.set(f"{self.template_text.get()}{{MACRO {name}}}")
+
+        def remove():
+            name = selected()
+            if name in self.macros and messagebox.askyesno(
+                    "Excluir", f"Excluir o macro \"{name}\"?", parent=win):
+                del self.macros[name]
+                self.macros_changed()
+
+        view.bind("<<TreeviewSelect>>", on_select)
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=2, column=0)
+        ttk.Button(buttons, text="✓ Aplicar pausas", command=apply).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text="➕ Inserir no modelo", command=insert).pack(side=tk.LEFT,
+                                                                              padx=4)
+        ttk.Button(buttons, text="🗑", width=3, command=remove).pack(side=tk.LEFT, padx=4)
+
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        def close():
+            self.finish_recording(keep=False)
+            self.macro_view = None
+            self.record_button = None
+            win.destroy()
+
+        win.protocol("WM_DELETE_WINDOW", close)
+        self.refresh_macro_view()
+
+    def refresh_macro_view(self, select=None):
+        view = self.macro_view
+        if view is None:
+            return
+        view.delete(*view.get_children())
+        for name in sorted(self.macros):
+            macro = self.macros[name]
+            item = view.insert("", tk.END, values=(name, describe_macro(macro),
+                                                   f"{macro['factor']:g}",
+                                                   f"{int(round(macro['max_gap'] * 1000))} ms"))
+            if name == select:
+                view.selection_set(item)
+
+    def macros_changed(self, select=None):
+        """Macros alterados: atualiza a lista, revalida o modelo e salva o perfil"""
+        self.refresh_macro_view(select)
+        self.check_template()
+        self.schedule_autosave()
+
+    def start_recording(self, name, factor, max_gap):
+        """Passa a gravar as teclas recebidas pelo listener global"""
+        if self.running or self.queue_active:
+            messagebox.showwarning("Aviso", "Pare o macro antes de gravar!")
+            return
+        if self.global_listener is None:
+            messagebox.showwarning("Aviso", "O teclado ainda não foi iniciado.")
+            return
+        self.recording_macro = (name, factor, max_gap)
+        self.recorder = MacroRecorder()
+        self.hotkeys.recorder = self.recorder
+        if self.record_button is not None:
+            self.record_button.config(text="⏹ Parar")
+        self.status.set(f"⏺ GRAVANDO \"{name}\" - {self.global_stop_key or '⏹'} termina")
+        self.poll_recording()
+
+    def poll_recording(self):
+        recorder = self.recorder
+        if recorder is None:
+            return
+        self.record_status.set(f"⏺ Gravando... {len(recorder)} eventos "
+                               f"(digite no programa alvo; "
+                               f"{self.global_stop_key or '⏹ Parar'} termina)")
+        self.root.after(RECORD_POLL_MS, self.poll_recording)
+
+    def finish_recording(self, keep=True):
+        """Encerra a gravação e, com keep, salva o macro no perfil"""
+        recorder = self.recorder
+        if recorder is None:
+            return
+        self.hotkeys.recorder = None
+        self.recorder = None
+        name, factor, max_gap = self.recording_macro
+        self.recording_macro = None
+        if self.record_button is not None:
+            self.record_button.config(text="⏺ Gravar")
+
+        # A tecla de parar global fica de fora do macro
+        events = recorder.stop(parse_hotkey(self.global_stop_key))
+        if not keep:
+            self.status.set("⚪ Gravação descartada")
+            self.record_status.set("")
+            return
+        if not events:
+            self.status.set("⚪ Nenhuma tecla gravada")
+            self.record_status.set("Nenhuma tecla gravada.")
+            return
+        macro = normalize_macro({"events": events, "factor": factor, "max_gap": max_gap})
+        self.macros[name] = macro
+        self.macros_changed(name)
+        self.status.set(f"✅ Macro \"{name}\" gravado")
+        self.record_status.set(f"\"{name}\": {describe_macro(macro)}. "
+                               f"Use {{MACRO {name}}} no modelo.")
+
+    # ==================================================================
+    # Fila de trabalhos
+    # ==================================================================
+
+    def open_queue(self):
+        """Janela da fila: trabalhos em ordem, com perfil, fontes e preparação"""
+        if self.queue_view is not None:
+            self.queue_view.winfo_toplevel().lift()
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("📋 Fila de trabalhos")
+        win.transient(self.root)
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        columns = ("perfil", "fontes", "preparacao", "estado", "resultado")
+        view = ttk.Treeview(frame, columns=columns, show="headings", height=10,
+                            selectmode="browse")
+        for name, title, width in zip(columns, ("Perfil", "Fontes", "Preparação", "Estado",
+                                                "Resultado"), (120, 200, 90, 80, 220)):
+            view.heading(name, text=title)
+            view.column(name, width=width)
+        view.grid(row=0, column=0, columnspan=2, sticky="nsew")
+        self.queue_view = view
+
+        # Novo trabalho: perfil, combinação de preparação e arquivos opcionais
+        add = ttk.LabelFrame(frame, text="➕ Novo trabalho", padding=6)
+        add.grid(row=1, column=0, columnspan=2, sticky="ew", pady=8)
+        profile_var = tk.StringVar(value=self.profiles.active)
+        setup_var = tk.StringVar()
+        chosen = {"files": [], "csv": ""}
+        sources_var = tk.StringVar(value="boxes do perfil")
+
+        ttk.Label(add, text="Perfil:").grid(row=0, column=0, sticky="w")
+        ttk.Combobox(add, textvariable=profile_var, values=self.profiles.names(),
+                     state="readonly", width=16).grid(row=0, column=1, padx=4)
+        ttk.Label(add, text="Preparação:").grid(row=0, column=2, sticky="w")
+        ttk.Entry(add, textvariable=setup_var, width=12).grid(row=0, column=3, padx=4)
+
+        def choose_files():
+            from tkinter import filedialog
+
+            paths = filedialog.askopenfilenames(
+                parent=win, title="Arquivos das boxes (na ordem: box 1, box 2...)",
+                filetypes=[("Arquivos de texto", "*.txt"), ("Todos os arquivos", "*.*")])
+            chosen["files"] = list(paths)
+            sources_var.set(describe_job(dict(default_job(""), **chosen)))
+
+        def choose_csv():
+            from tkinter import filedialog
+
+            path = filedialog.askopenfilename(
+                parent=win, title="Planilha do trabalho",
+                filetypes=[("Planilhas", "*.csv *.tsv *.txt"), ("Todos os arquivos", "*.*")])
+            chosen["csv"] = path or ""
+            sources_var.set(describe_job(dict(default_job(""), **chosen)))
+
+        ttk.Button(add, text="📄 Arquivos...", command=choose_files).grid(row=1, column=0)
+        ttk.Button(add, text="📊 Planilha...", command=choose_csv).grid(row=1, column=1)
+        ttk.Label(add, textvariable=sources_var).grid(row=1, column=2, columnspan=2, sticky="w")
+
+        def add_job():
+            setup = setup_var.get().strip()
+            if setup and compile_combination(setup) is None:
+                messagebox.showwarning("Aviso", f"Combinação inválida: {setup}", parent=win)
+                return
+            job = default_job(profile_var.get())
+            job.update(files=chosen["files"], csv=chosen["csv"], setup=setup)
+            self.queue.add(job)
+            chosen.update(files=[], csv="")
+            sources_var.set("boxes do perfil")
+            self.refresh_queue_view()
+
+        ttk.Button(add, text="➕ Adicionar", command=add_job).grid(row=1, column=4, padx=4)
+
+        def selected():
+            selection = view.selection()
+            return view.index(selection[0]) if selection else None
+
+        def move(delta):
+            index = selected()
+            if index is not None and not self.queue_active:
+                self.refresh_queue_view(self.queue.move(index, delta))
+
+        def remove():
+            index = selected()
+            if index is not None and index != self.queue_job:
+                self.queue.remove(index)
+                self.refresh_queue_view()
+
+        def reset():
+            if not self.queue_active:
+                self.queue.reset()
+                self.refresh_queue_view()
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=2, column=0, columnspan=2)
+        ttk.Button(buttons, text="⬆", width=3, command=lambda: move(-1)).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="⬇", width=3, command=lambda: move(1)).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="🗑", width=3, command=remove).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Button(buttons, text="↺ Tudo pendente", command=reset).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text="▶️ Rodar fila", command=self.run_queue).pack(side=tk.LEFT,
+                                                                                padx=4)
+        ttk.Button(buttons, text="⏹️ Parar", command=self.stop_macro).pack(side=tk.LEFT, padx=4)
+
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        def close():
+            self.queue_view = None
+            win.destroy()
+
+        win.protocol("WM_DELETE_WINDOW", close)
+        self.refresh_queue_view()
+
+    def refresh_queue_view(self, select=None):
+        view = self.queue_view
+        if view is None:
+            return
+        view.delete(*view.get_children())
+        for n, job in enumerate(self.queue.jobs):
+            state = "▶ executando" if n == self.queue_job else job["state"]
+            item = view.insert("", tk.END, values=(job["profile"], describe_job(job),
+                                                   job["setup"], state, job["result"]))
+            if n == select:
+                view.selection_set(item)
+
+    def run_queue(self):
+        """Executa os trabalhos pendentes em ordem (F12 para a fila inteira)"""
+        if self.running or self.queue_active:
+            messagebox.showwarning("Aviso", "O macro já está em execução!")
+            return
+        if self.recorder is not None:
+            messagebox.showwarning("Aviso", "Termine a gravação do macro antes de iniciar!")
+            return
+        if not self.services_ready():
+            return
+        if self.queue.next_pending() is None:
+            messagebox.showinfo("Fila", "Não há trabalhos pendentes na fila.")
+            return
+        self.queue_active = True
+        self.start_next_job()
+
+    def start_next_job(self):
+        """Troca para o perfil do próximo trabalho e monta o plano numa thread"""
+        if not self.queue_active or self.running:
+            return
+        index = self.queue.next_pending()
+        if index is None:
+            self.queue_active = False
+            self.status.set(f"✅ FILA CONCLUÍDA - {len(self.queue.jobs)} trabalhos")
+            self.refresh_queue_view()
+            return
+
+        job = self.queue.jobs[index]
+        if job["profile"] not in self.profiles.names():
+            self.finish_job(index, FAILED, "perfil não encontrado")
+            return
+
+        self.switch_profile(job["profile"])
+        self.queue_job = index
+        self.refresh_queue_view()
+        self.status.set(f"📋 Trabalho {index + 1}/{len(self.queue.jobs)}: preparando...")
+
+        from x11target import TargetWindowError
         try:
-            if hasattr(key, 'char') and key.char:
-                k = key.char.lower()
-            else:
-                k = str(key).split('.')[-1].lower()
+            controller = self.open_run_controller()
+        except TargetWindowError as e:
+            self.finish_job(index, FAILED, str(e))
+            return
+        key_space = key_space_for(controller)
+        settings = self.profiles.settings(job["profile"])
 
-            start_key = self.entry_start.get().strip().lower()
-            stop_key = self.entry_stop.get().strip().lower()
+        def work():
+            try:
+                contents = self.profiles.load_data(job["profile"])
+                plan, error = job_plan(job, settings, contents, key_space), None
+            except (OSError, ValueError) as e:
+                plan, error = None, e
+            self.root.after(0, lambda: self._job_ready(index, job, plan, controller, error))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _job_ready(self, index, job, plan, controller, error):
+        if not self.queue_active:
+            self.queue_job = None
+            if controller is not self.controller:
+                controller.close()
+            if plan is not None:
+                close_sources(plan_sources(plan))
+            self.refresh_queue_view()
+            return
+        if error is None and plan.start >= plan.end:
+            error = "nenhuma box contém linhas"
+        if error is not None:
+            if controller is not self.controller:
+                controller.close()
+            if plan is not None:
+                close_sources(plan_sources(plan))
+            self.finish_job(index, FAILED, str(error))
+            return
 
-            if k == start_key and start_key != "" and not self.running:
-                self.root.after(10, self.start_macro)
+        setup = compile_combination(job["setup"], key_space_for(controller))
+        if not self.launch(plan, controller, setup):
+            if controller is not self.controller:
+                controller.close()
+            close_sources(plan_sources(plan))
+            self.queue_active = False
+            self.finish_job(index, FAILED, "não foi possível iniciar")
+
+    def finish_job(self, index, state, result, report=""):
+        """Registra o resultado do trabalho; erro ao preparar passa para o próximo"""
+        self.queue.finish(index, state, result, report)
+        self.queue_job = None
+        self.refresh_queue_view()
+        self.root.after(QUEUE_GAP_MS, self.start_next_job)
+
+    def on_run_finished(self, state, result, report):
+        """Fim de uma execução: na fila, registra o trabalho e segue ou para"""
+        index = self.queue_job
+        if index is not None:
+            # Arquivos e planilhas abertos só para este trabalho (job_plan)
+            self.retired_sources.extend(plan_sources(self.plan))
+        self.close_retired_sources(retry=True)
+        if index is None:
+            return
+        if state != DONE:
+            # Parada (F12) ou erro durante o envio interrompem a fila
+            self.queue_active = False
+        self.finish_job(index, state, result, report)
 
-            if k == stop_key and stop_key != "" and self.running:
-                self.root.after(10, self.stop_macro)
+    # ==================================================================
+    # Listener global
+    # ==================================================================
 
-        except:
+    def refresh_hotkeys(self):
+        """Normaliza as teclas globais uma vez, sempre que os campos mudam"""
+        self.global_start_key = self.entry_start.get().strip().lower()
+        self.global_stop_key = self.entry_stop.get().strip().lower()
+
+        put = self.hotkey_queue.put
+        bindings = {}
+        if self.global_start_key:
+            bindings[self.global_start_key] = lambda: put("start")
+        if self.global_stop_key:
+            bindings[self.global_stop_key] = lambda: put("stop")
+        self.hotkeys.set_bindings(bindings)
+
+    def poll_hotkeys(self):
+        """Atende, na thread do Tk, as teclas globais detectadas pelo listener"""
+        try:
+            while True:
+                action = self.hotkey_queue.get_nowait()
+                if self.recorder is not None:
+                    # Gravando: a tecla de parar encerra a gravação e a de iniciar é ignorada
+                    if action == "stop":
+                        self.finish_recording()
+                elif action == "start" and not self.running and not self.queue_active:
+                    self.start_macro()
+                elif action == "stop" and (self.running or self.queue_active):
+                    self.stop_macro()
+        except queue.Empty:
             pass
+        self.root.after(HOTKEY_POLL_MS, self.poll_hotkeys)
 
     # ==================================================================
     # Macro
     # ==================================================================
 
+    def parse_range(self):
+        """Converte o intervalo da interface em (início, fim) com base 0"""
+        first = self.range_from.get().strip()
+        last = self.range_to.get().strip()
+        start = int(first) - 1 if first else 0
+        end = int(last) if last else None
+        if start < 0 or (end is not None and end <= start):
+            raise ValueError("intervalo de linhas inválido")
+        return start, end
+
+    def check_template(self):
+        """Valida o modelo enquanto é digitado"""
+        text = self.template_text.get().strip()
+        if not text:
+            self.template_status.config(text="Vazio = cada box seguida da sua tecla após. "
+                                             "Ex.: {1}{TAB}{2}{ENTER}{WAIT 200}")
+            return
+        try:
+            parse_template(text, len(self.columns), self.macros)
+        except TemplateError as e:
+            self.template_status.config(text=f"⚠️ {e}")
+        else:
+            self.template_status.config(text="✓ Modelo válido")
+
+    def refresh_target_windows(self):
+        """Lista as janelas abertas ao abrir o combobox do alvo"""
+        try:
+            from x11target import list_windows, TargetWindowError
+        except ImportError:
+            return
+        try:
+            titles = sorted({title for _, title in list_windows()} - {self.root.title()})
+        except TargetWindowError as e:
+            print(f"Erro ao listar janelas: {e}")
+            return
+        self.target_combo.config(values=(FOCUSED_TARGET,) + tuple(titles))
+
+    def open_run_controller(self):
+        """Teclado da execução: pynput (janela em foco) ou envio direto à janela alvo
+
+        Levanta x11target.TargetWindowError se a janela alvo não existir.
+        """
+        target = self.target_window.get().strip()
+        if not target or target == FOCUSED_TARGET or not self.x11:
+            if self.controller is None:
+                self.controller = make_controller()
+            return self.controller
+
+        from x11target import X11WindowController
+        return X11WindowController(target)
+
+    def make_run_controller(self):
+        from x11target import TargetWindowError
+        try:
+            return self.open_run_controller()
+        except TargetWindowError as e:
+            messagebox.showwarning("Aviso", f"Janela alvo indisponível:\n{e}")
+            return None
+
+    def build_plan(self, start=0, end=None, key_space=None):
+        """Resolve tudo que o worker precisa, na thread do Tk"""
+        text = self.template_text.get().strip()
+        template = parse_template(text, len(self.columns), self.macros) if text else None
+        entries = []
+        for column in self.columns:
+            enabled = column.enabled.get()
+            entries.append((enabled, column.lines() if enabled else (), column.key_after.get(),
+                            column.mode.get(), column.wait.get()))
+        boxes = plan_boxes(entries, template)
+
+        try:
+            type_max_len = self.type_max_len.get()
+        except tk.TclError:
+            type_max_len = DEFAULT_TYPE_MAX_LEN
+
+        return compile_plan(boxes, self.speed.get(), type_max_len, key_space,
+                            start=start, end=end, timing=self.current_timing(),
+                            template=template)
+
     def start_macro(self):
-        if self.running:
+        if self.running or self.queue_active:
             messagebox.showwarning("Aviso", "O macro já está em execução!")
             return
+        if self.recorder is not None:
+            messagebox.showwarning("Aviso", "Termine a gravação do macro antes de iniciar!")
+            return
+        if not self.services_ready():
+            return
 
-        self.lines_b1 = [line for line in self.box1.get("1.0", tk.END).splitlines() if line.strip()]
-        self.lines_b2 = [line for line in self.box2.get("1.0", tk.END).splitlines() if line.strip()]
-        self.lines_b3 = [line for line in self.box3.get("1.0", tk.END).splitlines() if line.strip()]
+        try:
+            start, end = self.parse_range()
+        except ValueError:
+            messagebox.showwarning("Aviso", "Intervalo de linhas inválido!")
+            return
 
-        if not any([
-            self.use_b1.get() and self.lines_b1,
-            self.use_b2.get() and self.lines_b2,
-            self.use_b3.get() and self.lines_b3
-        ]):
+        controller = self.make_run_controller()
+        if controller is None:
+            return
+        try:
+            plan = self.build_plan(start, end, key_space_for(controller))
+        except TemplateError as e:
+            messagebox.showwarning("Aviso", f"Modelo da linha inválido:\n{e}")
+            return
+        except ValueError as e:
+            messagebox.showwarning("Aviso", f"Espera inválida:\n{e}")
+            return
+        if not plan.steps:
             messagebox.showwarning("Aviso", "Nenhuma box ativa contém linhas!")
             return
 
-        self.key_after_b1 = self.entry_after1.get().strip()
-        self.key_after_b2 = self.entry_after2.get().strip()
-        self.key_after_b3 = self.entry_after3.get().strip()
+        self.launch(plan, controller)
+
+    def resume_macro(self):
+        """Continua a última execução interrompida a partir da linha salva"""
+        if self.running or self.queue_active:
+            messagebox.showwarning("Aviso", "O macro já está em execução!")
+            return
+        if self.recorder is not None:
+            messagebox.showwarning("Aviso", "Termine a gravação do macro antes de iniciar!")
+            return
+        if not self.services_ready():
+            return
+
+        saved = load_checkpoint()
+        if not saved:
+            messagebox.showinfo("Retomar", "Não há execução interrompida para retomar.")
+            return
 
+        controller = self.make_run_controller()
+        if controller is None:
+            return
+        try:
+            plan = self.build_plan(saved.get("next_line", 0), saved.get("end"),
+                                   key_space_for(controller))
+        except TemplateError as e:
+            messagebox.showwarning("Aviso", f"Modelo da linha inválido:\n{e}")
+            return
+        except ValueError as e:
+            messagebox.showwarning("Aviso", f"Espera inválida:\n{e}")
+            return
+        self.range_from.set(str(plan.start + 1))
+        self.range_to.set(str(plan.end))
+        self.launch(plan, controller, expected=saved.get("fingerprint", ""))
+
+    def services_ready(self):
+        """Área de transferência criada (start_services terminou sem erro)"""
+        if self.clipboard is None:
+            messagebox.showwarning("Aviso", "Área de transferência indisponível.\n"
+                                            "Veja o console para o erro ao iniciar.")
+            return False
+        return True
+
+    def launch(self, plan, controller, setup=None, expected=None):
+        """Agenda o worker para o plano já montado; False se não pôde iniciar
+
+        setup é uma combinação compilada enviada antes da primeira linha.
+        expected é o hash das boxes salvo ao retomar; o worker o confere
+        antes da primeira linha, porque ler arquivos grandes travaria o Tk.
+        """
+        if not self.services_ready():
+            return False
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            # Parado há pouco: dois workers dividiriam o mesmo stop_event
+            messagebox.showwarning("Aviso", "A execução anterior ainda está terminando.\n"
+                                            "Aguarde um instante e tente de novo.")
+            return False
+        if plan.start >= plan.end:
+            messagebox.showwarning("Aviso", "Não há linhas no intervalo escolhido!")
+            return False
+
+        if self.start_job is not None:
+            # Parado e iniciado de novo antes do worker começar
+            self.root.after_cancel(self.start_job)
+            old = self.run_controller
+            if old is not None and old is not self.controller and old is not controller:
+                old.close()
+        self.plan = plan
+        self.plan_expected = expected
+        self.plan_setup = setup
+        self.run_controller = controller
         self.stop_event.clear()
         self.running = True
-        self.status.set("🟢 INICIANDO... (2s para focar)")
 
-        self.root.after(2000, self._start_worker_thread)
+        if controller is self.controller:
+            self.status.set("🟢 INICIANDO... (2s para focar)")
+            self.start_job = self.root.after(FOCUS_DELAY_MS, self._start_worker_thread)
+        else:
+            # Envio direto à janela alvo: não há foco a esperar
+            self.status.set(f"🟢 INICIANDO... (alvo: {controller.title})")
+            self.start_job = self.root.after_idle(self._start_worker_thread)
+        return True
 
     def _start_worker_thread(self):
+        self.start_job = None
         if self.running:
             self.status.set("🟢 EXECUTANDO... (F12 para parar)")
-            self.worker_thread = threading.Thread(target=self.worker_loop, daemon=True)
+            plan = self.plan
+            self.metrics = RunMetrics()
+            self.progress = Progress(plan.start, plan.end, plan.total)
+            self.live_rate = self.start_rate(plan)
+            self.skip_note = ""
+            index_file = index_path(self.profiles.active) if self.skip_processed.get() else None
+            self.worker_thread = threading.Thread(
+                target=self.worker_loop, args=(plan, self.metrics, self.progress, self.live_rate,
+                                               self.dedupe_rows.get(), index_file,
+                                               self.plan_setup),
+                daemon=True)
             self.worker_thread.start()
+            self.poll_progress(0)
+
+    def poll_progress(self, tick):
+        """Amostra o progresso do worker em ritmo fixo (custo constante na UI)"""
+        progress = self.progress
+        if progress is None or not self.running:
+            return
+
+        line, done, rate, eta = progress.snapshot()
+        self.status.set(f"🔄 Linha {line+1}/{progress.total} | "
+                        f"{rate:.2f} linhas/s | restante {format_eta(eta)}{self.skip_note}")
+        for column in self.columns:
+            view = column.view
+            view.set_current(line if line < len(view.source) else None)
+
+        if tick % (METRICS_INTERVAL_MS // PROGRESS_INTERVAL_MS) == 0:
+            self.metrics_text.set(self.metrics.live_text())
+            if self.live_rate.auto:
+                self.update_speed_label()
+
+        self.root.after(PROGRESS_INTERVAL_MS, self.poll_progress, tick + 1)
 
     def stop_macro(self):
+        if self.queue_active:
+            # Também entre trabalhos, enquanto o próximo é preparado
+            self.queue_active = False
+            if not self.running:
+                self.status.set("🔴 FILA PARADA")
         if not self.running:
             return
             
@@ -552,67 +1948,113 @@ class AutoEsterApp:
         self.running = False
         self.status.set("🔴 PARADO (F11 para iniciar)")
 
-    def worker_loop(self):
-        """Loop principal com velocidade configurável"""
-        i = 0
-        max_lines = max(
-            len(self.lines_b1) if self.use_b1.get() else 0,
-            len(self.lines_b2) if self.use_b2.get() else 0,
-            len(self.lines_b3) if self.use_b3.get() else 0
-        )
+    def worker_loop(self, plan, metrics, progress, rate, dedupe=False, index_file=None,
+                    setup=None):
+        """Loop principal: executa apenas o RunPlan, sem ler o Tk
+
+        Com dedupe ou index_file, as linhas são conferidas antes (aqui,
+        fora do Tk) e as repetidas ou já enviadas são puladas. setup
+        (combinação da fila) é enviada antes da primeira linha.
+        """
+        stop_event = self.stop_event
+        done_lines = plan.end - plan.start
+        expected = self.plan_expected
+        # O hash é calculado abaixo, antes da primeira linha concluída
+        checkpoint = Checkpoint("", plan.start, plan.end)
+        index = None
+        rows = None
+
+        def on_done(i):
+            progress.on_done(i)
+            checkpoint.mark(i)
+            if index is not None and not rows.skip[i - rows.start]:
+                index.add(rows.hashes[i - rows.start])
+
+        controller = self.run_controller
+        engine = MacroEngine(controller, self.clipboard, stop_event,
+                             on_line=progress.on_line, on_done=on_done, metrics=metrics,
+                             rate=rate)
+        error = None
+        try:
+            self.skip_note = " | 🔎 conferindo boxes..."
+            checkpoint.fingerprint = plan_fingerprint(plan)
+            self.skip_note = ""
+            if expected is not None and checkpoint.fingerprint != expected:
+                self.root.after(0, lambda: messagebox.showwarning(
+                    "Retomar", "O conteúdo das boxes mudou desde a execução salva.\n"
+                               "Não é possível retomar com segurança."))
+                raise ValueError("o conteúdo das boxes mudou desde a execução salva")
+            if dedupe or index_file:
+                self.skip_note = " | 🔎 conferindo linhas..."
+                if index_file:
+                    index = ProcessedIndex(index_file)
+                rows = filter_rows(plan.steps, plan.start, plan.end, index, dedupe, stop_event)
+                if rows is None:
+                    raise InterruptedError
+                done_lines -= rows.duplicates + rows.known
+                self.skip_note = ""
+                if rows.duplicates or rows.known:
+                    self.skip_note = (f" | puladas: {rows.duplicates} repetidas, "
+                                      f"{rows.known} já enviadas")
+            if setup is not None and not stop_event.is_set():
+                press_combination(controller, setup, plan.timing)
+                time.sleep(plan.delay * plan.timing.after_key)
+            next_line = engine.run(plan, rows)
+        except InterruptedError:
+            next_line = plan.start
+        except Exception as e:
+            # Ex.: janela alvo fechada no meio da execução
+            print(f"Erro na execução: {e}")
+            error = e
+            stop_event.set()
+            next_line = checkpoint.next_line
+        finally:
+            checkpoint.flush()
+            if index is not None:
+                try:
+                    index.close()
+                except OSError as e:
+                    print(f"Erro ao gravar índice: {e}")
+            if controller is not self.controller:
+                controller.close()
+
+        report = ""
+        try:
+            report = metrics.export()
+        except OSError as e:
+            print(f"Erro ao gravar relatório: {e}")
+        else:
+            self.root.after(0, lambda: self.metrics_text.set(
+                f"{metrics.live_text()}\n📊 Relatório: {report}.json / .csv"))
 
-        delay = self.speed.get()
-
-        while i < max_lines:
-            if self.stop_event.is_set():
-                break
-
-            self.root.after(0, lambda: self.status.set(f"🔄 Linha {i+1}/{max_lines}"))
-
-            if self.use_b1.get() and i < len(self.lines_b1):
-                pyperclip.copy(self.lines_b1[i])
-                time.sleep(delay * 0.5)
-                paste_clipboard(self.controller)
-                time.sleep(delay * 0.8)
-                
-                if self.key_after_b1:
-                    press_combination(self.controller, self.key_after_b1)
-                    time.sleep(delay)
-
-            if self.use_b2.get() and i < len(self.lines_b2):
-                pyperclip.copy(self.lines_b2[i])
-                time.sleep(delay * 0.5)
-                paste_clipboard(self.controller)
-                time.sleep(delay * 0.8)
-                
-                if self.key_after_b2:
-                    press_combination(self.controller, self.key_after_b2)
-                    time.sleep(delay)
-
-            if self.use_b3.get() and i < len(self.lines_b3):
-                pyperclip.copy(self.lines_b3[i])
-                time.sleep(delay * 0.5)
-                paste_clipboard(self.controller)
-                time.sleep(delay * 0.8)
-                
-                if self.key_after_b3:
-                    press_combination(self.controller, self.key_after_b3)
-                    time.sleep(delay)
-
-            i += 1
-            time.sleep(delay * 1.5)
+        if next_line >= plan.end:
+            checkpoint.clear()
 
         self.running = False
+        if rate.auto:
+            self.root.after(0, self.save_tuned_rate, rate)
         
-        if not self.stop_event.is_set():
-            self.root.after(0, lambda: self.status.set(f"✅ CONCLUÍDO - {max_lines} linhas"))
+        if error is not None:
+            self.root.after(0, lambda: self.status.set(f"⚠️ ERRO - {error}"))
+            outcome = (FAILED, str(error))
+        elif not stop_event.is_set():
+            note = self.skip_note
+            self.root.after(0, lambda: self.status.set(
+                f"✅ CONCLUÍDO - {done_lines} linhas{note}"))
+            outcome = (DONE, f"{done_lines} linhas{note}")
         else:
             self.root.after(0, lambda: self.status.set("🔴 PARADO"))
+            outcome = (STOPPED, f"parado na linha {next_line + 1}")
+        self.root.after(0, self.on_run_finished, *outcome, report)
 
     def on_closing(self):
         """Limpeza ao fechar"""
         self.cancel_capture()
+        self.finish_recording(keep=False)
         self.stop_macro()
+        if self.autosave_job is not None:
+            self.autosave()
+        self.profiles.flush()
         if self.global_listener:
             self.global_listener.stop()
         self.root.destroy()
@@ -625,6 +2067,8 @@ class AutoEsterApp:
 def main():
     root = tk.Tk()
     app = AutoEsterApp(root)
+    # --medir-inicio: abre, mede até a janela aparecer e fecha (para comparar versões)
+    app.exit_after_startup = "--medir-inicio" in sys.argv[1:]
     root.mainloop()
 
 if __name__ == "__main__":
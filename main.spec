@@ -26,7 +26,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # UPX deixa o exe menor, mas descomprimir a cada abertura atrasa o início
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -0,0 +1,175 @@
+"""
+Auto Ester - Métricas de execução
+Tempos de cada etapa do macro (cópia, colagem, digitação, tecla após,
+espera por condição, macro gravado, pausa entre linhas) guardados em buffers circulares de tamanho fixo,
+com percentis ao vivo e relatório JSON/CSV no fim da execução.
+Relatórios de execuções paralelas (shards.py) são juntados por
+merge_reports, a partir das amostras gravadas por cada fragmento.
+"""
+
+import csv
+import json
+import os
+import time
+from array import array
+
+# Etapas medidas pelo MacroEngine
+STEPS = ("copia", "cola", "digita", "tecla_apos", "espera", "macro", "pausa_linha", "linha")
+
+RING_SIZE = 4096
+REPORTS_DIR = "relatorios"
+
+
+class RingBuffer:
+    """Últimas N amostras (segundos) de uma etapa, sem alocar por amostra."""
+
+    __slots__ = ("data", "size", "count", "total", "peak")
+
+    def __init__(self, size=RING_SIZE):
+        self.data = array("d", bytes(8 * size))
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self.peak = 0.0
+
+    def add(self, value):
+        self.data[self.count % self.size] = value
+        self.count += 1
+        self.total += value
+        if value > self.peak:
+            self.peak = value
+
+    def samples(self):
+        return sorted(self.data[:min(self.count, self.size)])
+
+
+def percentile(sorted_samples, q):
+    """Percentil q (0-100) de uma lista já ordenada."""
+    if not sorted_samples:
+        return 0.0
+    k = min(len(sorted_samples) - 1, int(round(q / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[k]
+
+
+def summarize_step(count, total, peak, samples):
+    """Resumo de uma etapa; samples em segundos, já ordenadas."""
+    return {
+        "count": count,
+        "mean_ms": total / count * 1000 if count else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "max_ms": peak * 1000,
+        "total_s": total,
+    }
+
+
+def write_report(summary, base):
+    """Grava o resumo em base.json e a tabela de etapas em base.csv."""
+    directory = os.path.dirname(base)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    with open(base + ".csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["etapa", "amostras", "media_ms", "p50_ms", "p95_ms",
+                         "max_ms", "total_s"])
+        for step, s in summary["steps"].items():
+            writer.writerow([step, s["count"], f"{s['mean_ms']:.3f}", f"{s['p50_ms']:.3f}",
+                             f"{s['p95_ms']:.3f}", f"{s['max_ms']:.3f}", f"{s['total_s']:.3f}"])
+    return base
+
+
+def merge_reports(reports, elapsed):
+    """Um resumo para vários relatórios gravados com samples=True.
+
+    elapsed é o tempo total da execução paralela (os fragmentos rodam ao
+    mesmo tempo, então os tempos deles não se somam). Os percentis usam
+    as últimas amostras de cada fragmento.
+    """
+    lines = sum(report.get("lines", 0) for report in reports)
+    steps = {}
+    for step in STEPS:
+        parts = [report["steps"][step] for report in reports if step in report.get("steps", {})]
+        if not parts:
+            continue
+        samples = sorted(ms / 1000 for part in parts for ms in part.get("samples_ms", ()))
+        steps[step] = summarize_step(sum(p["count"] for p in parts),
+                                     sum(p["total_s"] for p in parts),
+                                     max(p["max_ms"] for p in parts) / 1000, samples)
+    started = [report["started"] for report in reports if report.get("started")]
+    finished = [report["finished"] for report in reports if report.get("finished")]
+    return {
+        "started": min(started) if started else None,
+        "finished": max(finished) if finished else None,
+        "lines": lines,
+        "elapsed_s": elapsed,
+        "lines_per_sec": lines / elapsed if elapsed > 0 else 0.0,
+        "steps": steps,
+    }
+
+
+class RunMetrics:
+    """Coleta tempos por etapa e linhas concluídas de uma execução."""
+
+    def __init__(self, ring_size=RING_SIZE):
+        self.rings = {step: RingBuffer(ring_size) for step in STEPS}
+        self.lines = 0
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.finished = None
+        self.elapsed = 0.0
+
+    def record(self, step, seconds):
+        self.rings[step].add(seconds)
+
+    def line_done(self):
+        self.lines += 1
+
+    def finish(self):
+        self.finished = time.time()
+        self.elapsed = time.perf_counter() - self.t0
+
+    def lines_per_sec(self):
+        elapsed = self.elapsed if self.finished else time.perf_counter() - self.t0
+        return self.lines / elapsed if elapsed > 0 else 0.0
+
+    def step_summary(self, step, samples=False):
+        ring = self.rings[step]
+        ordered = ring.samples()
+        summary = summarize_step(ring.count, ring.total, ring.peak, ordered)
+        if samples:
+            summary["samples_ms"] = [round(value * 1000, 3) for value in ordered]
+        return summary
+
+    def summary(self, samples=False):
+        return {
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "finished": (time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.finished))
+                         if self.finished else None),
+            "lines": self.lines,
+            "elapsed_s": self.elapsed if self.finished else time.perf_counter() - self.t0,
+            "lines_per_sec": self.lines_per_sec(),
+            "steps": {step: self.step_summary(step, samples) for step in STEPS
+                      if self.rings[step].count},
+        }
+
+    def live_text(self):
+        """Resumo curto para a interface."""
+        parts = [f"⏱️ {self.lines_per_sec():.2f} linhas/s"]
+        for step in STEPS:
+            if step == "linha" or not self.rings[step].count:
+                continue
+            s = self.step_summary(step)
+            parts.append(f"{step} {s['p50_ms']:.0f}/{s['p95_ms']:.0f}ms")
+        return " | ".join(parts) + "  (p50/p95)"
+
+    def export(self, directory=REPORTS_DIR, name=None, samples=False):
+        """Grava o relatório em JSON e CSV; retorna o caminho base.
+
+        Com samples, o JSON leva também as amostras (para merge_reports).
+        """
+        if name is None:
+            name = time.strftime("execucao_%Y%m%d_%H%M%S", time.localtime(self.started))
+        return write_report(self.summary(samples), os.path.join(directory, name))
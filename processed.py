@@ -0,0 +1,215 @@
+"""
+Auto Ester - Linhas já enviadas
+Antes da execução, cada linha (os valores de todas as boxes juntos) é
+normalizada e vira um hash de 64 bits. Linhas repetidas na própria lista
+e linhas que o perfil já enviou em execuções anteriores são puladas.
+
+O índice de cada perfil fica em DATA_DIR:
+
+    <perfil>.indice       hashes ordenados (lidos pelo mmap, busca binária)
+    <perfil>.indice.log   hashes novos, acrescentados a cada linha enviada
+
+Consultar não carrega o índice para a memória, então milhões de linhas
+não pesam na abertura. O log é juntado ao arquivo ordenado (de forma
+atômica) quando cresce além de COMPACT_ENTRIES ou ao fechar o índice.
+"""
+
+import hashlib
+import heapq
+import mmap
+import os
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+from profiles import DATA_DIR, data_path
+
+INDEX_SUFFIX = ".indice"
+LOG_SUFFIX = ".indice.log"
+
+# Cabeçalho do arquivo ordenado; a ordem dos bytes é a da máquina
+INDEX_MAGIC = b"AEIDX1" + (b"L\n" if sys.byteorder == "little" else b"B\n")
+HASH_SIZE = 8
+
+# Hashes no log antes de juntar ao arquivo ordenado
+COMPACT_ENTRIES = 1 << 16
+
+# Separador entre os valores das boxes dentro de uma linha
+CELL_SEPARATOR = "\x1f"
+
+# skip[k] = 1 se a linha start + k não deve ser enviada; hashes[k] é o
+# hash dela; duplicates e known contam as repetidas e as já enviadas
+RowFilter = namedtuple("RowFilter", ["start", "skip", "hashes", "duplicates", "known"])
+
+
+def normalize_cell(text):
+    """Compara valores sem diferenciar espaços extras, maiúsculas ou forma Unicode."""
+    return unicodedata.normalize("NFC", " ".join(text.split())).casefold()
+
+
+def row_hash(cells):
+    """Hash de 64 bits dos valores já normalizados de uma linha."""
+    data = CELL_SEPARATOR.join(cells).encode("utf-8", errors="replace")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=HASH_SIZE).digest(), "little")
+
+
+def index_path(profile, directory=DATA_DIR):
+    return data_path(profile, directory, suffix=INDEX_SUFFIX)
+
+
+class ProcessedIndex:
+    """Conjunto persistente de hashes de linhas enviadas por um perfil.
+
+    Usado por uma thread só (a do worker). add() grava o hash no log na
+    hora, para que uma execução interrompida não repita o que já foi.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.log_path = path[:-len(INDEX_SUFFIX)] + LOG_SUFFIX
+        self.file = None
+        self.mm = None
+        self.views = []
+        self.sorted = ()
+        self.recent = set()
+        self._open_sorted()
+
+        try:
+            with open(self.log_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        # Um registro pela metade (queda no meio da gravação) é descartado
+        data = data[:len(data) - len(data) % HASH_SIZE]
+        self.recent.update(array("Q", data))
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.log = open(self.log_path, "ab")
+        self.log.truncate(len(data))
+
+    def _open_sorted(self):
+        self._close_sorted()
+        try:
+            self.file = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        size = os.fstat(self.file.fileno()).st_size
+        header = self.file.read(len(INDEX_MAGIC))
+        if header != INDEX_MAGIC or (size - len(header)) % HASH_SIZE:
+            self.file.close()
+            self.file = None
+            raise ValueError(f"índice ilegível: {self.path}")
+        if size > len(header):
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            whole = memoryview(self.mm)
+            body = whole[len(header):]
+            self.sorted = body.cast("Q")
+            # O mmap só fecha depois de soltar todas as visões
+            self.views = [self.sorted, body, whole]
+
+    def _close_sorted(self):
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.sorted = ()
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __len__(self):
+        return len(self.sorted) + len(self.recent)
+
+    def __contains__(self, value):
+        if value in self.recent:
+            return True
+        values = self.sorted
+        k = bisect_left(values, value)
+        return k < len(values) and values[k] == value
+
+    def add(self, value):
+        if value in self:
+            return
+        self.recent.add(value)
+        self.log.write(value.to_bytes(HASH_SIZE, sys.byteorder))
+        self.log.flush()
+        if len(self.recent) >= COMPACT_ENTRIES:
+            self.compact()
+
+    def compact(self):
+        """Junta o log ao arquivo ordenado (arquivo temporário + os.replace)."""
+        if not self.recent:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(INDEX_MAGIC)
+            chunk = array("Q")
+            for value in heapq.merge(self.sorted, sorted(self.recent)):
+                chunk.append(value)
+                if len(chunk) >= COMPACT_ENTRIES:
+                    chunk.tofile(f)
+                    del chunk[:]
+            chunk.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._close_sorted()
+        os.replace(tmp, self.path)
+        self.log.truncate(0)
+        self.log.seek(0)
+        self.recent.clear()
+        self._open_sorted()
+
+    def close(self):
+        try:
+            self.compact()
+        finally:
+            self.log.close()
+            self._close_sorted()
+
+
+def clear_index(profile, directory=DATA_DIR):
+    """Esquece as linhas enviadas pelo perfil."""
+    path = index_path(profile, directory)
+    for name in (path, path[:-len(INDEX_SUFFIX)] + LOG_SUFFIX):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+
+
+def filter_rows(steps, start, end, index=None, dedupe=True, stop_event=None):
+    """Marca as linhas de [start, end) que não devem ser enviadas.
+
+    Com dedupe, só a primeira de linhas iguais (após normalizar) é
+    mantida; com index, as que o perfil já enviou são puladas. Devolve
+    None se stop_event for acionado no meio.
+    """
+    count = max(0, end - start)
+    skip = bytearray(count)
+    hashes = array("Q", bytes(HASH_SIZE * count))
+    seen = set()
+    duplicates = known = 0
+    columns = [step.lines for step in steps]
+
+    for k in range(count):
+        if k % 4096 == 0 and stop_event is not None and stop_event.is_set():
+            return None
+        i = start + k
+        value = row_hash([normalize_cell(lines[i]) if i < len(lines) else ""
+                          for lines in columns])
+        hashes[k] = value
+        if index is not None and value in index:
+            skip[k] = 1
+            known += 1
+        elif dedupe:
+            if value in seen:
+                skip[k] = 1
+                duplicates += 1
+            else:
+                seen.add(value)
+    return RowFilter(start, skip, hashes, duplicates, known)
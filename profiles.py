@@ -0,0 +1,266 @@
+"""
+Auto Ester - Perfis salvos
+A configuração guarda só ajustes pequenos (velocidade, teclas, colunas
+sem o texto) de cada perfil nomeado e é lida de imediato. O texto das
+boxes de cada perfil fica num arquivo próprio em DATA_DIR, lido em
+segundo plano depois que a janela aparece.
+
+    auto_ester_config.json:
+        {"version": "3.1", "active_profile": "padrão", "dark_mode": false,
+         "profiles": {"padrão": {"speed": 0.1, "keys": {...}, "columns": [...]}}}
+    auto_ester_dados/padrão.json:
+        {"columns": ["linha 1\\nlinha 2", "", ...]}
+
+Toda gravação é atômica (arquivo temporário + os.replace) e feita por
+uma thread própria, que grava só a versão mais recente de cada arquivo.
+Configurações antigas (ajustes no nível de cima, texto embutido nas
+colunas) viram o perfil DEFAULT_PROFILE_NAME.
+"""
+
+import copy
+import json
+import os
+import re
+import threading
+
+from checkpoint import write_json_atomic
+from columns import columns_from_config
+
+CONFIG_FILE = "auto_ester_config.json"
+DATA_DIR = "auto_ester_dados"
+DEFAULT_PROFILE_NAME = "padrão"
+CONFIG_VERSION = "3.1"
+
+# Espera após a última alteração antes de gravar (ms)
+AUTOSAVE_DELAY_MS = 1500
+
+# Chaves que continuam no nível de cima da configuração
+GLOBAL_KEYS = ("version", "active_profile", "dark_mode", "profiles")
+
+
+def read_json(path):
+    """JSON do arquivo; None se não existir ou estiver ilegível."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_store(path=CONFIG_FILE):
+    """Configuração com perfis; converte o formato antigo (um perfil só)."""
+    data = read_json(path)
+    if not isinstance(data, dict):
+        data = {}
+    if isinstance(data.get("profiles"), dict) and data["profiles"]:
+        store = dict(data)
+    else:
+        settings = {k: v for k, v in data.items() if k not in GLOBAL_KEYS}
+        store = {"profiles": {DEFAULT_PROFILE_NAME: settings},
+                 "active_profile": DEFAULT_PROFILE_NAME,
+                 "dark_mode": data.get("dark_mode", False)}
+    store["version"] = CONFIG_VERSION
+    if store.get("active_profile") not in store["profiles"]:
+        store["active_profile"] = next(iter(store["profiles"]))
+    return store
+
+
+def profile_settings(store, name=None):
+    """Ajustes do perfil (o ativo se name for None); {} se não existir."""
+    name = name or store.get("active_profile")
+    return dict(store["profiles"].get(name, {}))
+
+
+def update_profile(path, name, values):
+    """Grava values nos ajustes do perfil name, relendo a configuração do disco.
+
+    Para quem não mantém um ProfileStore aberto (cli.py). Retorna False
+    se o perfil não existir.
+    """
+    store = load_store(path)
+    if name not in store["profiles"]:
+        return False
+    store["profiles"][name].update(values)
+    write_json_atomic(path, store, indent=2)
+    return True
+
+
+def data_path(name, directory=DATA_DIR, suffix=".json"):
+    """Arquivo com o texto das boxes do perfil (nome seguro para o sistema).
+
+    Outros arquivos do perfil (como o índice de processed.py) usam o
+    mesmo nome com outro suffix.
+    """
+    safe = re.sub(r"[^\w\- ]", "_", name).strip() or "_"
+    return os.path.join(directory, f"{safe}{suffix}")
+
+
+def load_box_data(name, settings=None, directory=DATA_DIR):
+    """Texto de cada box do perfil.
+
+    Sem arquivo de dados (configuração antiga), usa o texto que estava
+    embutido nas colunas dos ajustes.
+    """
+    data = read_json(data_path(name, directory))
+    if isinstance(data, dict) and isinstance(data.get("columns"), list):
+        return [str(text or "") for text in data["columns"]]
+    return [column["content"] for column in columns_from_config(settings or {})]
+
+
+class BackgroundWriter:
+    """Grava arquivos JSON numa thread própria, sem travar a interface.
+
+    submit() troca o conteúdo pendente do arquivo; se vários pedidos
+    chegarem antes da gravação, só o último vai para o disco. As funções
+    em `produce` são chamadas na thread de gravação, para que montar
+    textos grandes também não pese no Tk.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.cond = threading.Condition()
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, path, produce, indent=None):
+        with self.cond:
+            self.pending[path] = (produce, indent)
+            self.cond.notify()
+
+    def remove(self, path):
+        """Apaga o arquivo na thread de gravação, depois de qualquer gravação já começada.
+
+        Substitui a gravação pendente do mesmo arquivo, que não pode mais
+        recriá-lo.
+        """
+        self.submit(path, None)
+
+    def flush(self, timeout=5.0):
+        """Espera as gravações pendentes (ao fechar a janela)."""
+        with self.cond:
+            self.cond.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending)
+                path, (produce, indent) = self.pending.popitem()
+                self.busy = True
+            try:
+                if produce is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                write_json_atomic(path, produce(), indent)
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Erro ao gravar {path}: {e}")
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self.cond.notify_all()
+
+
+class ProfileStore:
+    """Perfis nomeados com gravação adiada e atômica.
+
+    Os métodos são chamados na thread do Tk; a gravação em si fica com o
+    BackgroundWriter.
+    """
+
+    def __init__(self, path=CONFIG_FILE, directory=DATA_DIR):
+        self.path = path
+        self.directory = directory
+        self.store = load_store(path)
+        self.migrate_data()
+        self.writer = BackgroundWriter()
+
+    def reload(self):
+        """Relê a configuração do disco (descarta ajustes não gravados)."""
+        self.flush()
+        self.store = load_store(self.path)
+        self.migrate_data()
+
+    def migrate_data(self):
+        """Grava o texto ainda embutido nos ajustes (configuração antiga) no arquivo de dados.
+
+        Feito uma vez, antes de qualquer gravação dos ajustes: eles são
+        regravados sem o texto, que só sobreviveria no arquivo de dados.
+        """
+        for name, settings in self.store["profiles"].items():
+            path = data_path(name, self.directory)
+            if os.path.exists(path):
+                continue
+            contents = [column["content"] for column in columns_from_config(settings)]
+            if not any(text.strip() for text in contents):
+                continue
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                write_json_atomic(path, {"columns": contents})
+            except OSError as e:
+                print(f"Erro ao gravar {path}: {e}")
+
+    @property
+    def active(self):
+        return self.store["active_profile"]
+
+    def names(self):
+        return sorted(self.store["profiles"])
+
+    def clash(self, name):
+        """Perfil existente cujos arquivos teriam o mesmo nome que os de name; None se não houver.
+
+        data_path troca caracteres especiais por "_" (ex.: "a/b" e "a_b"),
+        e no Windows maiúsculas e minúsculas dão no mesmo arquivo.
+        """
+        path = os.path.normcase(data_path(name, self.directory)).casefold()
+        for other in self.store["profiles"]:
+            if os.path.normcase(data_path(other, self.directory)).casefold() == path:
+                return other
+        return None
+
+    def settings(self, name=None):
+        return profile_settings(self.store, name)
+
+    def set_active(self, name, settings=None):
+        """Passa a usar o perfil name (criado com settings se não existir)."""
+        self.store["profiles"].setdefault(name, copy.deepcopy(settings or {}))
+        self.store["active_profile"] = name
+
+    def remove(self, name):
+        """Apaga o perfil e o texto das boxes dele; não apaga o último.
+
+        O índice de linhas enviadas (processed.clear_index) fica a cargo
+        de quem chama.
+        """
+        profiles = self.store["profiles"]
+        if name not in profiles or len(profiles) == 1:
+            return False
+        del profiles[name]
+        if self.active == name:
+            self.store["active_profile"] = next(iter(profiles))
+        # Pela thread de gravação, para que um salvamento pendente não o recrie
+        self.writer.remove(data_path(name, self.directory))
+        return True
+
+    def load_data(self, name=None):
+        name = name or self.active
+        return load_box_data(name, self.store["profiles"].get(name), self.directory)
+
+    def save_settings(self, settings, **global_values):
+        """Atualiza os ajustes do perfil ativo e agenda a gravação."""
+        self.store["profiles"][self.active] = settings
+        self.store.update(global_values)
+        snapshot = copy.deepcopy(self.store)
+        self.writer.submit(self.path, lambda: snapshot, indent=2)
+
+    def save_data(self, snapshots, name=None):
+        """Agenda a gravação do texto das boxes (tuplas de linhas por box)."""
+        path = data_path(name or self.active, self.directory)
+        self.writer.submit(path, lambda: {"columns": ["\n".join(lines) for lines in snapshots]})
+
+    def flush(self):
+        self.writer.flush()
@@ -0,0 +1,156 @@
+"""
+Auto Ester - Macros gravados
+Grava uma sequência de teclas com o instante de cada uma, pelo mesmo
+listener do pynput das teclas globais (HotkeyMatcher.recorder), e guarda
+no perfil como um macro com nome, usado no modelo da linha:
+
+    {1}{TAB}{MACRO novo_registro}{2}{ENTER}
+    {MACRO novo_registro 0}       pausas removidas nesta chamada
+
+    "macros": {"novo_registro": {"events": [[0.0, "p", "ctrl"], [0.21, "p", "n"],
+                                            [0.3, "r", "n"], [0.34, "r", "ctrl"]],
+                                 "factor": 0.1, "max_gap": 1.0}}
+
+Cada evento é (segundos desde o início, "p" pressiona ou "r" solta, nome
+da tecla). Na reprodução cada pausa gravada é multiplicada por factor
+(1 = como gravado, 0.1 = dez vezes mais rápido, 0 = sem pausas) e
+limitada a max_gap segundos; o motor nunca usa menos que a pausa de
+"segurar tecla" do ritmo, então 0 é a velocidade das combinações.
+"""
+
+import time
+
+from hotkeys import key_name, normalize_name
+
+PRESS = "p"
+RELEASE = "r"
+
+DEFAULT_FACTOR = 0.1
+DEFAULT_MAX_GAP = 1.0
+MAX_FACTOR = 1.0
+MAX_GAP_LIMIT = 60.0
+
+# Eventos por macro (uma tecla segurada repete o pressionar sozinha)
+MAX_EVENTS = 5000
+
+
+def record_name(key):
+    """Nome gravado da tecla: o caractere como digitado ou o nome normalizado."""
+    char = getattr(key, "char", None)
+    if char and len(char) == 1 and ord(char) >= 32:
+        return char
+    return key_name(key)
+
+
+def valid_macro_name(name):
+    """Nomes usados em {MACRO nome}: sem espaços nem chaves."""
+    return bool(name) and not any(ch.isspace() or ch in "{}" for ch in name)
+
+
+def normalize_macro(data):
+    """Completa e valida um macro lido do perfil; None se inválido."""
+    if not isinstance(data, dict) or not isinstance(data.get("events"), list):
+        return None
+    events = []
+    for event in data["events"][:MAX_EVENTS]:
+        try:
+            t, action, name = event
+            t = float(t)
+        except (TypeError, ValueError):
+            return None
+        if action not in (PRESS, RELEASE) or not isinstance(name, str) or not name:
+            return None
+        events.append([max(0.0, t), action, name])
+    events.sort(key=lambda event: event[0])
+    try:
+        factor = min(max(float(data.get("factor", DEFAULT_FACTOR)), 0.0), MAX_FACTOR)
+        max_gap = min(max(float(data.get("max_gap", DEFAULT_MAX_GAP)), 0.0), MAX_GAP_LIMIT)
+    except (TypeError, ValueError):
+        factor, max_gap = DEFAULT_FACTOR, DEFAULT_MAX_GAP
+    return {"events": events, "factor": factor, "max_gap": max_gap}
+
+
+def normalize_macros(data):
+    """Macros válidos do perfil, {nome: macro}; os inválidos são ignorados."""
+    if not isinstance(data, dict):
+        return {}
+    macros = {}
+    for name, macro in data.items():
+        macro = normalize_macro(macro)
+        if macro is not None and valid_macro_name(str(name)):
+            macros[str(name)] = macro
+    return macros
+
+
+def replay_steps(macro, factor=None):
+    """(pausa, pressiona, tecla) de cada evento, com as pausas comprimidas.
+
+    factor substitui o do macro (ex.: {MACRO nome 0}). Teclas soltas sem
+    terem sido pressionadas na gravação (já estavam descidas no início)
+    ficam de fora, junto com a pausa até elas. A soltura usa o nome do
+    pressionar ("A" com Shift pode ser solta como "a").
+    """
+    factor = macro["factor"] if factor is None else factor
+    max_gap = macro["max_gap"]
+    steps = []
+    pressed = {}
+    previous = None
+    for t, action, name in macro["events"]:
+        if action == PRESS:
+            pressed[normalize_name(name)] = name
+        elif normalize_name(name) in pressed:
+            name = pressed.pop(normalize_name(name))
+        else:
+            continue
+        gap = 0.0 if previous is None else min((t - previous) * factor, max_gap)
+        previous = t
+        steps.append((round(gap, 4), action == PRESS, name))
+    return tuple(steps)
+
+
+def describe_macro(macro):
+    """Resumo para a lista da interface: teclas e duração gravada/reproduzida."""
+    events = macro["events"]
+    presses = sum(1 for _, action, _ in events if action == PRESS)
+    recorded = events[-1][0] if events else 0.0
+    replayed = sum(gap for gap, _, _ in replay_steps(macro))
+    return f"{presses} teclas, {recorded:.1f}s gravado → {replayed:.2f}s"
+
+
+class MacroRecorder:
+    """Registra as teclas recebidas pelo listener global.
+
+    on_press/on_release são chamados na thread do pynput (só acrescentam
+    à lista); stop() é chamado na thread do Tk e devolve os eventos.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.events = []
+
+    def __len__(self):
+        return len(self.events)
+
+    def on_press(self, key):
+        if len(self.events) < MAX_EVENTS:
+            self.events.append((self.clock() - self.started, PRESS, record_name(key)))
+
+    def on_release(self, key):
+        if len(self.events) < MAX_EVENTS:
+            self.events.append((self.clock() - self.started, RELEASE, record_name(key)))
+
+    def stop(self, trim=None):
+        """Eventos gravados, começando em 0.
+
+        trim (conjunto de nomes, ex.: a tecla global de parar) remove do
+        fim as teclas usadas para encerrar a gravação.
+        """
+        events = list(self.events)
+        if trim:
+            while events and normalize_name(events[-1][2]) in trim:
+                events.pop()
+        if not events:
+            return []
+        first = events[0][0]
+        return [[round(t - first, 4), action, name] for t, action, name in events]
@@ -0,0 +1,294 @@
+"""
+Auto Ester - Execução paralela (Linux)
+O coordenador divide as linhas em fragmentos contíguos e roda cada um
+num processo cli.py próprio, com o seu display X (ex.: um Xvfb) e a sua
+instância do programa alvo. As boxes, o modelo e a configuração são os
+mesmos de uma execução normal; só --inicio/--fim mudam por fragmento.
+
+    python cli.py nomes.txt codigos.txt --paralelo 4 --xvfb --app "gedit" --janela gedit
+    python cli.py nomes.txt codigos.txt --paralelo 2 --displays :11,:12 --janela alvo
+
+Cada fragmento informa o progresso em linhas JSON (--progresso-json),
+grava o próprio arquivo de progresso (retomável com --retomar) e um
+relatório com amostras; no fim eles viram um relatório só. Um fragmento
+concluído mantém o arquivo (na linha final) até todos terminarem; ao
+retomar, fragmento sem arquivo é refeito do começo do intervalo.
+"""
+
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from engine import format_eta
+from metrics import REPORTS_DIR, merge_reports, write_report
+
+# Primeiro número de display tentado para os Xvfb iniciados aqui
+XVFB_BASE = 90
+XVFB_SCREEN = "1280x1024x24"
+
+DISPLAY_TIMEOUT = 10.0
+APP_TIMEOUT = 20.0
+STOP_TIMEOUT = 10.0
+
+# Intervalo entre atualizações da linha de progresso somada (segundos)
+PRINT_INTERVAL = 0.5
+
+
+def split_range(start, end, count):
+    """[start, end) em até count fragmentos contíguos de tamanhos parecidos."""
+    total = max(0, end - start)
+    count = min(count, total)
+    return [(start + total * k // count, start + total * (k + 1) // count)
+            for k in range(count)]
+
+
+def display_socket(name):
+    return f"/tmp/.X11-unix/X{name.lstrip(':').split('.')[0]}"
+
+
+def free_display(taken=(), base=XVFB_BASE):
+    """Primeiro :N sem servidor X (nem trava de um que caiu)."""
+    n = base
+    while (f":{n}" in taken or os.path.exists(display_socket(f":{n}"))
+           or os.path.exists(f"/tmp/.X{n}-lock")):
+        n += 1
+    return f":{n}"
+
+
+def start_xvfb(name):
+    """Inicia um Xvfb e espera o socket aparecer; RuntimeError se não subir."""
+    try:
+        proc = subprocess.Popen(["Xvfb", name, "-screen", "0", XVFB_SCREEN, "-nolisten", "tcp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                start_new_session=True)
+    except OSError as e:
+        raise RuntimeError(f"não foi possível iniciar o Xvfb: {e}")
+    deadline = time.monotonic() + DISPLAY_TIMEOUT
+    while not os.path.exists(display_socket(name)):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            raise RuntimeError(f"o Xvfb {name} não iniciou")
+        time.sleep(0.05)
+    return proc
+
+
+def wait_for_window(display, target, timeout=APP_TIMEOUT):
+    """Espera a janela alvo aparecer no display (o programa acabou de abrir)."""
+    from x11target import open_display, find_window, TargetWindowError
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = open_display(display)
+            try:
+                return find_window(conn, target)
+            finally:
+                conn.close()
+        except TargetWindowError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.25)
+
+
+class Shard:
+    """Um fragmento: intervalo de linhas, display e o processo que o executa."""
+
+    def __init__(self, number, start, end, display):
+        self.number = number
+        self.start = start
+        self.end = end
+        self.display = display
+        self.proc = None
+        self.reader = None
+        self.done = 0
+        self.result = None
+        self.log = deque(maxlen=5)
+
+    def launch(self, command):
+        env = dict(os.environ)
+        if self.display:
+            env["DISPLAY"] = self.display
+        # Sessão própria: o Ctrl+C do terminal chega só ao coordenador
+        self.proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                     text=True, encoding="utf-8", errors="replace", env=env,
+                                     start_new_session=True)
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        for raw in self.proc.stdout:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line) if line.startswith("{") else None
+            except ValueError:
+                data = None
+            if data is None:
+                self.log.append(line)
+            elif "fim" in data:
+                self.result = data
+                self.done = data.get("feitas", self.done)
+            else:
+                self.done = data.get("feitas", self.done)
+
+    def running(self):
+        return self.proc is not None and self.proc.poll() is None
+
+
+def shard_progress_path(path, number):
+    base, ext = os.path.splitext(path)
+    return f"{base}.frag{number}{ext}"
+
+
+def stop_processes(procs, sig=signal.SIGINT):
+    """Pede para parar (o cli.py grava o progresso no Ctrl+C) e mata quem não sair."""
+    for proc in procs:
+        if proc.poll() is None:
+            proc.send_signal(sig)
+    deadline = time.monotonic() + STOP_TIMEOUT
+    for proc in procs:
+        try:
+            proc.wait(max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def run_coordinator(args, argv, plan, script):
+    """Executa o plano em args.paralelo processos e junta progresso e relatórios."""
+    ranges = split_range(plan.start, plan.end, args.paralelo)
+    if not ranges:
+        print("Não há linhas no intervalo escolhido!", file=sys.stderr)
+        return 1
+
+    if args.displays:
+        displays = [name.strip() for name in args.displays.split(",") if name.strip()]
+        if len(displays) < len(ranges):
+            print(f"Erro: {len(ranges)} fragmentos e só {len(displays)} displays",
+                  file=sys.stderr)
+            return 2
+    elif args.xvfb:
+        displays = []
+        for _ in ranges:
+            displays.append(free_display(displays))
+    elif args.simular:
+        displays = [None] * len(ranges)
+    else:
+        print("Erro: com --paralelo, use --displays ou --xvfb (um display por fragmento)",
+              file=sys.stderr)
+        return 2
+
+    stamp = time.strftime("paralelo_%Y%m%d_%H%M%S")
+    report_root = os.path.join(args.relatorio or REPORTS_DIR, stamp)
+    shards = [Shard(n, start, end, displays[n - 1])
+              for n, (start, end) in enumerate(ranges, start=1)]
+
+    helpers = []
+    started = time.perf_counter()
+    try:
+        for shard in shards:
+            if args.xvfb:
+                helpers.append(start_xvfb(shard.display))
+            if args.app:
+                env = dict(os.environ, DISPLAY=shard.display or os.environ.get("DISPLAY", ""))
+                helpers.append(subprocess.Popen(shlex.split(args.app), env=env,
+                                                stdout=subprocess.DEVNULL,
+                                                stderr=subprocess.DEVNULL,
+                                                start_new_session=True))
+            if args.janela and not args.simular and (args.app or args.xvfb):
+                wait_for_window(shard.display, args.janela)
+
+        started = time.perf_counter()
+        for shard in shards:
+            progress_path = shard_progress_path(args.progresso, shard.number)
+            shard_argv = argv
+            if args.retomar and not os.path.exists(progress_path):
+                # Parado antes de concluir a primeira linha: refaz o intervalo todo
+                print(f"Fragmento {shard.number}: sem progresso salvo, começando do início")
+                shard_argv = [arg for arg in argv if arg != "--retomar"]
+            shard.launch([sys.executable, script, *shard_argv,
+                          "--paralelo", "1", "--inicio", str(shard.start + 1),
+                          "--fim", str(shard.end), "--progresso", progress_path,
+                          "--progresso-json",
+                          "--relatorio", os.path.join(report_root, f"frag{shard.number}")])
+            where = shard.display or "display atual"
+            print(f"Fragmento {shard.number}: linhas {shard.start + 1}-{shard.end} ({where})")
+
+        total = sum(shard.end - shard.start for shard in shards if shard.proc)
+        while any(shard.running() for shard in shards):
+            time.sleep(PRINT_INTERVAL)
+            done = sum(shard.done for shard in shards)
+            elapsed = time.perf_counter() - started
+            rate = done / elapsed if elapsed > 0 else 0.0
+            eta = (total - done) / rate if rate > 0 else None
+            print(f"\r{len(shards)} fragmentos | {done}/{total} linhas | {rate:.2f} linhas/s | "
+                  f"restante {format_eta(eta)}", end="", flush=True)
+    except KeyboardInterrupt:
+        stop_processes([shard.proc for shard in shards if shard.proc])
+        print("\nInterrompido. Use --retomar (com o mesmo --paralelo) para continuar.")
+        return 130
+    except Exception as e:
+        # Xvfb ou programa alvo que não subiu
+        stop_processes([shard.proc for shard in shards if shard.proc])
+        print(f"\nErro: {e}", file=sys.stderr)
+        return 2
+    finally:
+        stop_processes(list(reversed(helpers)), signal.SIGTERM)
+
+    elapsed = time.perf_counter() - started
+    for shard in shards:
+        if shard.proc:
+            shard.proc.wait()
+            # A última linha (com o relatório) pode ainda estar no pipe
+            shard.reader.join()
+    code = summarize(shards, elapsed, report_root)
+    if code == 0 and not args.simular:
+        # Tudo concluído: não há o que retomar (a simulação não grava progresso)
+        for shard in shards:
+            try:
+                os.remove(shard_progress_path(args.progresso, shard.number))
+            except OSError:
+                pass
+    return code
+
+
+def summarize(shards, elapsed, report_root):
+    """Mostra o resultado de cada fragmento e grava o relatório somado."""
+    print()
+    reports = []
+    fragments = []
+    failed = False
+    for shard in shards:
+        if shard.proc is None:
+            continue
+        code = shard.proc.returncode
+        report = (shard.result or {}).get("relatorio")
+        if report:
+            try:
+                with open(report + ".json", "r", encoding="utf-8") as f:
+                    reports.append(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Fragmento {shard.number}: relatório ilegível ({e})", file=sys.stderr)
+        if code != 0:
+            failed = True
+            detail = shard.log[-1] if shard.log else f"saída {code}"
+            print(f"Fragmento {shard.number}: falhou - {detail}", file=sys.stderr)
+        fragments.append({"fragmento": shard.number, "display": shard.display,
+                          "inicio": shard.start + 1, "fim": shard.end, "linhas": shard.done,
+                          "saida": code, "relatorio": report})
+
+    summary = merge_reports(reports, elapsed)
+    summary["fragments"] = fragments
+    base = write_report(summary, os.path.join(report_root, "total"))
+    done = sum(fragment["linhas"] for fragment in fragments)
+    print(f"Concluído: {done} linhas em {elapsed:.2f}s com {len(fragments)} fragmentos "
+          f"({summary['lines_per_sec']:.2f} linhas/s)")
+    print(f"Relatório: {base}.json / .csv")
+    return 1 if failed else 0
@@ -0,0 +1,344 @@
+"""
+Auto Ester - Fontes de linhas
+FileLines indexa um arquivo por offsets de bytes sobre um mmap e só
+decodifica a linha quando o worker pede, sem carregar o arquivo na
+memória nem no Tk. CsvTable faz o mesmo com as linhas de uma planilha
+CSV/TSV, e cada CsvColumn é uma coluna dela usada como box.
+"""
+
+import codecs
+import csv
+import io
+import mmap
+import os
+from array import array
+
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# Encoding usado quando o arquivo não é UTF-8 válido (padrão do Excel no Windows)
+FALLBACK_ENCODING = "cp1252"
+CSV_DELIMITERS = ",;\t|"
+SNIFF_BYTES = 64 * 1024
+DECODE_CHUNK = 1024 * 1024
+
+
+class FileLines:
+    """Sequência somente leitura das linhas não vazias de um arquivo."""
+
+    def __init__(self, path, encoding="utf-8", keep_blank=False):
+        self.path = os.path.abspath(path)
+        self.encoding = encoding
+        self.keep_blank = keep_blank
+        self.starts = array("q")
+        self.ends = array("q")
+        self.file = open(self.path, "rb")
+        self.mm = None
+
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mtime = os.fstat(self.file.fileno()).st_mtime
+        if self.size:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._build_index()
+
+    def _build_index(self):
+        mm = self.mm
+        size = self.size
+        starts = self.starts
+        ends = self.ends
+        keep_blank = self.keep_blank
+
+        pos = 3 if mm[:3] == UTF8_BOM else 0
+        while pos < size:
+            nl = mm.find(b"\n", pos)
+            if nl == -1:
+                nl = size
+            end = nl
+            if end > pos and mm[end - 1] == 0x0D:
+                end -= 1
+            if keep_blank or mm[pos:end].strip():
+                starts.append(pos)
+                ends.append(end)
+            pos = nl + 1
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self.mm[self.starts[i]:self.ends[i]].decode(self.encoding, errors="replace")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.file.close()
+
+
+def detect_encoding(mm):
+    """'utf-8' se todo o arquivo decodifica como UTF-8, senão FALLBACK_ENCODING.
+
+    Decodifica em blocos, sem montar o texto inteiro na memória.
+    """
+    if mm[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        raise ValueError("arquivo em UTF-16; salve a planilha como CSV UTF-8")
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for pos in range(0, len(mm), DECODE_CHUNK):
+            decoder.decode(mm[pos:pos + DECODE_CHUNK])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def detect_delimiter(sample, path=""):
+    """Separador mais provável a partir do início do arquivo."""
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        pass
+    # O Sniffer desiste com campos entre aspas quebrados em linhas;
+    # o separador mais frequente na primeira linha resolve quase sempre
+    first = sample.split("\n", 1)[0]
+    counts = [(first.count(d), d) for d in CSV_DELIMITERS]
+    count, delimiter = max(counts)
+    if count:
+        return delimiter
+    return "\t" if path.lower().endswith(".tsv") else ","
+
+
+def ends_quoted(line, delimiter, quoted=False):
+    """Se a linha física termina dentro de um campo entre aspas.
+
+    Segue as regras do módulo csv: aspas só abrem um campo quando são o
+    primeiro caractere dele, "" dentro do campo é uma aspa escapada e uma
+    aspa solta no meio de um campo sem aspas é texto comum. quoted diz se
+    a linha começa dentro de um campo (continuação da anterior).
+    """
+    if not quoted and b'"' not in line:
+        return False
+    size = len(line)
+    pos = 0
+    while True:
+        if quoted:
+            close = line.find(b'"', pos)
+            if close == -1:
+                return True
+            if line[close + 1:close + 2] == b'"':
+                pos = close + 2
+                continue
+            quoted = False
+            # O que vier depois da aspa de fechamento vai até o separador
+            pos = close + 1
+        elif pos < size and line[pos:pos + 1] == b'"':
+            quoted = True
+            pos += 1
+            continue
+        sep = line.find(delimiter, pos)
+        if sep == -1:
+            return False
+        pos = sep + 1
+
+
+class CsvTable:
+    """Planilha CSV/TSV indexada por offsets de registro sobre um mmap.
+
+    Registros com quebra de linha dentro de aspas são indexados como um
+    só. Encoding e separador são detectados quando não informados; com
+    header=True a primeira linha vira os nomes das colunas.
+    """
+
+    def __init__(self, path, delimiter=None, encoding=None, header=True):
+        self.path = os.path.abspath(path)
+        self.header = header
+        self.starts = array("q")
+        self.ends = array("q")
+        self.file = open(self.path, "rb")
+        self.mm = None
+        self.names = []
+        self._cached = (-1, None)
+
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mtime = os.fstat(self.file.fileno()).st_mtime
+        self.encoding = encoding or "utf-8"
+        self.delimiter = delimiter or ","
+        if not self.size:
+            return
+
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if encoding is None:
+            self.encoding = detect_encoding(self.mm)
+        if delimiter is None:
+            sample = self.mm[:SNIFF_BYTES].decode(self.encoding, errors="replace")
+            self.delimiter = detect_delimiter(sample, self.path)
+        self._build_index()
+
+        if header and len(self.starts):
+            self.names = self._parse(0)
+            del self.starts[0]
+            del self.ends[0]
+        elif len(self.starts):
+            self.names = [f"Coluna {k + 1}" for k in range(len(self._parse(0)))]
+
+    def _build_index(self):
+        mm = self.mm
+        size = self.size
+        starts = self.starts
+        ends = self.ends
+
+        delimiter = self.delimiter.encode(self.encoding)
+        pos = 3 if mm[:3] == UTF8_BOM else 0
+        start = pos
+        quoted = False
+        while pos < size:
+            nl = mm.find(b"\n", pos)
+            if nl == -1:
+                nl = size
+            quoted = ends_quoted(mm[pos:nl], delimiter, quoted)
+            pos = nl + 1
+            # A quebra de linha está dentro de um campo entre aspas
+            if quoted:
+                continue
+            end = nl
+            if end > start and mm[end - 1] == 0x0D:
+                end -= 1
+            if mm[start:end].strip():
+                starts.append(start)
+                ends.append(end)
+            start = pos
+
+        if start < size and mm[start:size].strip():
+            starts.append(start)
+            ends.append(size)
+
+    def _parse(self, i):
+        text = self.mm[self.starts[i]:self.ends[i]].decode(self.encoding, errors="replace")
+        return next(csv.reader(io.StringIO(text, newline=""), delimiter=self.delimiter), [])
+
+    def row(self, i):
+        """Campos do registro i; o último lido fica em cache para as outras colunas."""
+        cached_i, fields = self._cached
+        if cached_i != i:
+            fields = self._parse(i)
+            self._cached = (i, fields)
+        return fields
+
+    def column(self, k):
+        return CsvColumn(self, k)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.file.close()
+
+
+class CsvColumn:
+    """Uma coluna de CsvTable vista como sequência de linhas de uma box.
+
+    Células vazias continuam na sequência para manter as colunas alinhadas
+    pelo número da linha.
+    """
+
+    def __init__(self, table, field):
+        self.table = table
+        self.field = field
+        self.path = table.path
+        self.mm = table.mm
+
+    @property
+    def name(self):
+        names = self.table.names
+        return names[self.field] if self.field < len(names) else f"Coluna {self.field + 1}"
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        fields = self.table.row(i)
+        return fields[self.field] if self.field < len(fields) else ""
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def source_owner(lines):
+    """Objeto que mantém o arquivo aberto: a planilha de uma coluna ou a própria fonte."""
+    return lines.table if isinstance(lines, CsvColumn) else lines
+
+
+def close_sources(sources, keep=()):
+    """Fecha os arquivos e planilhas de sources que nenhuma fonte de keep usa.
+
+    Colunas de uma mesma planilha fecham a tabela uma vez só; linhas
+    digitadas (tuplas, LineStore) são ignoradas.
+    """
+    kept = {id(source_owner(lines)) for lines in keep}
+    closed = set()
+    for lines in sources:
+        owner = source_owner(lines)
+        if not hasattr(owner, "close") or id(owner) in kept or id(owner) in closed:
+            continue
+        closed.add(id(owner))
+        owner.close()
+
+
+class LineStore:
+    """Linhas digitadas/coladas numa box, guardadas fora do widget Tk.
+
+    Só linhas não vazias são mantidas, como na leitura das caixas antigas.
+    """
+
+    def __init__(self, text=""):
+        self.lines = []
+        if text:
+            self.append_text(text)
+
+    def append_text(self, text):
+        """Acrescenta as linhas não vazias de text; retorna quantas entraram."""
+        new = [line.rstrip("\r") for line in text.split("\n") if line.strip()]
+        self.lines.extend(new)
+        return len(new)
+
+    def set(self, i, value):
+        """Troca a linha i (ou remove, se value ficar vazio)."""
+        if value.strip():
+            self.lines[i] = value
+        else:
+            del self.lines[i]
+
+    def insert(self, i, value):
+        if value.strip():
+            self.lines.insert(i, value)
+
+    def delete(self, i):
+        del self.lines[i]
+
+    def clear(self):
+        self.lines = []
+
+    def text(self):
+        return "\n".join(self.lines)
+
+    def snapshot(self):
+        """Cópia imutável para o plano de execução."""
+        return tuple(self.lines)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, i):
+        return self.lines[i]
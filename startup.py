@@ -0,0 +1,114 @@
+"""
+Auto Ester - Tempo de inicialização
+Mede do início do processo (inclui a extração do executável de arquivo
+único) até a janela aparecer e acrescenta uma linha por abertura em
+relatorios/inicializacao.csv, para acompanhar o tempo de cada versão.
+
+Só usa a biblioteca padrão e é importado antes de tudo em main.py.
+"""
+
+import csv
+import os
+import sys
+import time
+
+STARTUP_REPORT = os.path.join("relatorios", "inicializacao.csv")
+
+
+def process_start_time():
+    """Horário (epoch) em que o processo foi criado; None se não der para saber."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            creation, exit_, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.kernel32.GetProcessTimes(
+                    handle, ctypes.byref(creation), ctypes.byref(exit_),
+                    ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            ticks = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+            # FILETIME: intervalos de 100 ns desde 1601-01-01
+            return ticks / 1e7 - 11644473600
+
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/stat", "rb") as f:
+                # O nome do processo pode ter espaços; os campos vêm após o ")"
+                fields = f.read().rsplit(b")", 1)[1].split()
+            start_ticks = int(fields[19])
+            with open("/proc/stat", "rb") as f:
+                boot = next(int(line.split()[1]) for line in f if line.startswith(b"btime"))
+            return boot + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, AttributeError, IndexError, StopIteration):
+        return None
+    return None
+
+
+def build_kind():
+    """Como o programa está rodando: script, pasta ou arquivo único."""
+    if not getattr(sys, "frozen", False):
+        return "script"
+    bundle = getattr(sys, "_MEIPASS", "")
+    # O executável de arquivo único extrai tudo para uma pasta temporária _MEIxxxx
+    if os.path.basename(bundle).startswith("_MEI"):
+        return "arquivo único"
+    return "pasta"
+
+
+class StartupTimer:
+    """Marcas de tempo da inicialização, relativas ao início do processo."""
+
+    def __init__(self):
+        self.wall0 = time.time()
+        self.t0 = time.perf_counter()
+        self.process_start = process_start_time()
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter()))
+
+    def before_python_ms(self):
+        """Do início do processo até o main.py começar (extração + interpretador)."""
+        if self.process_start is None:
+            return None
+        # A resolução do início do processo no Linux é de 10 ms
+        return max(0.0, (self.wall0 - self.process_start) * 1000)
+
+    def elapsed_ms(self, t):
+        before = self.before_python_ms() or 0.0
+        return before + (t - self.t0) * 1000
+
+    def total_ms(self):
+        return self.elapsed_ms(self.marks[-1][1]) if self.marks else None
+
+    def summary(self):
+        report = {"antes_do_python_ms": self.before_python_ms()}
+        for name, t in self.marks:
+            report[f"{name}_ms"] = self.elapsed_ms(t)
+        return report
+
+    def text(self):
+        parts = [f"🚀 Inicialização: {self.total_ms():.0f} ms"]
+        previous = self.t0
+        for name, t in self.marks:
+            parts.append(f"{name} {(t - previous) * 1000:.0f}")
+            previous = t
+        return " | ".join(parts) + " (ms)"
+
+    def append_report(self, version, path=STARTUP_REPORT):
+        """Acrescenta esta inicialização ao CSV (cria com cabeçalho se preciso)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        summary = self.summary()
+        new = not os.path.exists(path)
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(["data", "versao", "execucao", "total_ms"] + list(summary))
+            writer.writerow(
+                [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.wall0)), version,
+                 build_kind(), f"{self.total_ms():.1f}"]
+                + ["" if v is None else f"{v:.1f}" for v in summary.values()])
+        return path
@@ -0,0 +1,168 @@
+"""
+Auto Ester - Modelo de linha
+Descreve o que enviar em cada linha quando "box e tecla após" não basta:
+
+    {1}{TAB}{2}{TAB 2}{3}{ENTER}{WAIT 200}
+    Nome: {1}{TAB}{CTRL+A}{2}{ENTER}
+
+- {N}          valor da box N (1 = primeira) na linha atual
+- {TECLA}      tecla ou combinação, com os mesmos nomes de press_combination
+               (TAB, ENTER, CTRL+A, SHIFT+TAB, F5...); {TAB 3} repete 3 vezes
+- {WAIT ms}    pausa fixa em milissegundos
+- {WAIT cond}  espera uma condição de waits.py, ex.: {WAIT titulo:Salvo@3000},
+               {WAIT muda:10,10,200,30}, {WAIT estavel:0,0,400,300:200}
+- {MACRO nome} reproduz um macro gravado do perfil (recorder.py); {MACRO nome 0}
+               troca o fator das pausas (0 = sem pausas, 1 = como gravado)
+- texto solto  enviado como está; {{ e }} escrevem chaves
+
+parse_template() valida o modelo uma vez e devolve tokens simples que
+engine.compile_plan transforma no programa de ações executado por linha.
+"""
+
+from engine import MODIFIER_NAMES, SPECIAL_NAMES
+from recorder import replay_steps, MAX_FACTOR
+from waits import parse_condition
+
+# Tipos de token
+FIELD = "campo"
+TEXT = "texto"
+KEY = "tecla"
+WAIT = "espera"
+CONDITION = "condicao"
+MACRO = "macro"
+
+MAX_REPEAT = 50
+MAX_WAIT_MS = 60000
+
+
+class TemplateError(ValueError):
+    """Modelo inválido; position é o índice do caractere com problema."""
+
+    def __init__(self, message, position):
+        super().__init__(f"{message} (posição {position + 1})")
+        self.position = position
+
+
+def is_key_name(name):
+    name = name.strip().lower()
+    return (name in MODIFIER_NAMES or name in SPECIAL_NAMES or len(name) == 1
+            or (name.startswith("f") and name[1:].isdigit() and 1 <= int(name[1:]) <= 24))
+
+
+def parse_macro(arg, position, macros):
+    """Passos de {MACRO nome [fator]} com as pausas já comprimidas."""
+    name, _, factor_text = arg.partition(" ")
+    if not name:
+        raise TemplateError("MACRO precisa do nome, ex.: {MACRO novo_registro}", position)
+    macro = (macros or {}).get(name)
+    if macro is None:
+        raise TemplateError(f"macro desconhecido: {name}", position)
+    factor = None
+    if factor_text.strip():
+        try:
+            factor = float(factor_text.replace(",", "."))
+        except ValueError:
+            factor = -1.0
+        if not 0 <= factor <= MAX_FACTOR:
+            raise TemplateError(f"fator do macro deve ficar entre 0 e {MAX_FACTOR:g}",
+                                position)
+    return [(MACRO, replay_steps(macro, factor))]
+
+
+def parse_token(body, position, field_count, macros=None):
+    """Token de um trecho entre chaves (sem as chaves)."""
+    content = body.strip()
+    if not content:
+        raise TemplateError("chaves vazias", position)
+
+    if content.isdigit():
+        n = int(content)
+        if n < 1 or (field_count is not None and n > field_count):
+            limit = f" (há {field_count} boxes)" if field_count is not None else ""
+            raise TemplateError(f"box {{{n}}} não existe{limit}", position)
+        return [(FIELD, n - 1)]
+
+    name, _, arg = content.partition(" ")
+    arg = arg.strip()
+    if name.upper() == "WAIT":
+        if arg and not arg.isdigit():
+            try:
+                return [(CONDITION, parse_condition(arg))]
+            except ValueError as e:
+                raise TemplateError(str(e), position)
+        try:
+            ms = int(arg)
+        except ValueError:
+            raise TemplateError("WAIT precisa de milissegundos, ex.: {WAIT 200}", position)
+        if not 0 <= ms <= MAX_WAIT_MS:
+            raise TemplateError(f"WAIT deve ficar entre 0 e {MAX_WAIT_MS} ms", position)
+        return [(WAIT, ms / 1000)]
+
+    if name.upper() == "MACRO":
+        return parse_macro(arg, position, macros)
+
+    combo = name.lower()
+    parts = combo.split("+")
+    if not all(p.strip() and is_key_name(p) for p in parts):
+        raise TemplateError(f"tecla desconhecida: {name}", position)
+
+    repeat = 1
+    if arg:
+        if not arg.isdigit() or not 1 <= int(arg) <= MAX_REPEAT:
+            raise TemplateError(f"repetição deve ser de 1 a {MAX_REPEAT}, ex.: {{TAB 2}}",
+                                position)
+        repeat = int(arg)
+    return [(KEY, combo)] * repeat
+
+
+def parse_template(text, field_count=None, macros=None):
+    """Valida o modelo e devolve a tupla de tokens (tipo, valor).
+
+    field_count limita os números de box aceitos e macros são os macros
+    gravados do perfil (recorder.normalize_macros). Textos seguidos são
+    juntados num só token. Levanta TemplateError se o modelo for inválido.
+    """
+    tokens = []
+    literal = []
+    i = 0
+    size = len(text)
+
+    def flush_literal():
+        if literal:
+            tokens.append((TEXT, "".join(literal)))
+            literal.clear()
+
+    while i < size:
+        ch = text[i]
+        if ch == "{":
+            if text.startswith("{{", i):
+                literal.append("{")
+                i += 2
+                continue
+            close = text.find("}", i + 1)
+            if close == -1:
+                raise TemplateError("falta fechar a chave", i)
+            if "{" in text[i + 1:close]:
+                raise TemplateError("chave aberta dentro de outra", i)
+            flush_literal()
+            tokens.extend(parse_token(text[i + 1:close], i, field_count, macros))
+            i = close + 1
+        elif ch == "}":
+            if text.startswith("}}", i):
+                literal.append("}")
+                i += 2
+                continue
+            raise TemplateError("chave fechada sem abrir", i)
+        else:
+            literal.append(ch)
+            i += 1
+    flush_literal()
+
+    if not any(kind == FIELD for kind, _ in tokens):
+        raise TemplateError("o modelo não usa nenhuma box, ex.: {1}", 0)
+    return tuple(tokens)
+
+
+def template_fields(tokens):
+    """Índices (base 0) das boxes usadas pelo modelo."""
+    return sorted({value for kind, value in tokens if kind == FIELD})
@@ -0,0 +1,126 @@
+import threading
+import time
+
+from backends import FakeController, MemoryClipboard
+from engine import OP_ARM, OP_COND, OP_FIELD, OP_KEY, OP_WAIT, MacroEngine, compile_plan
+from recorder import normalize_macros
+from template import parse_template
+from timing import TUNE_STREAK, LiveRate, TimingProfile, TIMING_FIELDS
+from waits import parse_condition
+
+# Sem pausas: os testes conferem a ordem das ações, não o ritmo
+NO_PAUSES = TimingProfile(*(0.0 for _ in TIMING_FIELDS))
+
+
+def template_plan(text, boxes, macros=None):
+    macros = normalize_macros(macros)
+    template = parse_template(text, len(boxes), macros)
+    return compile_plan([(lines, "", "colar") for lines in boxes], 0.01,
+                        key_space=FakeController.key_space, timing=NO_PAUSES,
+                        template=template)
+
+
+class StopOnKey(FakeController):
+    """Controller que aciona a parada ao receber a tecla stop_key."""
+
+    def __init__(self, stop_event, stop_key, clipboard=None):
+        super().__init__(clipboard)
+        self.stop_event = stop_event
+        self.stop_key = stop_key
+
+    def press(self, key):
+        super().press(key)
+        if key == self.stop_key:
+            self.stop_event.set()
+
+
+class CopyOnlyClipboard(MemoryClipboard):
+    """Confirma a cópia mas não sabe dizer se o alvo colou."""
+
+    def wait_copied(self, text, timeout):
+        return True
+
+    def wait_pasted(self, timeout):
+        return None
+
+
+def test_stop_during_macro_leaves_line_pending():
+    macros = {"m": {"events": [[0.0, "p", "x"], [0.01, "r", "x"],
+                               [0.02, "p", "y"], [0.03, "r", "y"]]}}
+    plan = template_plan("{1}{MACRO m}{ENTER}", [["a", "b"]], macros)
+    stop = threading.Event()
+    clipboard = MemoryClipboard()
+    controller = StopOnKey(stop, "x", clipboard)
+    done = []
+
+    next_line = MacroEngine(controller, clipboard, stop, on_done=done.append).run(plan)
+
+    assert next_line == 0
+    assert done == []
+    pressed = [key for _, action, key in controller.events if action == "press"]
+    assert "y" not in pressed
+    assert FakeController.key_space.enter not in pressed
+    # A tecla do macro não fica presa ao parar
+    assert "x" not in controller.pressed
+
+
+def test_stop_interrupts_long_template_wait():
+    plan = template_plan("{1}{WAIT 60000}{ENTER}", [["a"]])
+    stop = threading.Event()
+    clipboard = MemoryClipboard()
+    controller = FakeController(clipboard)
+    timer = threading.Timer(0.05, stop.set)
+    timer.start()
+    started = time.perf_counter()
+    try:
+        next_line = MacroEngine(controller, clipboard, stop).run(plan)
+    finally:
+        timer.cancel()
+
+    assert time.perf_counter() - started < 5.0
+    assert next_line == 0
+    assert FakeController.key_space.enter not in [key for _, _, key in controller.events]
+
+
+def test_arm_goes_before_last_sending_action():
+    plan = template_plan("{1}{ENTER}{WAIT 100}{WAIT titulo}", [["a"]])
+    assert [action.op for action in plan.program] == [OP_FIELD, OP_ARM, OP_KEY, OP_WAIT,
+                                                      OP_COND]
+
+
+def test_arms_keep_condition_order():
+    plan = template_plan("{1}{WAIT titulo}{WAIT muda:0,0,10,10}", [["a"]])
+    first, second = parse_condition("titulo"), parse_condition("muda:0,0,10,10")
+    assert [action.op for action in plan.program] == [OP_ARM, OP_ARM, OP_FIELD, OP_COND,
+                                                      OP_COND]
+    assert plan.program[0].arg == (first, 3)
+    assert plan.program[1].arg == (second, 4)
+
+
+def test_identical_conditions_get_their_own_baseline():
+    plan = template_plan("{1}{WAIT titulo@2000}{WAIT titulo@2000}", [["a", "b"]])
+    assert [action.arg[1] for action in plan.program if action.op == OP_ARM] == [3, 4]
+
+    controller = FakeController(MemoryClipboard())
+    probe = controller.make_probe()
+    started = time.perf_counter()
+    MacroEngine(controller, controller.clipboard, threading.Event(), probe=probe).run(plan)
+    # Cada espera compara com o título lido antes do campo: nenhuma esgota o tempo
+    assert time.perf_counter() - started < 1.0
+
+
+def run_tuned(clipboard, lines=TUNE_STREAK * 2):
+    plan = template_plan("{1}", [[f"valor {n}" for n in range(lines)]])
+    rate = LiveRate(0.01, auto=True)
+    MacroEngine(FakeController(clipboard), clipboard, threading.Event(), rate=rate).run(plan)
+    return rate
+
+
+def test_tuner_speeds_up_on_confirmed_pastes():
+    assert run_tuned(MemoryClipboard()).delay < 0.01
+
+
+def test_tuner_ignores_copy_only_checks():
+    rate = run_tuned(CopyOnlyClipboard())
+    assert rate.delay == 0.01
+    assert rate.backoffs == 0
@@ -0,0 +1,52 @@
+import processed
+from processed import ProcessedIndex, row_hash
+
+
+def test_hashes_survive_close_and_reopen(tmp_path):
+    path = str(tmp_path / "perfil.indice")
+    values = [row_hash(["Ana", str(n)]) for n in range(100)]
+    index = ProcessedIndex(path)
+    for value in values:
+        index.add(value)
+    index.close()
+
+    index = ProcessedIndex(path)
+    try:
+        assert len(index) == len(values)
+        assert all(value in index for value in values)
+        assert row_hash(["Bia", "0"]) not in index
+    finally:
+        index.close()
+
+
+def test_log_is_kept_when_not_closed(tmp_path):
+    path = str(tmp_path / "perfil.indice")
+    index = ProcessedIndex(path)
+    index.add(row_hash(["Ana"]))
+    # Sem close (queda): o hash continua no log
+    index.log.close()
+
+    index = ProcessedIndex(path)
+    try:
+        assert row_hash(["Ana"]) in index
+    finally:
+        index.close()
+
+
+def test_compact_merges_log_into_sorted_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(processed, "COMPACT_ENTRIES", 4)
+    path = str(tmp_path / "perfil.indice")
+    values = [row_hash([str(n)]) for n in range(10)]
+    index = ProcessedIndex(path)
+    try:
+        for value in values:
+            index.add(value)
+        # Duas compactações automáticas; os dois últimos ainda no log
+        assert len(index.sorted) == 8
+        assert len(index.recent) == 2
+        assert list(index.sorted) == sorted(values[:8])
+        index.add(values[0])
+        assert len(index) == len(values)
+        assert all(value in index for value in values)
+    finally:
+        index.close()
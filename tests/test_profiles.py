@@ -0,0 +1,45 @@
+import json
+import os
+
+from profiles import ProfileStore, DEFAULT_PROFILE_NAME, data_path
+
+
+def test_legacy_box_text_survives_first_settings_save(tmp_path):
+    config = tmp_path / "auto_ester_config.json"
+    directory = str(tmp_path / "dados")
+    config.write_text(json.dumps({
+        "version": "3.0", "speed": 0.01,
+        "keys": {"start": "f11", "stop": "f12", "after1": "enter"},
+        "boxes": {"box1_enabled": True, "box1_content": "a\nb\nc",
+                  "box2_content": "d", "box3_content": "e\nf"},
+    }), encoding="utf-8")
+
+    store = ProfileStore(str(config), directory)
+    settings = store.settings()
+    # Como a interface grava: ajustes sem o texto das boxes
+    for column in settings.get("columns", []):
+        column.pop("content", None)
+    settings.pop("boxes", None)
+    store.save_settings({"speed": 0.2, **settings})
+    store.flush()
+
+    store = ProfileStore(str(config), directory)
+    assert store.active == DEFAULT_PROFILE_NAME
+    assert store.load_data() == ["a\nb\nc", "d", "e\nf"]
+
+
+def test_removed_profile_data_is_not_recreated_by_pending_save(tmp_path):
+    store = ProfileStore(str(tmp_path / "auto_ester_config.json"), str(tmp_path / "dados"))
+    store.set_active("outro", {})
+    store.save_data([("a", "b")], "outro")
+    store.remove("outro")
+    store.flush()
+    assert not os.path.exists(data_path("outro", str(tmp_path / "dados")))
+
+
+def test_names_sharing_a_data_file_clash(tmp_path):
+    store = ProfileStore(str(tmp_path / "auto_ester_config.json"), str(tmp_path / "dados"))
+    store.set_active("a/b", {})
+    assert store.clash("a_b") == "a/b"
+    assert store.clash("A/B") == "a/b"
+    assert store.clash("c") is None
@@ -0,0 +1,45 @@
+from sources import CsvTable, FileLines
+
+
+def write_csv(tmp_path, data):
+    path = tmp_path / "planilha.csv"
+    path.write_bytes(data)
+    return str(path)
+
+
+def read_table(path, **kwargs):
+    table = CsvTable(path, **kwargs)
+    try:
+        return table.names, [table.row(i) for i in range(len(table))]
+    finally:
+        table.close()
+
+
+def test_stray_quote_in_unquoted_field_does_not_merge_records(tmp_path):
+    path = write_csv(tmp_path, b'a,b\n5" pipe,x\ny,z\n')
+    names, rows = read_table(path, delimiter=",")
+    assert names == ["a", "b"]
+    assert rows == [['5" pipe', "x"], ["y", "z"]]
+
+
+def test_bom_and_crlf_are_not_part_of_the_values(tmp_path):
+    path = write_csv(tmp_path, b'\xef\xbb\xbfnome;valor\r\nAna;1\r\nBia;2\r\n')
+    names, rows = read_table(path)
+    assert names == ["nome", "valor"]
+    assert rows == [["Ana", "1"], ["Bia", "2"]]
+
+
+def test_line_break_inside_quotes_stays_in_one_record(tmp_path):
+    path = write_csv(tmp_path, b'a,b\n"linha 1\nlinha 2",x\n"diz ""oi""",y\n')
+    names, rows = read_table(path, delimiter=",")
+    assert rows == [["linha 1\nlinha 2", "x"], ['diz "oi"', "y"]]
+
+
+def test_file_lines_skip_bom_crlf_and_blank_lines(tmp_path):
+    path = tmp_path / "box.txt"
+    path.write_bytes(b"\xef\xbb\xbfum\r\n\r\n  \r\ndois\r\ntr\xc3\xaas")
+    lines = FileLines(str(path))
+    try:
+        assert list(lines) == ["um", "dois", "três"]
+    finally:
+        lines.close()
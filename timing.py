@@ -0,0 +1,152 @@
+"""
+Auto Ester - Ritmo do macro
+- TimingProfile: pausa de cada etapa, configurável por perfil
+- Scheduler: pausas por prazo absoluto (perf_counter), descontando o
+  tempo gasto entre uma pausa e outra em vez de somá-lo ao total
+- LiveRate: delay da execução, alterável durante ela e com ajuste
+  automático opcional
+
+Campos multiplicados pelo delay do controle de velocidade:
+    copy_settle, paste_settle, type_settle, after_key, line_gap
+Campos em segundos (pausas internas das combinações):
+    modifier_settle, key_hold, combo_release, paste_release
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+TIMING_FIELDS = (
+    "copy_settle", "paste_settle", "type_settle", "after_key", "line_gap",
+    "modifier_settle", "key_hold", "combo_release", "paste_release",
+)
+
+TIMING_LABELS = {
+    "copy_settle": "Após copiar (× delay)",
+    "paste_settle": "Após colar (× delay)",
+    "type_settle": "Após digitar (× delay)",
+    "after_key": "Após tecla da box (× delay)",
+    "line_gap": "Entre linhas (× delay)",
+    "modifier_settle": "Segurar modificador (s)",
+    "key_hold": "Segurar tecla (s)",
+    "combo_release": "Após combinação (s)",
+    "paste_release": "Após Ctrl+V (s)",
+}
+
+TimingProfile = namedtuple("TimingProfile", TIMING_FIELDS)
+
+# "padrão" reproduz as pausas originais do Auto Ester
+BUILTIN_PROFILES = {
+    "padrão": TimingProfile(0.5, 0.8, 0.8, 1.0, 1.5, 0.02, 0.02, 0.05, 0.05),
+    "rápido": TimingProfile(0.25, 0.4, 0.4, 0.5, 0.5, 0.005, 0.01, 0.02, 0.02),
+    "lento": TimingProfile(1.0, 1.5, 1.5, 2.0, 3.0, 0.04, 0.04, 0.1, 0.1),
+}
+DEFAULT_PROFILE = "padrão"
+
+# Abaixo disto o Scheduler termina a espera em laço em vez de dormir
+SPIN_THRESHOLD = 0.0015
+
+# Ajuste automático: linhas confirmadas seguidas antes de acelerar, quanto
+# o delay encolhe a cada passo, quanto cresce numa falha e o menor delay
+TUNE_STREAK = 5
+TUNE_SPEEDUP = 0.9
+TUNE_BACKOFF = 1.5
+TUNE_MIN_DELAY = 0.005
+
+
+def profile_from_dict(data, base=None):
+    """Monta um TimingProfile a partir do JSON (campos ausentes vêm de base)."""
+    base = base or BUILTIN_PROFILES[DEFAULT_PROFILE]
+    values = {}
+    for field in TIMING_FIELDS:
+        try:
+            values[field] = max(0.0, float(data.get(field, getattr(base, field))))
+        except (TypeError, ValueError):
+            values[field] = getattr(base, field)
+    return TimingProfile(**values)
+
+
+def profile_to_dict(profile):
+    return dict(profile._asdict())
+
+
+def resolve_profile(name, custom=None):
+    """Perfil pelo nome, procurando primeiro nos perfis salvos na configuração."""
+    custom = custom or {}
+    if name in custom:
+        return profile_from_dict(custom[name], BUILTIN_PROFILES.get(name))
+    return BUILTIN_PROFILES.get(name, BUILTIN_PROFILES[DEFAULT_PROFILE])
+
+
+class Scheduler:
+    """Agenda pausas por prazo absoluto.
+
+    wait(s) avança o prazo a partir do prazo anterior, não do instante
+    atual: o tempo gasto enviando teclas entre duas pausas é descontado da
+    próxima. Se o trabalho atrasar além do prazo, o prazo é trazido para
+    o presente (sem acumular dívida que viraria rajada de teclas).
+    """
+
+    def __init__(self, clock=time.perf_counter, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.deadline = clock()
+
+    def reset(self):
+        """Recomeça a contar do instante atual (após esperas verificadas)."""
+        self.deadline = self.clock()
+
+    def wait(self, seconds):
+        now = self.clock()
+        deadline = self.deadline + seconds
+        if deadline <= now:
+            self.deadline = now
+            return
+
+        self.deadline = deadline
+        remaining = deadline - now
+        if remaining > SPIN_THRESHOLD:
+            self.sleep(remaining - SPIN_THRESHOLD)
+        while self.clock() < deadline:
+            pass
+
+
+class LiveRate:
+    """Delay da execução, lido pelo worker no início de cada linha.
+
+    set() pode ser chamado da thread do Tk enquanto o macro roda. Com
+    auto, line_done() recebe o resultado das verificações da linha
+    (True: todas confirmaram, False: alguma esgotou o tempo, None: nada
+    verificável) e o delay diminui aos poucos enquanto o alvo acompanha,
+    voltando a crescer, até o teto, quando ele não acompanha.
+    """
+
+    def __init__(self, delay, auto=False, ceiling=None, floor=TUNE_MIN_DELAY):
+        self.lock = threading.Lock()
+        self.ceiling = max(float(delay), float(ceiling or 0))
+        self.floor = min(floor, self.ceiling)
+        self.delay = float(delay)
+        self.auto = auto
+        self.streak = 0
+        self.backoffs = 0
+
+    def set(self, delay):
+        """Novo delay escolhido pelo usuário; também vira o teto do ajuste."""
+        with self.lock:
+            self.delay = self.ceiling = max(0.0, float(delay))
+            self.floor = min(self.floor, self.ceiling)
+            self.streak = 0
+
+    def line_done(self, verified):
+        if not self.auto or verified is None:
+            return
+        with self.lock:
+            if verified:
+                self.streak += 1
+                if self.streak >= TUNE_STREAK:
+                    self.streak = 0
+                    self.delay = max(self.floor, self.delay * TUNE_SPEEDUP)
+            else:
+                self.streak = 0
+                self.backoffs += 1
+                self.delay = min(self.ceiling, max(self.floor, self.delay) * TUNE_BACKOFF)
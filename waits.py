@@ -0,0 +1,277 @@
+"""
+Auto Ester - Esperas por condição
+Em vez de pagar sempre a pausa do pior caso, a execução pode esperar o
+aplicativo alvo responder:
+
+    titulo              título da janela muda (em relação a antes da ação)
+    titulo:Salvo        título da janela passa a conter "Salvo"
+    muda:x,y,l,a        a região da tela (x, y, largura, altura) muda
+    estavel:x,y,l,a     a região fica igual por 150 ms (estavel:x,y,l,a:300 = 300 ms)
+
+Qualquer condição aceita @ms no fim para o tempo máximo (padrão 5000),
+por exemplo "muda:10,10,200,30@2000". Também valem os nomes em inglês
+title, change e settle.
+
+A leitura da tela fica numa "sonda" (probe): X11 (python-xlib), Windows
+(ctypes) ou nenhuma. Sem sonda a espera não pode ser verificada e quem
+chama usa a pausa fixa, como nas esperas da área de transferência.
+"""
+
+import sys
+import time
+import zlib
+from collections import namedtuple
+
+KINDS = {"titulo": "titulo", "title": "titulo",
+         "muda": "muda", "change": "muda",
+         "estavel": "estavel", "settle": "estavel"}
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_SETTLE = 0.15
+MAX_TIMEOUT = 600.0
+
+# Intervalo entre leituras da tela/título (segundos)
+COND_POLL = 0.015
+
+# kind: titulo/muda/estavel; text: trecho do título; rect: (x, y, l, a);
+# settle e timeout em segundos; spec: texto original (para mensagens)
+WaitCondition = namedtuple("WaitCondition", ["kind", "text", "rect", "settle", "timeout",
+                                             "spec"])
+
+
+def parse_rect(text):
+    try:
+        x, y, w, h = (int(v) for v in text.split(","))
+    except ValueError:
+        raise ValueError(f"região deve ser x,y,largura,altura: {text}")
+    if w <= 0 or h <= 0 or x < 0 or y < 0:
+        raise ValueError(f"região inválida: {text}")
+    return x, y, w, h
+
+
+def parse_condition(spec):
+    """'muda:10,10,200,30@2000' -> WaitCondition; vazio -> None.
+
+    Levanta ValueError se a condição for inválida.
+    """
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+
+    body, timeout = spec, DEFAULT_TIMEOUT
+    head, sep, tail = spec.rpartition("@")
+    if sep and tail.strip().isdigit():
+        body, timeout = head, int(tail) / 1000
+        if not 0 < timeout <= MAX_TIMEOUT:
+            raise ValueError(f"tempo máximo deve ficar entre 1 e {int(MAX_TIMEOUT * 1000)} ms")
+
+    name, _, arg = body.partition(":")
+    kind = KINDS.get(name.strip().lower())
+    if kind is None:
+        raise ValueError(f"condição desconhecida: {name.strip()} (use titulo, muda ou estavel)")
+
+    if kind == "titulo":
+        return WaitCondition(kind, arg.strip(), None, 0.0, timeout, spec)
+
+    rect_text, _, settle_text = arg.partition(":")
+    rect = parse_rect(rect_text)
+    settle = DEFAULT_SETTLE
+    if kind == "estavel" and settle_text.strip():
+        if not settle_text.strip().isdigit():
+            raise ValueError(f"tempo de estabilidade deve ser em ms: {settle_text}")
+        settle = int(settle_text) / 1000
+    return WaitCondition(kind, "", rect, settle, timeout, spec)
+
+
+def needs_baseline(cond):
+    """Condições que comparam com o estado de antes da ação anterior."""
+    return (cond.kind == "titulo" and not cond.text) or cond.kind == "muda"
+
+
+def read_condition(cond, probe):
+    """Valor observado pela condição agora; None se a sonda não consegue ler."""
+    if cond.kind == "titulo":
+        return probe.title()
+    return probe.region_hash(cond.rect)
+
+
+def wait_condition(cond, probe, baseline=None, stop_event=None,
+                   clock=time.perf_counter, sleep=time.sleep):
+    """Espera a condição.
+
+    Retorna True se ela foi atendida, False se o tempo esgotou (ou a
+    execução foi parada) e None se a sonda não permite verificar.
+    baseline é o valor lido antes da ação que deve provocar a mudança.
+    """
+    deadline = clock() + cond.timeout
+    value = read_condition(cond, probe)
+    if value is None:
+        return None
+    if baseline is None:
+        baseline = value
+
+    stable_since = clock()
+    while True:
+        if cond.kind == "titulo" and cond.text:
+            if cond.text.lower() in value.lower():
+                return True
+        elif cond.kind == "estavel":
+            if value != baseline:
+                baseline = value
+                stable_since = clock()
+            elif clock() - stable_since >= cond.settle:
+                return True
+        elif value != baseline:
+            return True
+
+        if clock() >= deadline or (stop_event is not None and stop_event.is_set()):
+            return False
+        sleep(COND_POLL)
+        value = read_condition(cond, probe)
+        if value is None:
+            return None
+
+
+# ======================================================================
+# Sondas
+# ======================================================================
+
+class NullProbe:
+    """Sem acesso à tela: toda espera cai na pausa fixa."""
+
+    def title(self):
+        return None
+
+    def region_hash(self, rect):
+        return None
+
+    def close(self):
+        pass
+
+
+class X11Probe:
+    """Título e pixels pelo servidor X (conexão própria da thread do worker).
+
+    Com window_id lê o título dessa janela; senão, o da janela ativa.
+    """
+
+    def __init__(self, window_id=None, display_name=None):
+        from x11target import open_display
+        self.display = open_display(display_name)
+        from Xlib import X
+
+        self.X = X
+        self.root = self.display.screen().root
+        self.window_id = window_id
+        self.active_atom = self.display.intern_atom("_NET_ACTIVE_WINDOW")
+
+    def title(self):
+        from x11target import window_title
+
+        wid = self.window_id
+        if wid is None:
+            prop = self.root.get_full_property(self.active_atom, self.X.AnyPropertyType)
+            if prop is None or not len(prop.value):
+                return None
+            wid = prop.value[0]
+        window = self.display.create_resource_object("window", wid)
+        return window_title(self.display, window)
+
+    def region_hash(self, rect):
+        x, y, w, h = rect
+        try:
+            image = self.root.get_image(x, y, w, h, self.X.ZPixmap, 0xFFFFFFFF)
+        except Exception:
+            return None
+        return zlib.crc32(image.data)
+
+    def close(self):
+        self.display.close()
+
+
+class WindowsProbe:
+    """Título da janela em foco e pixels da tela pela API do Windows (ctypes)."""
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        self.ctypes = ctypes
+        self.user32 = ctypes.windll.user32
+        self.gdi32 = ctypes.windll.gdi32
+        handle = ctypes.c_void_p
+        self.user32.GetForegroundWindow.restype = handle
+        self.user32.GetWindowTextLengthW.argtypes = [handle]
+        self.user32.GetWindowTextW.argtypes = [handle, wintypes.LPWSTR, ctypes.c_int]
+        self.user32.GetDC.argtypes = [handle]
+        self.user32.GetDC.restype = handle
+        self.user32.ReleaseDC.argtypes = [handle, handle]
+        self.gdi32.CreateCompatibleDC.argtypes = [handle]
+        self.gdi32.CreateCompatibleDC.restype = handle
+        self.gdi32.CreateCompatibleBitmap.argtypes = [handle, ctypes.c_int, ctypes.c_int]
+        self.gdi32.CreateCompatibleBitmap.restype = handle
+        self.gdi32.SelectObject.argtypes = [handle, handle]
+        self.gdi32.SelectObject.restype = handle
+        self.gdi32.BitBlt.argtypes = [handle, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                      ctypes.c_int, handle, ctypes.c_int, ctypes.c_int,
+                                      wintypes.DWORD]
+        self.gdi32.GetDIBits.argtypes = [handle, handle, wintypes.UINT, wintypes.UINT,
+                                         ctypes.c_void_p, ctypes.c_void_p, wintypes.UINT]
+        self.gdi32.DeleteObject.argtypes = [handle]
+        self.gdi32.DeleteDC.argtypes = [handle]
+
+    def title(self):
+        hwnd = self.user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        length = self.user32.GetWindowTextLengthW(hwnd)
+        buffer = self.ctypes.create_unicode_buffer(length + 1)
+        self.user32.GetWindowTextW(hwnd, buffer, length + 1)
+        return buffer.value
+
+    def region_hash(self, rect):
+        ctypes = self.ctypes
+        x, y, w, h = rect
+        screen = self.user32.GetDC(None)
+        memory = self.gdi32.CreateCompatibleDC(screen)
+        bitmap = self.gdi32.CreateCompatibleBitmap(screen, w, h)
+        try:
+            previous = self.gdi32.SelectObject(memory, bitmap)
+            SRCCOPY = 0x00CC0020
+            if not self.gdi32.BitBlt(memory, 0, 0, w, h, screen, x, y, SRCCOPY):
+                return None
+            self.gdi32.SelectObject(memory, previous)
+
+            # BITMAPINFOHEADER de 32 bits por pixel, de cima para baixo
+            header = (ctypes.c_uint32 * 11)()  # + 1 RGBQUAD de folga
+            header[0] = 40
+            header[1] = w
+            header[2] = (-h) & 0xFFFFFFFF
+            header[3] = 1 | (32 << 16)
+            pixels = ctypes.create_string_buffer(w * h * 4)
+            if not self.gdi32.GetDIBits(memory, bitmap, 0, h, pixels, header, 0):
+                return None
+            return zlib.crc32(pixels.raw)
+        finally:
+            self.gdi32.DeleteObject(bitmap)
+            self.gdi32.DeleteDC(memory)
+            self.user32.ReleaseDC(None, screen)
+
+    def close(self):
+        pass
+
+
+def make_probe(controller=None):
+    """Sonda para a execução: a do controller, se ele tiver, ou a do sistema."""
+    factory = getattr(controller, "make_probe", None)
+    if factory is not None:
+        return factory()
+    if sys.platform == "win32":
+        return WindowsProbe()
+    if sys.platform.startswith("linux"):
+        from x11target import TargetWindowError
+        try:
+            return X11Probe()
+        except TargetWindowError:
+            pass
+    return NullProbe()
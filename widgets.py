@@ -0,0 +1,242 @@
+"""
+Auto Ester - Widgets
+VirtualList: lista de linhas que desenha só as linhas visíveis num Canvas.
+Os dados ficam fora do Tk (sources.LineStore ou sources.FileLines), então
+colar ou abrir listas com centenas de milhares de linhas não trava a janela.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+# Caracteres desenhados por linha (o resto é cortado só na exibição)
+MAX_DRAW_CHARS = 300
+
+
+class VirtualList(ttk.Frame):
+    """Visualizador virtualizado de uma sequência de linhas.
+
+    Editável quando a fonte é um LineStore: Ctrl+V acrescenta o conteúdo
+    da área de transferência, duplo clique edita uma linha (ou cria uma
+    nova abaixo da última) e Delete remove a linha selecionada.
+    on_change() é chamado depois de cada alteração.
+    """
+
+    def __init__(self, master, width=32, height=10, on_change=None):
+        super().__init__(master)
+        self.font = tkfont.nametofont("TkFixedFont")
+        self.row_h = self.font.metrics("linespace") + 2
+        self.char_w = self.font.measure("0")
+        self.num_w = self.char_w * 7
+
+        self.source = []
+        self.editable = False
+        self.on_change = on_change
+        self.top = 0
+        self.current = None
+        self.selected = None
+        self.editor = None
+
+        self.canvas = tk.Canvas(self, width=self.char_w * width + self.num_w,
+                                height=self.row_h * height, bg="white",
+                                highlightthickness=1, takefocus=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        c = self.canvas
+        c.bind("<Configure>", lambda e: self.redraw())
+        c.bind("<MouseWheel>", self._on_wheel)
+        c.bind("<Button-4>", lambda e: self.yview("scroll", -3, "units"))
+        c.bind("<Button-5>", lambda e: self.yview("scroll", 3, "units"))
+        c.bind("<Button-1>", self._on_click)
+        c.bind("<Double-Button-1>", self._on_double_click)
+        c.bind("<Control-v>", self._on_paste)
+        c.bind("<Control-V>", self._on_paste)
+        c.bind("<Delete>", self._on_delete)
+        c.bind("<Up>", lambda e: self._move_selection(-1))
+        c.bind("<Down>", lambda e: self._move_selection(1))
+        c.bind("<Prior>", lambda e: self.yview("scroll", -1, "pages"))
+        c.bind("<Next>", lambda e: self.yview("scroll", 1, "pages"))
+
+    # ------------------------------------------------------------------
+    # Dados
+    # ------------------------------------------------------------------
+
+    def set_source(self, source, editable):
+        """Troca a sequência exibida (LineStore editável ou FileLines)."""
+        self._cancel_edit()
+        self.source = source
+        self.editable = editable
+        self.top = 0
+        self.current = None
+        self.selected = None
+        self.redraw()
+
+    def set_current(self, i):
+        """Destaca a linha em execução e rola até ela (None limpa)."""
+        self.current = i
+        if i is not None:
+            visible = self._visible_rows()
+            if not self.top <= i < self.top + visible:
+                self.top = max(0, i - visible // 3)
+        self.redraw()
+
+    def _changed(self):
+        self.redraw()
+        if self.on_change:
+            self.on_change()
+
+    # ------------------------------------------------------------------
+    # Desenho
+    # ------------------------------------------------------------------
+
+    def _visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_h)
+
+    def _clamp_top(self):
+        total = len(self.source)
+        # Uma linha livre no fim, onde o duplo clique cria uma linha nova
+        self.top = max(0, min(self.top, total + 1 - self._visible_rows()))
+
+    def redraw(self):
+        c = self.canvas
+        c.delete("all")
+        self._clamp_top()
+
+        total = len(self.source)
+        visible = self._visible_rows()
+        width = c.winfo_width()
+        end = min(total, self.top + visible + 1)
+
+        for row, i in enumerate(range(self.top, end)):
+            y = row * self.row_h
+            if i == self.current:
+                c.create_rectangle(0, y, width, y + self.row_h, fill="#fff2a8", width=0)
+            elif i == self.selected:
+                c.create_rectangle(0, y, width, y + self.row_h, fill="#cfe3ff", width=0)
+            c.create_text(self.num_w - 6, y + 1, text=str(i + 1), anchor="ne",
+                          font=self.font, fill="#888888")
+            c.create_text(self.num_w, y + 1, text=self.source[i][:MAX_DRAW_CHARS],
+                          anchor="nw", font=self.font)
+
+        c.create_line(self.num_w - 3, 0, self.num_w - 3, visible * self.row_h + self.row_h,
+                      fill="#dddddd")
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # ------------------------------------------------------------------
+    # Rolagem e seleção
+    # ------------------------------------------------------------------
+
+    def yview(self, *args):
+        total = len(self.source)
+        visible = self._visible_rows()
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = visible if args[2] == "pages" else 1
+            self.top += int(args[1]) * step
+        self.redraw()
+
+    def _on_wheel(self, event):
+        self.yview("scroll", -3 if event.delta > 0 else 3, "units")
+
+    def _row_at(self, y):
+        return self.top + int(y // self.row_h)
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        self._cancel_edit()
+        i = self._row_at(event.y)
+        self.selected = i if i < len(self.source) else None
+        self.redraw()
+
+    def _move_selection(self, delta):
+        if not len(self.source):
+            return
+        i = 0 if self.selected is None else self.selected + delta
+        self.selected = max(0, min(i, len(self.source) - 1))
+        if not self.top <= self.selected < self.top + self._visible_rows():
+            self.top = max(0, self.selected - self._visible_rows() // 2)
+        self.redraw()
+
+    # ------------------------------------------------------------------
+    # Edição
+    # ------------------------------------------------------------------
+
+    def _on_paste(self, event=None):
+        if not self.editable:
+            return "break"
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return "break"
+        if self.source.append_text(text):
+            self.top = len(self.source)
+            self._changed()
+        return "break"
+
+    def _on_delete(self, event=None):
+        if self.editable and self.selected is not None and self.selected < len(self.source):
+            self.source.delete(self.selected)
+            if self.selected >= len(self.source):
+                self.selected = len(self.source) - 1 if len(self.source) else None
+            self._changed()
+        return "break"
+
+    def _on_double_click(self, event):
+        if not self.editable:
+            return
+        i = min(self._row_at(event.y), len(self.source))
+        self._start_edit(i)
+
+    def _start_edit(self, i):
+        """Abre um Entry sobre a linha i (i == len cria uma linha nova)."""
+        self._cancel_edit()
+        if i >= self.top + self._visible_rows():
+            self.top = i - self._visible_rows() + 1
+            self.redraw()
+
+        y = (i - self.top) * self.row_h
+        entry = tk.Entry(self.canvas, font=self.font, relief=tk.FLAT, bg="#eef6ff")
+        if i < len(self.source):
+            entry.insert(0, self.source[i])
+        self.editor = (entry, i)
+        self.canvas.create_window(self.num_w, y, window=entry, anchor="nw",
+                                  width=self.canvas.winfo_width() - self.num_w,
+                                  height=self.row_h, tags="editor")
+        entry.focus_set()
+        entry.bind("<Return>", lambda e: self._commit_edit(next_row=True))
+        entry.bind("<Escape>", lambda e: self._cancel_edit())
+        entry.bind("<FocusOut>", lambda e: self._commit_edit())
+
+    def _commit_edit(self, next_row=False):
+        if not self.editor:
+            return
+        entry, i = self.editor
+        value = entry.get()
+        self.editor = None
+        entry.destroy()
+
+        if i < len(self.source):
+            self.source.set(i, value)
+        else:
+            self.source.insert(i, value)
+        self.selected = i if i < len(self.source) else None
+        self._changed()
+
+        if next_row and value.strip():
+            self._start_edit(i + 1)
+        else:
+            self.canvas.focus_set()
+
+    def _cancel_edit(self):
+        if self.editor:
+            entry, _ = self.editor
+            self.editor = None
+            entry.destroy()
+            self.redraw()
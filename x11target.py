@@ -0,0 +1,283 @@
+"""
+Auto Ester - Envio direto para uma janela (Linux/X11)
+X11WindowController tem a mesma interface do Controller do pynput
+(press, release, type, key_space), mas manda cada evento de teclado
+com XSendEvent para uma janela escolhida por título ou id. Não depende
+de qual janela está em foco: não há os 2s para focar o alvo e trocar de
+janela no meio da execução não desvia as teclas.
+
+Usa python-xlib, que já vem como dependência do pynput no Linux.
+Alguns programas ignoram eventos sintéticos (o xterm, por exemplo, só
+aceita com allowSendEvents); GTK, Qt e navegadores aceitam.
+
+Para testar sem tela:
+    Xvfb :99 &
+    DISPLAY=:99 xterm -title alvo -xrm 'xterm*allowSendEvents: true' &
+    DISPLAY=:99 python cli.py --listar-janelas
+    DISPLAY=:99 python cli.py nomes.txt --janela alvo
+"""
+
+# Nome do espaço de teclas (engine.SPECIAL_NAMES/MODIFIER_NAMES) -> keysym do X11
+KEYSYM_NAMES = {
+    "ctrl": "Control_L", "shift": "Shift_L", "alt": "Alt_L", "cmd": "Super_L",
+    "enter": "Return", "space": "space", "tab": "Tab", "esc": "Escape",
+    "delete": "Delete", "backspace": "BackSpace", "up": "Up", "down": "Down",
+    "left": "Left", "right": "Right", "home": "Home", "end": "End",
+    "page_up": "Prior", "page_down": "Next", "insert": "Insert",
+}
+
+# Bit do campo state de cada modificador (X.ShiftMask, X.ControlMask, Mod1, Mod4)
+MODIFIER_MASKS = {"Shift_L": 1 << 0, "Control_L": 1 << 2, "Alt_L": 1 << 3, "Super_L": 1 << 6}
+SHIFT_MASK = MODIFIER_MASKS["Shift_L"]
+
+
+class TargetWindowError(RuntimeError):
+    """Janela alvo não encontrada ou fechada durante a execução."""
+
+
+def target_errors():
+    """Exceções esperadas quando a janela ou o display alvo somem no meio da execução."""
+    try:
+        from Xlib import error
+    except ImportError:
+        return (TargetWindowError,)
+    return (TargetWindowError, error.XError, error.ConnectionClosedError)
+
+
+class X11Key:
+    """Tecla especial do X11 (equivalente a pynput Key.tab etc.)."""
+
+    __slots__ = ("name", "keysym_name")
+
+    def __init__(self, name, keysym_name):
+        self.name = name
+        self.keysym_name = keysym_name
+
+    def __repr__(self):
+        return f"<{self.name}>"
+
+    def __eq__(self, other):
+        return isinstance(other, X11Key) and other.name == self.name
+
+    def __hash__(self):
+        return hash(("X11Key", self.name))
+
+
+class X11KeySpace:
+    """Espaço de teclas para compile_combination: ctrl, tab, f5... viram X11Key."""
+
+    def __getattr__(self, name):
+        if name in KEYSYM_NAMES:
+            keysym_name = KEYSYM_NAMES[name]
+        elif name.startswith("f") and name[1:].isdigit() and 1 <= int(name[1:]) <= 24:
+            keysym_name = name.upper()
+        else:
+            raise AttributeError(name)
+        key = X11Key(name, keysym_name)
+        setattr(self, name, key)
+        return key
+
+
+def open_display(name=None):
+    try:
+        from Xlib import display as xdisplay
+    except ImportError:
+        raise TargetWindowError("python-xlib não está instalado (pip install python-xlib)")
+    try:
+        return xdisplay.Display(name)
+    except Exception as e:
+        raise TargetWindowError(f"não foi possível abrir o display X11: {e}")
+
+
+def window_title(display, window):
+    """Título da janela (_NET_WM_NAME em UTF-8 ou WM_NAME); "" se não tiver."""
+    from Xlib import X
+
+    try:
+        prop = window.get_full_property(display.intern_atom("_NET_WM_NAME"),
+                                        display.intern_atom("UTF8_STRING"))
+        if prop and prop.value:
+            value = prop.value
+            return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+        prop = window.get_full_property(display.intern_atom("WM_NAME"), X.AnyPropertyType)
+        if prop and prop.value:
+            value = prop.value
+            return value.decode("latin-1") if isinstance(value, bytes) else str(value)
+    except Exception:
+        pass
+    return ""
+
+
+def list_windows(display=None):
+    """[(id, título)] das janelas com título, pela lista do gerenciador de janelas.
+
+    Sem gerenciador (Xvfb puro), percorre a árvore de janelas.
+    """
+    own = display is None
+    display = display or open_display()
+    from Xlib import X
+
+    try:
+        root = display.screen().root
+        ids = []
+        prop = root.get_full_property(display.intern_atom("_NET_CLIENT_LIST"),
+                                      X.AnyPropertyType)
+        if prop is not None and len(prop.value):
+            ids = list(prop.value)
+        else:
+            pending = [root]
+            while pending:
+                for child in pending.pop().query_tree().children:
+                    ids.append(child.id)
+                    pending.append(child)
+
+        windows = []
+        for wid in ids:
+            title = window_title(display, display.create_resource_object("window", wid))
+            if title:
+                windows.append((wid, title))
+        return windows
+    finally:
+        if own:
+            display.close()
+
+
+def find_window(display, target):
+    """Id da janela por id ("0x3a00007" ou decimal) ou por parte do título."""
+    target = target.strip()
+    try:
+        return int(target, 0)
+    except ValueError:
+        pass
+    wanted = target.lower()
+    matches = [(wid, title) for wid, title in list_windows(display) if wanted in title.lower()]
+    if not matches:
+        raise TargetWindowError(f"nenhuma janela com \"{target}\" no título")
+    # Título idêntico tem preferência sobre o que só contém o texto
+    exact = [m for m in matches if m[1].lower() == wanted]
+    return (exact or matches)[0][0]
+
+
+class X11WindowController:
+    """Controller que envia os eventos de teclado direto para uma janela.
+
+    Os modificadores pressionados viram o campo state dos eventos
+    seguintes, então Ctrl+V e Shift+Tab funcionam sem foco. Caracteres
+    sem tecla no layout atual são enviados por uma tecla livre
+    remapeada temporariamente (como o xdotool faz).
+    """
+
+    key_space = X11KeySpace()
+
+    def __init__(self, target, display_name=None):
+        self.display_name = display_name
+        self.display = open_display(display_name)
+        from Xlib import X, XK
+        from Xlib.protocol import event as xevent
+
+        self.X = X
+        self.XK = XK
+        self.event = xevent
+        self.root = self.display.screen().root
+        self.window_id = find_window(self.display, target)
+        self.window = self.display.create_resource_object("window", self.window_id)
+        self.title = window_title(self.display, self.window)
+        self.state = 0
+        self.scratch = None
+        self.keycodes = {}
+
+    # ---------------- tradução de teclas ----------------
+
+    def _keysym(self, key):
+        if isinstance(key, X11Key):
+            return self.XK.string_to_keysym(key.keysym_name)
+        code = ord(key)
+        # Latin-1 tem keysym igual ao código; o resto usa a faixa Unicode
+        return code if 0x20 <= code <= 0xFF else 0x01000000 | code
+
+    def _keycode(self, keysym):
+        """(keycode, precisa de shift) da keysym, remapeando uma tecla se preciso."""
+        cached = self.keycodes.get(keysym)
+        if cached is not None:
+            return cached
+
+        display = self.display
+        keycode = display.keysym_to_keycode(keysym)
+        if keycode:
+            shift = display.keycode_to_keysym(keycode, 0) != keysym
+            result = (keycode, shift)
+            self.keycodes[keysym] = result
+            return result
+
+        # Sem tecla no layout: usa uma tecla livre só para este caractere
+        keycode = self._scratch_keycode()
+        display.change_keyboard_mapping(keycode, [(keysym, keysym)])
+        display.sync()
+        # A tecla livre muda de caractere; não entra no cache
+        return keycode, False
+
+    def _scratch_keycode(self):
+        if self.scratch is None:
+            info = self.display.display.info
+            first, last = info.min_keycode, info.max_keycode
+            mapping = self.display.get_keyboard_mapping(first, last - first + 1)
+            for offset in range(len(mapping) - 1, -1, -1):
+                if not any(mapping[offset]):
+                    self.scratch = first + offset
+                    break
+            else:
+                raise TargetWindowError("nenhuma tecla livre para enviar o caractere")
+        return self.scratch
+
+    # ---------------- envio ----------------
+
+    def _send(self, pressed, keycode, state):
+        X = self.X
+        cls = self.event.KeyPress if pressed else self.event.KeyRelease
+        ev = cls(time=X.CurrentTime, root=self.root, window=self.window, same_screen=1,
+                 child=X.NONE, root_x=0, root_y=0, event_x=0, event_y=0,
+                 state=state, detail=keycode)
+        try:
+            self.window.send_event(ev, event_mask=X.KeyPressMask if pressed
+                                   else X.KeyReleaseMask, propagate=True)
+            self.display.flush()
+        except Exception as e:
+            raise TargetWindowError(f"janela alvo indisponível: {e}")
+
+    def press(self, key):
+        keysym = self._keysym(key)
+        keycode, shift = self._keycode(keysym)
+        mask = MODIFIER_MASKS.get(key.keysym_name, 0) if isinstance(key, X11Key) else 0
+        self._send(True, keycode, self.state | (SHIFT_MASK if shift else 0))
+        self.state |= mask
+
+    def release(self, key):
+        keysym = self._keysym(key)
+        keycode, shift = self._keycode(keysym)
+        if isinstance(key, X11Key):
+            self.state &= ~MODIFIER_MASKS.get(key.keysym_name, 0)
+        self._send(False, keycode, self.state | (SHIFT_MASK if shift else 0))
+
+    def type(self, text):
+        for char in text:
+            if char == "\n":
+                char = self.key_space.enter
+            elif char == "\t":
+                char = self.key_space.tab
+            self.press(char)
+            self.release(char)
+
+    def make_probe(self):
+        """Sonda das esperas por condição lendo o título desta janela."""
+        from waits import X11Probe
+        return X11Probe(self.window_id, self.display_name)
+
+    def close(self):
+        """Devolve a tecla livre ao layout e fecha a conexão."""
+        try:
+            if self.scratch is not None:
+                self.display.change_keyboard_mapping(self.scratch, [(0, 0)])
+                self.display.sync()
+            self.display.close()
+        except Exception:
+            pass